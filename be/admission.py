@@ -0,0 +1,300 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from config import settings
+from metrics import ADMISSION_DECISIONS, ADMISSION_WAIT, track
+
+
+class Priority(IntEnum):
+    """OpenAI admission classes; lower values are served first."""
+
+    INTERACTIVE = 0
+    PREVIEW = 1
+    INGESTION = 2
+    SUMMARY = 3
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a call is shed instead of queued; maps to 429 with ``Retry-After``."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+_PRIORITY: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "grievance_admission_priority", default=Priority.INTERACTIVE
+)
+
+
+def current_priority() -> Priority:
+    return _PRIORITY.get()
+
+
+def set_request_priority(priority: Priority) -> contextvars.Token:
+    return _PRIORITY.set(priority)
+
+
+def reset_request_priority(token: contextvars.Token) -> None:
+    _PRIORITY.reset(token)
+
+
+@contextmanager
+def admission_priority(priority: Priority) -> Iterator[None]:
+    """Run the block's OpenAI calls under ``priority``."""
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket shared by every OpenAI caller in the process. Callers that find
+    the bucket empty queue by priority (then arrival order) and the head of the
+    queue takes the next token. A caller is rejected up front when its expected
+    wait, given the tokens already owed to callers ahead of it, exceeds its
+    class's ``max_wait``, and rejected later if the wait runs out, so overload
+    turns into 429s instead of parked threads.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int,
+        max_wait: Dict[Priority, float],
+        max_queue: int = 256,
+    ):
+        self.rate = max(rate_per_second, 1e-6)
+        self.burst = max(1, int(burst))
+        self.max_wait = dict(max_wait)
+        self.max_queue = max(0, int(max_queue))
+        self._cond = threading.Condition()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+
+    def _refill_locked(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _expected_wait_locked(self, priority: Priority) -> float:
+        ahead = sum(1 for waiter_priority, _ in self._waiters if waiter_priority <= priority)
+        return max(0.0, (ahead + 1 - self._tokens) / self.rate)
+
+    def _enqueue(self, priority: Priority) -> Optional[Tuple[int, int]]:
+        """Grant immediately (ticket None) or queue a ticket; raises when the call is shed."""
+        with self._cond:
+            self._refill_locked()
+            if not self._waiters and self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            expected = self._expected_wait_locked(priority)
+            if len(self._waiters) >= self.max_queue or expected > self.max_wait.get(priority, 0.0):
+                raise AdmissionRejected(
+                    f"OpenAI capacity exhausted for {priority.name.lower()} requests", expected
+                )
+            ticket = (int(priority), next(self._sequence))
+            heapq.heappush(self._waiters, ticket)
+            return ticket
+
+    def _try_take_locked(self, ticket: Tuple[int, int]) -> Optional[float]:
+        """Take a token for ``ticket`` if it heads the queue; else seconds until the next token."""
+        self._refill_locked()
+        if self._waiters and self._waiters[0] == ticket and self._tokens >= 1:
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            self._cond.notify_all()
+            return None
+        return max((1 - self._tokens) / self.rate, 0.001)
+
+    def _abandon(self, ticket: Tuple[int, int]) -> None:
+        with self._cond:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def acquire(self, priority: Priority) -> float:
+        """Block until a token is available; returns the seconds spent waiting."""
+        started = time.monotonic()
+        ticket = self._enqueue(priority)
+        if ticket is None:
+            return 0.0
+        deadline = started + self.max_wait.get(priority, 0.0)
+        try:
+            with self._cond:
+                while True:
+                    pause = self._try_take_locked(ticket)
+                    if pause is None:
+                        return time.monotonic() - started
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise AdmissionRejected(
+                            f"Timed out waiting for OpenAI capacity ({priority.name.lower()})",
+                            self._expected_wait_locked(priority),
+                        )
+                    self._cond.wait(min(pause, remaining))
+        finally:
+            self._abandon(ticket)
+
+    async def acquire_async(self, priority: Priority) -> float:
+        """asyncio version of :meth:`acquire`; waits without holding a thread."""
+        started = time.monotonic()
+        ticket = self._enqueue(priority)
+        if ticket is None:
+            return 0.0
+        deadline = started + self.max_wait.get(priority, 0.0)
+        try:
+            while True:
+                with self._cond:
+                    pause = self._try_take_locked(ticket)
+                    if pause is None:
+                        return time.monotonic() - started
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise AdmissionRejected(
+                            f"Timed out waiting for OpenAI capacity ({priority.name.lower()})",
+                            self._expected_wait_locked(priority),
+                        )
+                await asyncio.sleep(min(pause, remaining))
+        finally:
+            self._abandon(ticket)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill_locked()
+            queued = {priority.name.lower(): 0 for priority in Priority}
+            for waiter_priority, _ in self._waiters:
+                queued[Priority(waiter_priority).name.lower()] += 1
+            return {
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "tokens": round(self._tokens, 2),
+                "queued": queued,
+                "max_wait_seconds": {priority.name.lower(): wait for priority, wait in self.max_wait.items()},
+            }
+
+
+class TenantRateLimiter:
+    """
+    Per-tenant token buckets for the OpenAI-backed routes, so one client cannot
+    use up the shared budget. Over-limit requests are rejected without waiting.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: int, max_tenants: int = 10000):
+        self.rate = requests_per_minute / 60.0
+        self.burst = max(1, int(burst))
+        self.max_tenants = max_tenants
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def check(self, tenant: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.pop(tenant, (float(self.burst), now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[tenant] = (tokens, now)
+                raise AdmissionRejected("Rate limit exceeded", (1 - tokens) / self.rate)
+            self._buckets[tenant] = (tokens - 1, now)
+            while len(self._buckets) > self.max_tenants:
+                self._buckets.popitem(last=False)
+
+
+_OPENAI_LIMITER: Optional[TokenBucketLimiter] = None
+_TENANT_LIMITER: Optional[TenantRateLimiter] = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def get_openai_limiter() -> Optional[TokenBucketLimiter]:
+    global _OPENAI_LIMITER
+    if not settings.admission.enabled:
+        return None
+    if _OPENAI_LIMITER is None:
+        with _LIMITER_LOCK:
+            if _OPENAI_LIMITER is None:
+                _OPENAI_LIMITER = TokenBucketLimiter(
+                    rate_per_second=settings.admission.openai_requests_per_minute / 60.0,
+                    burst=settings.admission.openai_burst,
+                    max_wait={
+                        Priority[name.upper()]: seconds
+                        for name, seconds in settings.admission.max_wait_seconds.items()
+                    },
+                    max_queue=settings.admission.max_queue,
+                )
+    return _OPENAI_LIMITER
+
+
+def get_tenant_limiter() -> Optional[TenantRateLimiter]:
+    global _TENANT_LIMITER
+    if not settings.admission.enabled or settings.admission.tenant_requests_per_minute <= 0:
+        return None
+    if _TENANT_LIMITER is None:
+        with _LIMITER_LOCK:
+            if _TENANT_LIMITER is None:
+                _TENANT_LIMITER = TenantRateLimiter(
+                    settings.admission.tenant_requests_per_minute,
+                    settings.admission.tenant_burst,
+                )
+    return _TENANT_LIMITER
+
+
+def _record(priority: Priority, outcome: str, waited: float = 0.0) -> None:
+    ADMISSION_DECISIONS.inc((priority.name.lower(), outcome))
+    if outcome == "admitted":
+        ADMISSION_WAIT.observe((priority.name.lower(),), waited)
+
+
+@contextmanager
+def openai_call(operation: str) -> Iterator[None]:
+    """Admit one OpenAI request at the current priority, then time it as a dependency call."""
+    limiter = get_openai_limiter()
+    if limiter is not None:
+        priority = current_priority()
+        try:
+            waited = limiter.acquire(priority)
+        except AdmissionRejected:
+            _record(priority, "rejected")
+            raise
+        _record(priority, "admitted", waited)
+    with track("openai", operation):
+        yield
+
+
+@asynccontextmanager
+async def openai_call_async(operation: str) -> AsyncIterator[None]:
+    limiter = get_openai_limiter()
+    if limiter is not None:
+        priority = current_priority()
+        try:
+            waited = await limiter.acquire_async(priority)
+        except AdmissionRejected:
+            _record(priority, "rejected")
+            raise
+        _record(priority, "admitted", waited)
+    with track("openai", operation):
+        yield
+
+
+def check_tenant(tenant: str, priority: Priority) -> None:
+    limiter = get_tenant_limiter()
+    if limiter is None:
+        return
+    try:
+        limiter.check(tenant)
+    except AdmissionRejected:
+        _record(priority, "tenant_rejected")
+        raise
@@ -1,30 +1,85 @@
-from typing import Any, Dict, Iterable, Optional
+import base64
+import binascii
+import csv
+import functools
+import io
+import json
+import threading
+import time
+import zlib
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from flask_cors import CORS
-from flask import Flask, jsonify, request
-
+from flask import Flask, Response, after_this_request, current_app, g, jsonify, request, stream_with_context
+from sqlalchemy import update
+
+from admission import (
+    AdmissionRejected,
+    Priority,
+    check_tenant,
+    get_openai_limiter,
+    reset_request_priority,
+    set_request_priority,
+)
+from bulk_import import BulkImport
 from config import settings
+from resilience import CircuitOpenError, breaker_states, is_client_error
+from metrics import QueryBudgetExceeded, instrument_flask, render_latest
+from tracing import get_trace_exporter, instrument_flask as instrument_flask_tracing
+from uploads import MultipartSubmission, finalize_uploads, presign_uploads
+from warmup import get_warmup_runner
 from db import (
+    ARCHIVE_STATUSES,
+    ArchivedGrievance,
     Department,
     GDriveConfig,
     Grievance,
     GrievanceStatus,
     Student,
-    get_gdrive_config,
-    get_or_create_default_student,
+    TAG_KINDS,
+    TAG_SOURCE_ADMIN,
+    TAG_SOURCE_SUBMITTER,
+    committed_writes,
+    default_student_ref,
+    gdrive_config_ref,
+    get_archived_grievance,
+    grievance_stats,
     init_db,
+    on_commit,
+    queue_stat_deltas,
+    replica_enabled,
+    replica_status,
+    reset_committed_writes,
+    reset_primary_reads,
+    search_grievances,
     session_scope,
+    set_primary_reads,
+    stat_deltas_for_update,
+    tag_facets,
+    tags_filter,
+    track_committed_writes,
     upsert_gdrive_config,
 )
 from utils import (
     append_chat,
+    classify_grievance,
     embed_text,
     fetch_chat,
     fetch_cluster_analytics,
+    find_recent_duplicate,
+    forget_recent_grievances,
+    find_similar_grievances,
     generate_ai_suggestions,
+    get_grievance_archiver,
+    get_grievance_embedding,
     get_gdrive_poller,
     get_clustering_engine,
+    get_label_model,
+    get_stats_reconciler,
     persist_embedding,
+    refresh_embedding_meta,
     reindex_gdrive_folder,
+    remember_recent_grievance,
     schedule_gdrive_ingestion,
     summarize_for_admin,
     trigger_clustering,
@@ -65,20 +120,25 @@ def parse_bool(value: Any, default: bool = False) -> bool:
     return default
 
 
-def create_app() -> Flask:
-    app = Flask(__name__)
-    app.config.update(settings.as_flask_config())
-    app.json_sort_keys = False
+_BACKGROUND_SERVICES_STARTED = threading.Event()
+_BACKGROUND_SERVICES_LOCK = threading.Lock()
 
-    if settings.allow_cors_origins:
-        allowed_origins = {origin.strip() for origin in settings.allow_cors_origins.split(",")}
-    else:
-        allowed_origins = set()
 
-    # Restore Google Drive folder from database on startup
-    with app.app_context():
+def start_background_services(app: Flask) -> None:
+    """
+    Start warm-up, restore the Drive poller and start the clustering engine,
+    label model, stats reconciler and archiver.
+    Idempotent; runs on the first request, or call it from a post-fork hook.
+    """
+    with _BACKGROUND_SERVICES_LOCK:
+        if _BACKGROUND_SERVICES_STARTED.is_set():
+            return
+        if settings.warmup.enabled:
+            get_warmup_runner().start()
+
+        # Restore Google Drive folder from database on startup
         with session_scope() as session:
-            config = get_gdrive_config(session)
+            config = gdrive_config_ref(session)
             if config:
                 app.logger.info("Restoring GDrive configuration from database: folder_id=%s, token=%s", 
                               config.folder_id, config.start_page_token)
@@ -87,13 +147,31 @@ def create_app() -> Flask:
                 app.logger.info("GDrive poller restarted with persisted configuration")
             else:
                 app.logger.info("No GDrive configuration found in database")
-        
+
         # Start clustering engine
         app.logger.info("Starting Grievance Clustering Engine...")
         clustering_engine = get_clustering_engine()
         clustering_engine.start()
         app.logger.info("Clustering Engine started successfully")
 
+        if settings.classifier.enabled:
+            get_label_model().start()
+        get_stats_reconciler().start()
+        if settings.archive.enabled:
+            get_grievance_archiver().start()
+        _BACKGROUND_SERVICES_STARTED.set()
+
+
+def create_app() -> Flask:
+    app = Flask(__name__)
+    app.config.update(settings.as_flask_config())
+    app.json_sort_keys = False
+
+    if settings.allow_cors_origins:
+        allowed_origins = {origin.strip() for origin in settings.allow_cors_origins.split(",")}
+    else:
+        allowed_origins = set()
+
     def _cors_headers(response):
         if not allowed_origins:
             return response
@@ -108,62 +186,196 @@ def create_app() -> Flask:
     def apply_cors(response):
         return _cors_headers(response)
 
+    @app.before_request
+    def ensure_background_services():
+        # Deferred to the first request so create_app() stays side-effect free
+        # and the threads start in the serving (post-fork) process.
+        if not _BACKGROUND_SERVICES_STARTED.is_set():
+            try:
+                start_background_services(app)
+            except Exception as exc:
+                app.logger.warning("Background services failed to start, will retry: %s", exc)
+
+    @app.before_request
+    def admit_openai_route():
+        # OpenAI-backed routes run their calls under the route's priority class
+        # and, when TENANT_RATE_LIMIT_PER_MINUTE is set, count against the
+        # client's budget. The key is the peer address the server saw, never a
+        # client-supplied header.
+        priority = openai_route_priority()
+        if priority is None:
+            return None
+        g.admission_token = set_request_priority(priority)
+        check_tenant(request.remote_addr or "anonymous", priority)
+        return None
+
+    @app.teardown_request
+    def reset_admission_priority(exc):
+        token = g.pop("admission_token", None)
+        if token is not None:
+            reset_request_priority(token)
+
+    @app.before_request
+    def route_reads():
+        # A client that wrote within the last few seconds reads from the
+        # primary, so it sees its own writes whatever the replica's lag.
+        if replica_enabled():
+            g.primary_reads_token = set_primary_reads(primary_reads_pinned(request))
+            g.committed_writes_token = track_committed_writes()
+
+    @app.after_request
+    def pin_reads_after_write(response):
+        # Only requests that committed writes: previews and failed requests
+        # leave the client on the replica.
+        if replica_enabled() and committed_writes():
+            sticky = settings.replica_routing.sticky_seconds
+            response.set_cookie(
+                PRIMARY_READS_COOKIE,
+                str(int(time.time()) + sticky),
+                max_age=sticky,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    @app.teardown_request
+    def reset_read_routing(exc):
+        token = g.pop("primary_reads_token", None)
+        if token is not None:
+            reset_primary_reads(token)
+        token = g.pop("committed_writes_token", None)
+        if token is not None:
+            reset_committed_writes(token)
+
+    @app.errorhandler(AdmissionRejected)
+    def shed_load(exc: AdmissionRejected):
+        response = error_response(str(exc), 429)
+        response.headers["Retry-After"] = str(exc.retry_after)
+        return response
+
+    @app.errorhandler(CircuitOpenError)
+    def dependency_unavailable(exc: CircuitOpenError):
+        response = error_response(str(exc), 503)
+        response.headers["Retry-After"] = str(exc.retry_after)
+        return response
+
+    instrument_flask(
+        app,
+        query_budgets=ROUTE_QUERY_BUDGETS,
+        enforce_budgets=settings.query_budget.enforce,
+        server_timing=settings.query_budget.server_timing,
+    )
+    instrument_flask_tracing(app)
+
     @app.route("/health", methods=["GET"])
     def health():
         return jsonify({"status": "ok"})
 
-    @app.route("/grievances", methods=["POST"])
-    def create_grievance():
-        payload = request.get_json() or {}
-        title = payload.get("title", "Untitled")
-        description = payload.get("description", "")
-        preview_mode = parse_bool(payload.get("preview"), False)
-        app.logger.info(
-            "create_grievance: received submission preview=%s title=%r desc_len=%d payload_keys=%s",
-            preview_mode,
-            title,
-            len(description or ""),
-            sorted(payload.keys()),
+    @app.route("/ready", methods=["GET"])
+    def ready():
+        """
+        Readiness probe: 200 once warm-up has finished, 503 with its progress
+        until then. Open circuit breakers are reported but do not fail the
+        probe, since the app degrades to its fallbacks instead.
+        """
+        dependencies = breaker_states()
+        replica = replica_status()
+        if not settings.warmup.enabled:
+            return jsonify({"status": "ready", "warmup": None, "dependencies": dependencies, "replica": replica})
+        report = get_warmup_runner().report()
+        if report["ready"]:
+            return jsonify({"status": "ready", "warmup": report, "dependencies": dependencies, "replica": replica})
+        return (
+            jsonify({"status": "warming_up", "warmup": report, "dependencies": dependencies, "replica": replica}),
+            503,
         )
-        
-        if not description:
-            app.logger.warning("create_grievance: missing description, rejecting request")
-            return error_response("Description is required", 400)
 
-        status = parse_status(payload.get("status"), default=GrievanceStatus.NEW)
-        if status is None:
-            app.logger.warning("create_grievance: invalid status provided: %r", payload.get("status"))
-            return error_response("Invalid status value", 400)
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(render_latest(), mimetype="text/plain; version=0.0.4")
 
-        assigned = parse_department(payload.get("assigned_to"), default=Department.OTHERS)
-        if assigned is None:
-            app.logger.warning("create_grievance: invalid department provided: %r", payload.get("assigned_to"))
-            return error_response("Invalid assigned_to value", 400)
+    @app.route("/grievances", methods=["POST"])
+    def create_grievance():
+        upload_stream: Optional[MultipartSubmission] = None
+        if request.mimetype == "multipart/form-data":
+            # Attachments stay unread on the request stream until the grievance
+            # exists, then go straight to S3 (see uploads.py).
+            try:
+                upload_stream = MultipartSubmission.from_request(request)
+                payload = upload_stream.read_fields()
+            except ValueError as exc:
+                return error_response(str(exc), 400)
+
+            @after_this_request
+            def close_upload_stream(response):
+                upload_stream.close()
+                return response
+
+        else:
+            payload = request.get_json() or {}
+        submission, error = parse_submission(payload)
+        if error is not None:
+            return error
+        title = submission["title"]
+        description = submission["description"]
+        preview_mode = submission["preview"]
+        status = submission["status"]
+        assigned = submission["assigned"]
+        issue_tags = submission["tags"]
+        tags_source = TAG_SOURCE_SUBMITTER if issue_tags else None
+        cluster_label = submission["cluster"]
+        cluster_tags = submission["cluster_tags"]
+
+        # Embed up front so near-duplicates of a recent grievance can skip enrichment.
+        embedding = None
+        duplicate_of_id = None
+        if not preview_mode:
+            try:
+                embedding = embed_text(description)
+            except Exception as exc:
+                app.logger.warning("create_grievance: early embedding failed: %s", exc)
+            match = find_recent_duplicate(embedding) if embedding else None
+            if match:
+                with session_scope() as session:
+                    # Other workers' windows may still hold grievances closed since.
+                    original = (
+                        session.query(Grievance)
+                        .filter(Grievance.id == match[0], Grievance.status.notin_(ARCHIVE_STATUSES))
+                        .first()
+                    )
+                    if original:
+                        duplicate_of_id = original.id
+                        if not issue_tags:
+                            issue_tags = list(original.tags or [])
+                            tags_source = original.tags_source
+                        cluster_label = cluster_label or original.cluster
+                        cluster_tags = cluster_tags or list(original.cluster_tags or [])
+                if duplicate_of_id:
+                    app.logger.info(
+                        "create_grievance: near-duplicate of grievance %s (similarity=%.4f), skipping enrichment",
+                        duplicate_of_id,
+                        match[1],
+                    )
 
-        # Get issue_tags from payload or generate with AI
-        issue_tags = ensure_list(first_present(payload, ("category_tags", "issue_tags", "tags")))
-        if not issue_tags or preview_mode:
-            # Generate tags using AI
-            from utils import generate_tags_with_ai
+        if (not issue_tags or preview_mode) and duplicate_of_id is None:
+            # Predict tags locally, falling back to the LLM on low confidence
             app.logger.info(
-                "create_grievance: invoking AI tag generation (preview=%s existing_tags=%s)",
+                "create_grievance: invoking tag classification (preview=%s existing_tags=%s)",
                 preview_mode,
                 issue_tags,
             )
-            generated_tags = generate_tags_with_ai(title, description)
-            app.logger.info(
-                "create_grievance: AI tag generation completed generated=%s", generated_tags
-            )
-            issue_tags = generated_tags if not issue_tags else issue_tags
+            classification = classify_grievance(title, description)
+            if not issue_tags:
+                tags_source = classification["source"]
+            issue_tags, assigned = merge_classification(payload, issue_tags, assigned, classification)
         
-        cluster_label = payload.get("cluster")
-        cluster_tags = ensure_list(first_present(payload, ("cluster_tags", "clusters")))
         if not cluster_tags and cluster_label:
             cluster_tags = [cluster_label]
 
         # If preview mode, return tags and KB suggestions without saving
         if preview_mode:
             from utils import get_kb_suggestions_for_grievance
+            submission.update(status=status, assigned=assigned, tags=issue_tags, cluster_tags=cluster_tags)
             app.logger.info(
                 "create_grievance: preview mode active title=%r tags=%s cluster=%r",
                 title,
@@ -172,62 +384,16 @@ def create_app() -> Flask:
             )
             
             # Get relevant KB chunks
-            kb_chunks = get_kb_suggestions_for_grievance(description, top_k=5)
-            
-            # Generate AI-powered suggestions using the chunks
-            temp_grievance = {
-                "id": 0,  # Temporary ID for preview
-                "title": title,
-                "description": description,
-                "status": status.value,
-                "assigned_to": assigned.value,
-                "tags": issue_tags,
-                "cluster": cluster_label,
-                "cluster_tags": cluster_tags,
-            }
+            kb_chunks = get_kb_suggestions_for_grievance(description, top_k=PREVIEW_KB_TOP_K)
             
             # Use generate_ai_suggestions to get OpenAI-powered analysis
-            ai_suggestions = generate_ai_suggestions(temp_grievance, [], kb_chunks)
-            
-            # Combine KB chunks with AI suggestions
-            kb_suggestions_with_ai = []
-            for chunk in kb_chunks:
-                kb_suggestions_with_ai.append({
-                    "doc_name": chunk.get("doc_name", "Unknown Document"),
-                    "excerpt": chunk.get("excerpt", ""),
-                    "similarity_score": chunk.get("similarity_score", 0.0),
-                    "chunk_id": chunk.get("chunk_id", ""),
-                })
-            
-            app.logger.info(
-                "create_grievance: preview completed kb_chunks=%d ai_suggestions=%d",
-                len(kb_chunks),
-                len(ai_suggestions.get("suggestions", [])),
-            )
-            
-            return jsonify({
-                "preview": True,
-                "grievance": {
-                    "title": title,
-                    "description": description,
-                    "status": status.value,
-                    "assigned_to": assigned.value,
-                    "tags": issue_tags,
-                    "cluster": cluster_label,
-                    "cluster_tags": cluster_tags,
-                },
-                "ai_generated_tags": issue_tags,
-                "kb_suggestions": kb_suggestions_with_ai,
-                "ai_suggestions": ai_suggestions.get("suggestions", []),
-                "ai_summary": ai_suggestions.get("suggestions", [{}])[0].get("summary", ""),
-                "related_grievances": ai_suggestions.get("related_grievances", []),
-                "documents": payload.get("documents", [])
-            })
+            ai_suggestions = generate_ai_suggestions(preview_grievance(submission), [], kb_chunks)
+            return jsonify(build_preview_response(payload, submission, kb_chunks, ai_suggestions))
 
         # Normal mode: Save grievance to database
         try:
             with session_scope() as session:
-                student = get_or_create_default_student(session)
+                student = default_student_ref(session)
                 grievance = Grievance(
                     student_id=student.id,
                     title=title,
@@ -235,11 +401,16 @@ def create_app() -> Flask:
                     status=status,
                     assigned_to=assigned,
                     tags=issue_tags,
+                    tags_source=tags_source,
                     cluster=cluster_label,
                     cluster_tags=cluster_tags,
+                    duplicate_of_id=duplicate_of_id,
                 )
                 session.add(grievance)
                 session.flush()
+                if embedding and duplicate_of_id is None:
+                    # Only a committed row may become a duplicate target.
+                    on_commit(session, functools.partial(remember_recent_grievance, grievance.id, embedding))
                 app.logger.info(
                     "create_grievance: grievance persisted id=%s student_id=%s status=%s assigned_to=%s",
                     grievance.id,
@@ -249,47 +420,59 @@ def create_app() -> Flask:
                 )
 
                 documents = payload.get("documents", [])
-                if documents:
-                    app.logger.info(
-                        "create_grievance[%s]: uploading %d documents", grievance.id, len(documents)
-                    )
+                if documents or upload_stream is not None:
                     try:
-                        urls = upload_documents_to_s3(grievance.id, documents)
-                        grievance.s3_doc_urls = urls
+                        if upload_stream is not None:
+                            urls = upload_stream.upload_documents(grievance.id)
+                        else:
+                            app.logger.info(
+                                "create_grievance[%s]: uploading %d documents", grievance.id, len(documents)
+                            )
+                            urls = upload_documents_to_s3(grievance.id, documents)
+                        if urls:
+                            grievance.s3_doc_urls = urls
                         app.logger.info(
                             "create_grievance[%s]: uploaded documents urls=%s", grievance.id, urls
                         )
                     except RuntimeError as exc:
                         app.logger.warning("create_grievance[%s]: S3 upload failed: %s", grievance.id, exc)
 
-                try:
-                    app.logger.info("create_grievance[%s]: generating embedding", grievance.id)
-                    embedding = embed_text(grievance.description)
+                if duplicate_of_id is not None:
                     app.logger.info(
-                        "create_grievance[%s]: embedding generated dimensions=%d",
+                        "create_grievance[%s]: linked to grievance %s, embedding not persisted",
                         grievance.id,
-                        len(embedding),
-                    )
-                    persist_embedding(
-                        grievance.id,
-                        embedding,
-                        {
-                            "tags": grievance.tags,
-                            "issue_tags": grievance.tags,
-                            "cluster": grievance.cluster,
-                            "cluster_tags": grievance.cluster_tags or [],
-                            "student_id": grievance.student_id,
-                        },
-                    )
-                    app.logger.info(
-                        "create_grievance[%s]: embedding persisted to vector store", grievance.id
-                    )
-                except RuntimeError as exc:
-                    app.logger.warning(
-                        "create_grievance[%s]: embedding persistence skipped: %s",
-                        grievance.id,
-                        exc,
+                        duplicate_of_id,
                     )
+                else:
+                    try:
+                        if embedding is None:
+                            app.logger.info("create_grievance[%s]: generating embedding", grievance.id)
+                            embedding = embed_text(grievance.description)
+                        app.logger.info(
+                            "create_grievance[%s]: embedding ready dimensions=%d",
+                            grievance.id,
+                            len(embedding),
+                        )
+                        persist_embedding(
+                            grievance.id,
+                            embedding,
+                            {
+                                "tags": grievance.tags,
+                                "issue_tags": grievance.tags,
+                                "cluster": grievance.cluster,
+                                "cluster_tags": grievance.cluster_tags or [],
+                                "student_id": grievance.student_id,
+                            },
+                        )
+                        app.logger.info(
+                            "create_grievance[%s]: embedding persisted to vector store", grievance.id
+                        )
+                    except RuntimeError as exc:
+                        app.logger.warning(
+                            "create_grievance[%s]: embedding persistence skipped: %s",
+                            grievance.id,
+                            exc,
+                        )
 
                 session.add(grievance)
                 serialized = serialize_grievance(grievance)
@@ -300,6 +483,8 @@ def create_app() -> Flask:
                     serialized.get("cluster"),
                 )
                 return jsonify({"grievance": serialized})
+        except QueryBudgetExceeded:
+            raise
         except Exception as exc:
             app.logger.exception("create_grievance: unexpected failure processing submission")
             return error_response("Failed to create grievance", 500)
@@ -307,8 +492,9 @@ def create_app() -> Flask:
     @app.route("/grievances", methods=["GET"])
     def list_grievances():
         requested_student_id = request.args.get("student_id", type=int)
+        include_archived = parse_bool(request.args.get("include_archived"), False)
         with session_scope() as session:
-            default_student = get_or_create_default_student(session)
+            default_student = default_student_ref(session)
             target_student_id = default_student.id
 
             if requested_student_id is not None:
@@ -318,12 +504,12 @@ def create_app() -> Flask:
                 else:
                     target_student_id = default_student.id
 
-            query = (
-                session.query(Grievance)
-                .filter(Grievance.student_id == target_student_id)
-                .order_by(Grievance.created_at.desc())
+            default_student_id = default_student.id
+
+        with session_scope(readonly=True) as session:
+            items = list_grievance_rows(
+                session, include_archived, lambda model: [model.student_id == target_student_id]
             )
-            items = query.all()
             app.logger.info(
                 "list_grievances: student_id=%s returned=%d requested_student_id=%s",
                 target_student_id,
@@ -334,24 +520,23 @@ def create_app() -> Flask:
             if (
                 requested_student_id is not None
                 and not items
-                and target_student_id != default_student.id
+                and target_student_id != default_student_id
             ):
-                items = (
-                    session.query(Grievance)
-                    .filter(Grievance.student_id == default_student.id)
-                    .order_by(Grievance.created_at.desc())
-                    .all()
+                items = list_grievance_rows(
+                    session, include_archived, lambda model: [model.student_id == default_student_id]
                 )
 
             return jsonify({"grievances": [serialize_grievance(item) for item in items]})
 
     @app.route("/grievances/<int:grievance_id>", methods=["GET"])
     def grievance_detail(grievance_id: int):
-        with session_scope() as session:
+        with session_scope(readonly=True) as session:
             grievance = session.query(Grievance).filter(Grievance.id == grievance_id).first()
+            if not grievance and parse_bool(request.args.get("include_archived"), False):
+                grievance = get_archived_grievance(session, grievance_id)
             if not grievance:
                 return error_response("Grievance not found", 404)
-            chat = safe_fetch_chat(grievance_id)
+            chat = safe_fetch_chat(grievance_id, archived=isinstance(grievance, ArchivedGrievance))
             return jsonify(
                 {
                     "grievance": serialize_grievance(grievance),
@@ -371,79 +556,339 @@ def create_app() -> Flask:
         chat = safe_append_chat(grievance_id, "student", payload["message"])
         return jsonify(chat)
 
+    @app.route("/uploads/presign", methods=["POST"])
+    def presign_document_uploads():
+        """Presigned direct-to-S3 upload targets, keyed by the files' SHA-256."""
+        payload = request.get_json(force=True) or {}
+        try:
+            uploads = presign_uploads(ensure_list(payload.get("files")), payload.get("method") or "put")
+        except ValueError as exc:
+            return error_response(str(exc), 400)
+        except CircuitOpenError:
+            raise
+        except RuntimeError as exc:
+            return error_response(str(exc), 500)
+        return jsonify({"uploads": uploads})
+
+    @app.route("/grievances/<int:grievance_id>/documents", methods=["POST"])
+    def finalize_document_uploads(grievance_id: int):
+        """Attach presigned uploads (by key) to a grievance's documents."""
+        payload = request.get_json(force=True) or {}
+        with session_scope() as session:
+            exists = session.query(Grievance.id).filter(Grievance.id == grievance_id).scalar()
+        if not exists:
+            return error_response("Grievance not found", 404)
+        # The S3 checks run before the row is loaded so no connection is held during them.
+        try:
+            urls = finalize_uploads(ensure_list(payload.get("keys")))
+        except ValueError as exc:
+            return error_response(str(exc), 400)
+        except CircuitOpenError:
+            raise
+        except RuntimeError as exc:
+            return error_response(str(exc), 500)
+        with session_scope() as session:
+            # Touch the row before reading it: the UPDATE takes the row lock
+            # (the write lock on SQLite) until commit, so concurrent finalize
+            # calls append in turn instead of overwriting each other's URLs.
+            touched = session.execute(
+                update(Grievance).where(Grievance.id == grievance_id).values(updated_at=datetime.utcnow())
+            ).rowcount
+            grievance = session.query(Grievance).filter(Grievance.id == grievance_id).populate_existing().first()
+            if not touched or not grievance:
+                return error_response("Grievance not found", 404)
+            existing = list(grievance.s3_doc_urls or [])
+            grievance.s3_doc_urls = existing + [url for url in dict.fromkeys(urls) if url not in existing]
+            session.flush()
+            return jsonify({"grievance": serialize_grievance(grievance)})
+
     @app.route("/admin/grievances", methods=["GET"])
     def admin_list_grievances():
+        include_archived = parse_bool(request.args.get("include_archived"), False)
+        with session_scope(readonly=True) as session:
+            items = list_grievance_rows(
+                session, include_archived, lambda model: admin_grievance_filters(request.args, model)
+            )
+            return jsonify({"grievances": [serialize_grievance(item) for item in items]})
+
+    @app.route("/admin/tags", methods=["GET"])
+    def admin_tag_facets():
+        limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+        kinds = TAG_KINDS
+        if request.args.get("kind"):
+            if request.args["kind"] not in TAG_KINDS:
+                return error_response("kind must be one of: issue, cluster", 400)
+            kinds = (request.args["kind"],)
+        criteria = admin_grievance_filters(request.args)
+        with session_scope() as session:
+            facets = {
+                kind: [{"tag": tag, "count": count} for tag, count in tag_facets(session, kind, criteria, limit)]
+                for kind in kinds
+            }
+        return jsonify({"tags": facets})
+
+    @app.route("/admin/stats", methods=["GET"])
+    def admin_stats():
+        try:
+            since = parse_day(request.args.get("since"))
+            until = parse_day(request.args.get("until"))
+        except ValueError:
+            return error_response("since and until must be dates (YYYY-MM-DD)", 400)
+        with session_scope() as session:
+            rows = grievance_stats(session, since=since, until=until)
+            stats = summarize_stats(rows)
+        stats["last_reconcile"] = get_stats_reconciler().last_result()
+        return jsonify(stats)
+
+    @app.route("/admin/stats/reconcile", methods=["POST"])
+    def admin_reconcile_stats():
+        return jsonify(get_stats_reconciler().reconcile())
+
+    @app.route("/admin/archive", methods=["GET"])
+    def admin_archive_status():
+        archiver = get_grievance_archiver()
+        return jsonify(
+            {
+                "enabled": settings.archive.enabled,
+                "after_days": archiver.after_days,
+                "last_run": archiver.last_result(),
+            }
+        )
+
+    @app.route("/admin/archive/run", methods=["POST"])
+    def admin_run_archive():
+        return jsonify(get_grievance_archiver().archive())
+
+    @app.route("/admin/grievances/export", methods=["GET"])
+    def admin_export_grievances():
+        export_format = (request.args.get("format") or "ndjson").lower()
+        if export_format not in EXPORT_FORMATS:
+            return error_response("format must be one of: ndjson, csv", 400)
+        compress = parse_bool(request.args.get("gzip"), False)
+        include_archived = parse_bool(request.args.get("include_archived"), False)
         status = parse_status(request.args.get("status"))
         assigned = parse_department(request.args.get("assigned_to"))
-        with session_scope() as session:
-            query = session.query(Grievance)
+        app.logger.info(
+            "admin_export_grievances: format=%s gzip=%s status=%s assigned_to=%s",
+            export_format,
+            compress,
+            status.value if status else None,
+            assigned.value if assigned else None,
+        )
+
+        def rows(session, model) -> Iterator[Any]:
+            query = session.query(model)
             if status:
-                query = query.filter(Grievance.status == status)
+                query = query.filter(model.status == status)
             if assigned:
-                query = query.filter(Grievance.assigned_to == assigned)
-            items = query.order_by(Grievance.created_at.desc()).all()
-            return jsonify({"grievances": [serialize_grievance(item) for item in items]})
+                query = query.filter(model.assigned_to == assigned)
+            # yield_per streams rows through a server-side cursor where the
+            # driver supports it, so only one batch is ever held in memory.
+            return query.order_by(model.id).yield_per(EXPORT_BATCH_SIZE)
+
+        def generate() -> Iterator[bytes]:
+            models = (Grievance, ArchivedGrievance) if include_archived else (Grievance,)
+            with session_scope() as session:
+                encoder = EXPORT_FORMATS[export_format]
+                chunks = encoder(
+                    serialize_grievance(item) for model in models for item in rows(session, model)
+                )
+                yield from gzip_stream(chunks) if compress else chunks
+
+        filename = f"grievances.{export_format}"
+        headers = {"Content-Disposition": f"attachment; filename={filename}"}
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        mimetype = "application/x-ndjson" if export_format == "ndjson" else "text/csv"
+        return Response(stream_with_context(generate()), mimetype=mimetype, headers=headers)
+
+    @app.route("/admin/grievances/bulk", methods=["POST"])
+    def admin_bulk_import_grievances():
+        try:
+            importer = BulkImport(
+                request.stream,
+                classify=(request.args.get("classify") or "auto").lower(),
+                embed=parse_bool(request.args.get("embed"), True),
+            )
+        except ValueError as exc:
+            return error_response(str(exc), 400)
+        app.logger.info(
+            "admin_bulk_import_grievances: classify=%s embed=%s content_length=%s",
+            importer.classify,
+            importer.embed,
+            request.content_length,
+        )
+        # Results stream back batch by batch while the body is still being read.
+        return Response(stream_with_context(encode_ndjson(importer.run())), mimetype="application/x-ndjson")
+
+    @app.route("/admin/grievances/search", methods=["GET"])
+    def admin_search_grievances():
+        query_text = (request.args.get("q") or "").strip()
+        if not query_text:
+            return error_response("q is required", 400)
+        status = parse_status(request.args.get("status"))
+        assigned = parse_department(request.args.get("assigned_to"))
+        limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+        after = None
+        if request.args.get("cursor"):
+            after = decode_search_cursor(request.args["cursor"])
+            if after is None:
+                return error_response("Invalid cursor", 400)
+
+        with session_scope() as session:
+            results = search_grievances(
+                session,
+                query_text,
+                status=status,
+                assigned_to=assigned,
+                limit=limit,
+                after=after,
+            )
+            next_cursor = None
+            if len(results) == limit:
+                last_grievance, last_rank = results[-1]
+                next_cursor = encode_search_cursor(last_rank, last_grievance.id)
+            app.logger.info(
+                "admin_search_grievances: q=%r returned=%d has_more=%s",
+                query_text,
+                len(results),
+                next_cursor is not None,
+            )
+            return jsonify(
+                {
+                    "grievances": [
+                        {**serialize_grievance(grievance), "rank": rank}
+                        for grievance, rank in results
+                    ],
+                    "next_cursor": next_cursor,
+                }
+            )
+
+    @app.route("/admin/grievances/similar", methods=["GET"])
+    def admin_similar_grievances():
+        grievance_id = request.args.get("id", type=int)
+        query_text = (request.args.get("q") or "").strip()
+        if grievance_id is None and not query_text:
+            return error_response("id or q is required", 400)
+        status = parse_status(request.args.get("status"))
+        top_k = min(max(request.args.get("top_k", 10, type=int), 1), 50)
+
+        description = None
+        if grievance_id is not None:
+            with session_scope() as session:
+                description = (
+                    session.query(Grievance.description).filter(Grievance.id == grievance_id).scalar()
+                )
+            if description is None:
+                return error_response("Grievance not found", 404)
+
+        # OpenAI and Mongo calls run before the ranking session is opened, so a
+        # slow dependency does not hold a pooled connection.
+        exclude_ids = [grievance_id] if grievance_id is not None else []
+        try:
+            if grievance_id is not None:
+                embedding = get_grievance_embedding(grievance_id) or embed_text(description)
+            else:
+                embedding = embed_text(query_text)
+            # Over-fetch when filtering so the status filter still leaves top_k rows.
+            pool = top_k * SIMILAR_CANDIDATE_FACTOR if status else top_k
+            neighbours = find_similar_grievances(embedding, top_k=pool, exclude_ids=exclude_ids)
+        except (AdmissionRejected, CircuitOpenError):
+            raise
+        except Exception as exc:
+            if not (
+                isinstance(exc, RuntimeError)
+                or is_client_error("openai", exc)
+                or is_client_error("mongo", exc)
+            ):
+                raise
+            app.logger.warning("admin_similar_grievances: similarity lookup failed: %s", exc)
+            return error_response("Similarity search is unavailable", 503)
+
+        with session_scope() as session:
+            matches = load_ranked_grievances(session, neighbours, status=status)[:top_k]
+            app.logger.info(
+                "admin_similar_grievances: id=%s q=%r status=%s returned=%d",
+                grievance_id,
+                query_text,
+                status.value if status else None,
+                len(matches),
+            )
+            return jsonify(
+                {
+                    "grievances": [
+                        {**serialize_grievance(item), "similarity": score}
+                        for item, score in matches
+                    ]
+                }
+            )
 
     @app.route("/admin/grievances/<int:grievance_id>", methods=["PATCH"])
     def admin_update_grievance(grievance_id: int):
         payload = request.get_json(force=True)
-        allowed_fields = {
-            "status",
-            "assigned_to",
-            "tags",
-            "issue_tags",
-            "category_tags",
-            "cluster",
-            "cluster_tags",
-            "clusters",
-            "drop_reason",
-        }
-        if not any(key in payload for key in allowed_fields):
-            return error_response("No updatable fields provided", 400)
+        changes, error = parse_grievance_changes(payload)
+        if error is not None:
+            return error
 
         with session_scope() as session:
             grievance = session.query(Grievance).filter(Grievance.id == grievance_id).first()
             if not grievance:
                 return error_response("Grievance not found", 404)
+            for column, value in changes.items():
+                setattr(grievance, column, value)
+            session.add(grievance)
+            serialized = serialize_grievance(grievance)
+        if changes.get("status") in ARCHIVE_STATUSES:
+            forget_recent_grievances([grievance_id])
+        return jsonify({"grievance": serialized})
 
-            if "status" in payload:
-                status = parse_status(payload["status"])
-                if status is None:
-                    return error_response("Invalid status value", 400)
-                grievance.status = status
-
-            if "assigned_to" in payload:
-                dept = parse_department(payload["assigned_to"])
-                if dept is None:
-                    return error_response("Invalid assigned_to value", 400)
-                grievance.assigned_to = dept
-
-            tags_value = first_present(payload, ("category_tags", "issue_tags", "tags"))
-            if tags_value is not None:
-                grievance.tags = ensure_list(tags_value)
-
-            cluster_key_present = "cluster" in payload
-            cluster_label_value = payload.get("cluster") if cluster_key_present else None
-            cluster_tags_value = first_present(payload, ("cluster_tags", "clusters"))
-            cluster_tags_list = None
-            if cluster_tags_value is not None:
-                cluster_tags_list = ensure_list(cluster_tags_value)
-                grievance.cluster_tags = cluster_tags_list
-
-            if cluster_key_present:
-                grievance.cluster = cluster_label_value
-                if cluster_label_value and cluster_tags_value is None:
-                    grievance.cluster_tags = [cluster_label_value]
-                if cluster_label_value is None and cluster_tags_value is None:
-                    grievance.cluster_tags = []
-            elif cluster_tags_list:
-                grievance.cluster = cluster_tags_list[0]
-
-            if "drop_reason" in payload:
-                grievance.drop_reason = payload["drop_reason"]
+    @app.route("/admin/grievances", methods=["PATCH"])
+    def admin_bulk_update_grievances():
+        payload = request.get_json(force=True)
+        if not isinstance(payload, dict) or not isinstance(payload.get("update"), dict):
+            return error_response("update must be an object", 400)
+        criteria, error = parse_bulk_filter(payload)
+        if error is not None:
+            return error
+        changes, error = parse_grievance_changes(payload["update"])
+        if error is not None:
+            return error
 
-            session.add(grievance)
-            return jsonify({"grievance": serialize_grievance(grievance)})
+        with session_scope() as session:
+            queue_stat_deltas(session, stat_deltas_for_update(session, criteria, changes))
+            # One UPDATE ... WHERE for the whole selection; RETURNING gives the
+            # ids for the embedding meta refresh without a separate SELECT.
+            result = session.execute(
+                update(Grievance)
+                .where(*criteria)
+                .values(**changes)
+                .returning(Grievance.id)
+                .execution_options(synchronize_session=False)
+            )
+            updated_ids = [grievance_id for (grievance_id,) in result]
+
+        # Closed grievances stop being duplicate targets. The vector index holds
+        # only vectors, and similar/duplicate hits read tags, cluster and status
+        # from SQL, so nothing else here goes stale.
+        if updated_ids and changes.get("status") in ARCHIVE_STATUSES:
+            forget_recent_grievances(updated_ids)
+        meta_refreshed = None
+        meta_changes = embedding_meta_changes(changes)
+        if updated_ids and meta_changes:
+            try:
+                refresh_embedding_meta(updated_ids, meta_changes)
+                meta_refreshed = True
+            except Exception as exc:
+                # The SQL update is committed; clustering picks the meta up on its next run.
+                app.logger.warning("admin_bulk_update_grievances: embedding meta refresh skipped: %s", exc)
+                meta_refreshed = False
+        app.logger.info(
+            "admin_bulk_update_grievances: fields=%s updated=%d meta_refreshed=%s",
+            sorted(changes),
+            len(updated_ids),
+            meta_refreshed,
+        )
+        return jsonify({"updated": len(updated_ids), "embedding_meta_refreshed": meta_refreshed})
 
     @app.route("/admin/grievances/<int:grievance_id>/chat", methods=["POST"])
     def admin_add_chat(grievance_id: int):
@@ -501,7 +946,7 @@ def create_app() -> Flask:
         if not folder_id:
             # Try to restore from database
             with session_scope() as session:
-                config = get_gdrive_config(session)
+                config = gdrive_config_ref(session)
                 if config:
                     folder_id = config.folder_id
                     app.logger.info("Restored folder_id from database: %s", folder_id)
@@ -556,6 +1001,14 @@ def create_app() -> Flask:
         except RuntimeError as exc:
             return error_response(str(exc), 500)
 
+    @app.route("/admin/debug/traces", methods=["GET"])
+    def admin_debug_traces():
+        """Most recent sampled request traces, newest first."""
+        limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+        min_duration_ms = request.args.get("min_duration_ms", 0.0, type=float)
+        traces = get_trace_exporter().recent(limit=limit, min_duration_ms=min_duration_ms)
+        return jsonify({"sample_rate": settings.tracing.sample_rate, "traces": traces})
+
     @app.route("/admin/clustering/status", methods=["GET"])
     def admin_clustering_status():
         """Get current clustering engine status."""
@@ -565,47 +1018,47 @@ def create_app() -> Flask:
         except RuntimeError as exc:
             return error_response(str(exc), 500)
 
+    @app.route("/admin/admission", methods=["GET"])
+    def admin_admission_status():
+        limiter = get_openai_limiter()
+        return jsonify({"enabled": limiter is not None, "openai": limiter.snapshot() if limiter else None})
+
+    @app.route("/admin/dependencies", methods=["GET"])
+    def admin_dependency_status():
+        """Circuit breaker state for MongoDB, OpenAI, S3 and Google Drive."""
+        return jsonify(breaker_states())
+
+    @app.route("/admin/classifier/report", methods=["GET"])
+    def admin_classifier_report():
+        """Local tag/department model status and agreement with the LLM."""
+        return jsonify(get_label_model().report())
+
+    @app.route("/admin/classifier/retrain", methods=["POST"])
+    def admin_retrain_classifier():
+        """Retrain the local tag/department model from the database now."""
+        try:
+            result = get_label_model().train()
+            return jsonify(result)
+        except RuntimeError as exc:
+            return error_response(str(exc), 500)
+
     @app.route("/admin/grievances/ai-summarize", methods=["GET"])
     def admin_ai_summarize():
-        with session_scope() as session:
-            grievances = session.query(Grievance).all()
-            payload = [serialize_grievance(item) for item in grievances]
-        summary = summarize_for_admin(payload)
+        summary = summarize_for_admin(load_summary_rows())
         return jsonify({"summary": summary})
 
     @app.route("/ai/suggestions/preview", methods=["POST"])
     def preview_ai_suggestions():
-        payload = request.get_json(force=True)
-        if "grievance_id" not in payload:
-            return error_response("grievance_id is required", 400)
-        try:
-            grievance_id = int(payload["grievance_id"])
-        except (TypeError, ValueError):
-            return error_response("grievance_id must be an integer", 400)
-
-        with session_scope() as session:
-            grievance = (
-                session.query(Grievance).filter(Grievance.id == grievance_id).first()
-            )
-            if not grievance:
-                return error_response("Grievance not found", 404)
-
-            related_query = (
-                session.query(Grievance)
-                .filter(Grievance.id != grievance.id)
-                .filter(Grievance.status == GrievanceStatus.SOLVED)
-            )
-            if grievance.cluster:
-                related_query = related_query.filter(Grievance.cluster == grievance.cluster)
-
-            related = (
-                related_query.order_by(Grievance.updated_at.desc()).limit(5).all()
-            )
-
-        serialized_grievance = serialize_grievance(grievance)
-        related_payload = [serialize_related_grievance(item) for item in related]
+        grievance_id, error = parse_grievance_id(request.get_json(force=True))
+        if error is not None:
+            return error
+        context = load_suggestion_context(grievance_id)
+        if context is None:
+            return error_response("Grievance not found", 404)
+
+        serialized_grievance, related_payload = context
         suggestions = generate_ai_suggestions(serialized_grievance, related_payload)
-        suggestions["grievance_id"] = grievance.id
+        suggestions["grievance_id"] = grievance_id
         return jsonify(suggestions)
 
     @app.route("/ai/suggestions/confirm", methods=["POST"])
@@ -632,6 +1085,100 @@ def create_app() -> Flask:
     return app
 
 
+OPENAI_ROUTE_PRIORITIES = {
+    "preview_ai_suggestions": Priority.PREVIEW,
+    "admin_similar_grievances": Priority.INTERACTIVE,
+    "admin_reindex_gdrive": Priority.INGESTION,
+    "admin_bulk_import_grievances": Priority.INGESTION,
+    "admin_ai_summarize": Priority.SUMMARY,
+}
+
+
+# Most SQL statements a request may issue before its response is returned
+# (streamed bodies not included), for the most expensive valid path through
+# the handler. Over-budget requests are logged and counted on /metrics;
+# SQL_QUERY_BUDGET_ENFORCE=true turns them into 500s. benchmarks/query_budget.py
+# checks every route listed here.
+ROUTE_QUERY_BUDGETS = {
+    # default student (cold reference cache only), requested student, then
+    # hot + archived rows for the student and for the default-student fallback
+    "list_grievances": 6,
+    "grievance_detail": 2,
+    "admin_list_grievances": 2,
+    "admin_tag_facets": 2,
+    "admin_stats": 1,
+    "admin_search_grievances": 2,
+    "admin_similar_grievances": 2,
+    "admin_update_grievance": 3,
+    "add_student_chat": 1,
+    # duplicate lookup, default student (cold cache), insert, document URLs,
+    # stats upsert
+    "create_grievance": 5,
+}
+
+
+def openai_route_priority() -> Optional[Priority]:
+    """Admission class of the current request, or None when the route does not call OpenAI."""
+    if request.endpoint == "create_grievance":
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict) and parse_bool(payload.get("preview"), False):
+            return Priority.PREVIEW
+        return Priority.INTERACTIVE
+    return OPENAI_ROUTE_PRIORITIES.get(request.endpoint)
+
+
+PRIMARY_READS_COOKIE = "grievance_primary_until"
+
+
+def primary_reads_pinned(req) -> bool:
+    """Whether ``req`` comes from a client that wrote within ``REPLICA_STICKY_SECONDS``."""
+    try:
+        return float(req.cookies.get(PRIMARY_READS_COOKIE) or 0) > time.time()
+    except ValueError:
+        return False
+
+
+SIMILAR_CANDIDATE_FACTOR = 10
+
+
+def load_ranked_grievances(
+    session,
+    neighbours: List[tuple],
+    status: Optional[GrievanceStatus] = None,
+) -> List[tuple]:
+    """Resolve ``(grievance_id, score)`` pairs to rows, keeping the ranking order."""
+    if not neighbours:
+        return []
+    query = session.query(Grievance).filter(
+        Grievance.id.in_([grievance_id for grievance_id, _ in neighbours])
+    )
+    if status:
+        query = query.filter(Grievance.status == status)
+    rows = {item.id: item for item in query}
+    return [
+        (rows[grievance_id], score)
+        for grievance_id, score in neighbours
+        if grievance_id in rows
+    ]
+
+
+def find_related_solved_grievances(
+    session, grievance: Grievance, top_k: int
+) -> Optional[List[Grievance]]:
+    """Nearest SOLVED grievances by embedding, or None when the index is unavailable."""
+    try:
+        embedding = get_grievance_embedding(grievance.id) or embed_text(grievance.description)
+        neighbours = find_similar_grievances(
+            embedding,
+            top_k=top_k * SIMILAR_CANDIDATE_FACTOR,
+            exclude_ids=[grievance.id],
+        )
+    except RuntimeError:
+        return None
+    ranked = load_ranked_grievances(session, neighbours, status=GrievanceStatus.SOLVED)
+    return [item for item, _ in ranked[:top_k]]
+
+
 def serialize_related_grievance(grievance: Grievance) -> Dict[str, Any]:
     return {
         "id": grievance.id,
@@ -643,6 +1190,25 @@ def serialize_related_grievance(grievance: Grievance) -> Dict[str, Any]:
 
 
 
+SUMMARY_DESCRIPTION_CHARS = 280
+
+
+def compact_grievance_for_summary(row) -> Dict[str, Any]:
+    """Minimal, token-efficient projection of a grievance row for LLM summaries."""
+    description = row.description or ""
+    if len(description) > SUMMARY_DESCRIPTION_CHARS:
+        description = description[:SUMMARY_DESCRIPTION_CHARS] + "..."
+    return {
+        "id": row.id,
+        "t": row.title,
+        "d": description,
+        "s": row.status.value if row.status else None,
+        "a": row.assigned_to.value if row.assigned_to else None,
+        "g": list(row.tags or []),
+        "c": row.cluster,
+    }
+
+
 def parse_status(value: Optional[str], default: Optional[GrievanceStatus] = None) -> Optional[GrievanceStatus]:
     if value is None:
         return default
@@ -661,7 +1227,7 @@ def parse_department(value: Optional[str], default: Optional[Department] = None)
         return None
 
 
-def serialize_grievance(grievance: Grievance) -> Dict[str, Any]:
+def serialize_grievance(grievance: Union[Grievance, ArchivedGrievance]) -> Dict[str, Any]:
     return {
         "id": grievance.id,
         "student_id": grievance.student_id,
@@ -675,18 +1241,442 @@ def serialize_grievance(grievance: Grievance) -> Dict[str, Any]:
         "s3_doc_urls": grievance.s3_doc_urls or [],
         "cluster": grievance.cluster,
         "drop_reason": grievance.drop_reason,
+        "duplicate_of": grievance.duplicate_of_id,
         "created_at": grievance.created_at.isoformat() if grievance.created_at else None,
         "updated_at": grievance.updated_at.isoformat() if grievance.updated_at else None,
         "tag_groups": {
             "issue": grievance.tags or [],
             "cluster": grievance.cluster_tags or [],
         },
+        "archived": isinstance(grievance, ArchivedGrievance),
+    }
+
+
+def parse_submission(payload: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[Response]]:
+    """Validate a ``POST /grievances`` body; returns ``(submission, None)`` or ``(None, error)``."""
+    title = payload.get("title", "Untitled")
+    description = payload.get("description", "")
+    preview_mode = parse_bool(payload.get("preview"), False)
+    current_app.logger.info(
+        "create_grievance: received submission preview=%s title=%r desc_len=%d payload_keys=%s",
+        preview_mode,
+        title,
+        len(description or ""),
+        sorted(payload.keys()),
+    )
+
+    if not description:
+        current_app.logger.warning("create_grievance: missing description, rejecting request")
+        return None, error_response("Description is required", 400)
+
+    status = parse_status(payload.get("status"), default=GrievanceStatus.NEW)
+    if status is None:
+        current_app.logger.warning("create_grievance: invalid status provided: %r", payload.get("status"))
+        return None, error_response("Invalid status value", 400)
+
+    assigned = parse_department(payload.get("assigned_to"), default=Department.OTHERS)
+    if assigned is None:
+        current_app.logger.warning(
+            "create_grievance: invalid department provided: %r", payload.get("assigned_to")
+        )
+        return None, error_response("Invalid assigned_to value", 400)
+
+    return {
+        "title": title,
+        "description": description,
+        "preview": preview_mode,
+        "status": status,
+        "assigned": assigned,
+        # Get issue_tags from payload or generate with AI
+        "tags": ensure_list(first_present(payload, ("category_tags", "issue_tags", "tags"))),
+        "cluster": payload.get("cluster"),
+        "cluster_tags": ensure_list(first_present(payload, ("cluster_tags", "clusters"))),
+    }, None
+
+
+def merge_classification(
+    payload: Dict[str, Any],
+    issue_tags: List[str],
+    assigned: Department,
+    classification: Dict[str, Any],
+) -> Tuple[List[str], Department]:
+    """Fill in tags (and the department, unless the client chose one) from a classification."""
+    current_app.logger.info(
+        "create_grievance: tag classification completed source=%s generated=%s department=%s",
+        classification["source"],
+        classification["tags"],
+        classification["department"],
+    )
+    issue_tags = classification["tags"] if not issue_tags else issue_tags
+    if payload.get("assigned_to") is None and classification["department"]:
+        assigned = parse_department(classification["department"], default=assigned)
+    return issue_tags, assigned
+
+
+def admin_grievance_filters(args, model=Grievance) -> List[Any]:
+    """
+    Criteria for the admin list filters: ``status``, ``assigned_to`` and any
+    number of ``tag`` / ``cluster_tag`` values (a grievance must carry all of them).
+    """
+    criteria = []
+    status = parse_status(args.get("status"))
+    if status:
+        criteria.append(model.status == status)
+    assigned = parse_department(args.get("assigned_to"))
+    if assigned:
+        criteria.append(model.assigned_to == assigned)
+    for kind, param in (("issue", "tag"), ("cluster", "cluster_tag")):
+        tags = [tag for tag in args.getlist(param) if tag]
+        if tags:
+            criteria.append(tags_filter(kind, tags, model))
+    return criteria
+
+
+def list_grievance_rows(
+    session,
+    include_archived: bool,
+    criteria: Callable[[Any], List[Any]],
+) -> List[Union[Grievance, ArchivedGrievance]]:
+    """
+    Grievances matching ``criteria(model)``, newest first. The archive table
+    is only read when ``include_archived`` is set.
+    """
+    models = (Grievance, ArchivedGrievance) if include_archived else (Grievance,)
+    items: List[Any] = []
+    for model in models:
+        items.extend(session.query(model).filter(*criteria(model)).order_by(model.created_at.desc()).all())
+    if include_archived:
+        items.sort(key=lambda item: item.created_at, reverse=True)
+    return items
+
+
+def parse_day(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value) if value else None
+
+
+def summarize_stats(rows: Iterable[Any]) -> Dict[str, Any]:
+    """Dashboard totals from daily rollup rows: overall, by status, by department and per day."""
+    by_status = {status.value: 0 for status in GrievanceStatus}
+    by_department = {department.value: 0 for department in Department}
+    days: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        key = row.day.isoformat()
+        day = days.get(key)
+        if day is None:
+            day = days[key] = {"day": key, "total": 0, "by_status": {}, "by_department": {}}
+        status, department = row.status.value, row.assigned_to.value
+        day["total"] += row.count
+        day["by_status"][status] = day["by_status"].get(status, 0) + row.count
+        day["by_department"][department] = day["by_department"].get(department, 0) + row.count
+        by_status[status] += row.count
+        by_department[department] += row.count
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_department": by_department,
+        "by_day": list(days.values()),
+    }
+
+
+UPDATABLE_FIELDS = {
+    "status",
+    "assigned_to",
+    "tags",
+    "issue_tags",
+    "category_tags",
+    "cluster",
+    "cluster_tags",
+    "clusters",
+    "drop_reason",
+}
+
+
+def parse_grievance_changes(payload: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[Response]]:
+    """Column values for an admin update body; returns ``(changes, None)`` or ``(None, error)``."""
+    if not any(key in payload for key in UPDATABLE_FIELDS):
+        return None, error_response("No updatable fields provided", 400)
+    changes: Dict[str, Any] = {}
+
+    if "status" in payload:
+        status = parse_status(payload["status"])
+        if status is None:
+            return None, error_response("Invalid status value", 400)
+        changes["status"] = status
+
+    if "assigned_to" in payload:
+        dept = parse_department(payload["assigned_to"])
+        if dept is None:
+            return None, error_response("Invalid assigned_to value", 400)
+        changes["assigned_to"] = dept
+
+    tags_value = first_present(payload, ("category_tags", "issue_tags", "tags"))
+    if tags_value is not None:
+        changes["tags"] = ensure_list(tags_value)
+        changes["tags_source"] = TAG_SOURCE_ADMIN
+
+    cluster_key_present = "cluster" in payload
+    cluster_label_value = payload.get("cluster") if cluster_key_present else None
+    cluster_tags_value = first_present(payload, ("cluster_tags", "clusters"))
+    cluster_tags_list = None
+    if cluster_tags_value is not None:
+        cluster_tags_list = ensure_list(cluster_tags_value)
+        changes["cluster_tags"] = cluster_tags_list
+
+    if cluster_key_present:
+        changes["cluster"] = cluster_label_value
+        if cluster_label_value and cluster_tags_value is None:
+            changes["cluster_tags"] = [cluster_label_value]
+        if cluster_label_value is None and cluster_tags_value is None:
+            changes["cluster_tags"] = []
+    elif cluster_tags_list:
+        changes["cluster"] = cluster_tags_list[0]
+
+    if "drop_reason" in payload:
+        changes["drop_reason"] = payload["drop_reason"]
+    return changes, None
+
+
+BULK_UPDATE_MAX_IDS = 10000
+
+
+def parse_bulk_filter(payload: Dict[str, Any]) -> Tuple[Optional[List[Any]], Optional[Response]]:
+    """
+    WHERE criteria for a bulk update: an ``ids`` list at the top level, or a
+    ``filter`` object with any of ``ids``, ``cluster``, ``status`` and
+    ``assigned_to``. An empty selection is rejected so a bulk update can never
+    touch every row by accident.
+    """
+    selection = payload.get("filter")
+    if selection is None and "ids" in payload:
+        selection = {"ids": payload["ids"]}
+    if not isinstance(selection, dict) or not selection:
+        return None, error_response("ids or filter is required", 400)
+    unknown = set(selection) - {"ids", "cluster", "status", "assigned_to"}
+    if unknown:
+        return None, error_response(f"Unknown filter fields: {', '.join(sorted(unknown))}", 400)
+
+    criteria = []
+    if "ids" in selection:
+        ids = selection["ids"]
+        if not isinstance(ids, list) or not ids or not all(isinstance(item, int) for item in ids):
+            return None, error_response("ids must be a non-empty list of integers", 400)
+        if len(ids) > BULK_UPDATE_MAX_IDS:
+            return None, error_response(f"At most {BULK_UPDATE_MAX_IDS} ids per request", 400)
+        criteria.append(Grievance.id.in_(ids))
+    if "cluster" in selection:
+        criteria.append(Grievance.cluster == selection["cluster"])
+    if "status" in selection:
+        status = parse_status(selection["status"])
+        if status is None:
+            return None, error_response("Invalid status value", 400)
+        criteria.append(Grievance.status == status)
+    if "assigned_to" in selection:
+        dept = parse_department(selection["assigned_to"])
+        if dept is None:
+            return None, error_response("Invalid assigned_to value", 400)
+        criteria.append(Grievance.assigned_to == dept)
+    return criteria, None
+
+
+def embedding_meta_changes(changes: Dict[str, Any]) -> Dict[str, Any]:
+    """The ``meta_info`` fields of stored embeddings affected by ``changes``."""
+    meta: Dict[str, Any] = {}
+    if "tags" in changes:
+        meta["tags"] = changes["tags"]
+        meta["issue_tags"] = changes["tags"]
+    if "cluster" in changes:
+        meta["cluster"] = changes["cluster"]
+    if "cluster_tags" in changes:
+        meta["cluster_tags"] = changes["cluster_tags"]
+    return meta
+
+
+PREVIEW_KB_TOP_K = 5
+
+
+def preview_grievance(submission: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": 0,  # Temporary ID for preview
+        "title": submission["title"],
+        "description": submission["description"],
+        "status": submission["status"].value,
+        "assigned_to": submission["assigned"].value,
+        "tags": submission["tags"],
+        "cluster": submission["cluster"],
+        "cluster_tags": submission["cluster_tags"],
     }
 
 
-def safe_fetch_chat(grievance_id: int) -> Dict[str, Any]:
+def build_preview_response(
+    payload: Dict[str, Any],
+    submission: Dict[str, Any],
+    kb_chunks: List[Dict[str, Any]],
+    ai_suggestions: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Response body of a preview submission; shared by the WSGI and asyncio paths."""
+    # Combine KB chunks with AI suggestions
+    kb_suggestions_with_ai = []
+    for chunk in kb_chunks:
+        kb_suggestions_with_ai.append({
+            "doc_name": chunk.get("doc_name", "Unknown Document"),
+            "excerpt": chunk.get("excerpt", ""),
+            "similarity_score": chunk.get("similarity_score", 0.0),
+            "chunk_id": chunk.get("chunk_id", ""),
+        })
+
+    current_app.logger.info(
+        "create_grievance: preview completed kb_chunks=%d ai_suggestions=%d",
+        len(kb_chunks),
+        len(ai_suggestions.get("suggestions", [])),
+    )
+    grievance = preview_grievance(submission)
+    grievance.pop("id")
+    return {
+        "preview": True,
+        "grievance": grievance,
+        "ai_generated_tags": submission["tags"],
+        "kb_suggestions": kb_suggestions_with_ai,
+        "ai_suggestions": ai_suggestions.get("suggestions", []),
+        "ai_summary": ai_suggestions.get("suggestions", [{}])[0].get("summary", ""),
+        "related_grievances": ai_suggestions.get("related_grievances", []),
+        "documents": payload.get("documents", [])
+    }
+
+
+def parse_grievance_id(payload: Dict[str, Any]) -> Tuple[Optional[int], Optional[Response]]:
+    if "grievance_id" not in payload:
+        return None, error_response("grievance_id is required", 400)
+    try:
+        return int(payload["grievance_id"]), None
+    except (TypeError, ValueError):
+        return None, error_response("grievance_id must be an integer", 400)
+
+
+def load_suggestion_context(grievance_id: int) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """Serialized grievance and its related SOLVED grievances, or None when it does not exist."""
+    with session_scope() as session:
+        grievance = (
+            session.query(Grievance).filter(Grievance.id == grievance_id).first()
+        )
+        if not grievance:
+            return None
+
+        related = find_related_solved_grievances(
+            session, grievance, settings.vector_index.related_top_k
+        )
+        if related is None:
+            related_query = (
+                session.query(Grievance)
+                .filter(Grievance.id != grievance.id)
+                .filter(Grievance.status == GrievanceStatus.SOLVED)
+            )
+            if grievance.cluster:
+                related_query = related_query.filter(Grievance.cluster == grievance.cluster)
+
+            related = (
+                related_query.order_by(Grievance.updated_at.desc())
+                .limit(settings.vector_index.related_top_k)
+                .all()
+            )
+
+        return serialize_grievance(grievance), [serialize_related_grievance(item) for item in related]
+
+
+def load_summary_rows() -> List[Dict[str, Any]]:
+    """Compact projection of every grievance for the admin summary."""
+    with session_scope(readonly=True) as session:
+        rows = session.query(
+            Grievance.id,
+            Grievance.title,
+            Grievance.description,
+            Grievance.status,
+            Grievance.assigned_to,
+            Grievance.tags,
+            Grievance.cluster,
+        ).yield_per(EXPORT_BATCH_SIZE)
+        return [compact_grievance_for_summary(row) for row in rows]
+
+
+def encode_search_cursor(rank: float, grievance_id: int) -> str:
+    raw = json.dumps([rank, grievance_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_search_cursor(cursor: str) -> Optional[tuple]:
+    try:
+        rank, grievance_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(rank), int(grievance_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError):
+        return None
+
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_CSV_COLUMNS = (
+    "id",
+    "student_id",
+    "title",
+    "description",
+    "status",
+    "assigned_to",
+    "tags",
+    "cluster_tags",
+    "s3_doc_urls",
+    "cluster",
+    "drop_reason",
+    "duplicate_of",
+    "created_at",
+    "updated_at",
+)
+
+
+def encode_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    batch = []
+    for row in rows:
+        batch.append(json.dumps(row, default=str))
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield ("\n".join(batch) + "\n").encode("utf-8")
+            batch = []
+    if batch:
+        yield ("\n".join(batch) + "\n").encode("utf-8")
+
+
+def encode_csv(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_CSV_COLUMNS)
+    pending = 0
+    for row in rows:
+        writer.writerow(
+            [
+                json.dumps(row[column]) if isinstance(row[column], list) else row[column]
+                for column in EXPORT_CSV_COLUMNS
+            ]
+        )
+        pending += 1
+        if pending >= EXPORT_BATCH_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+EXPORT_FORMATS = {"ndjson": encode_ndjson, "csv": encode_csv}
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def safe_fetch_chat(grievance_id: int, archived: bool = False) -> Dict[str, Any]:
     try:
-        return fetch_chat(grievance_id)
+        return fetch_chat(grievance_id, archived=archived)
     except RuntimeError as exc:
         return {"grievance_id": grievance_id, "conversations": [], "error": str(exc)}
 
@@ -708,4 +1698,5 @@ app = create_app()
 CORS(app) 
 if __name__ == "__main__":
     init_db()
+    start_background_services(app)
     app.run(host="0.0.0.0", port=8000)
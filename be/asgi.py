@@ -0,0 +1,362 @@
+"""
+ASGI entry point.
+
+The AI endpoints spend nearly all of their time waiting on OpenAI and MongoDB,
+so under WSGI each in-flight request pins a worker thread. Here they run as
+coroutines on the event loop instead (AsyncOpenAI, pymongo's async client),
+so one worker process can hold hundreds of them:
+
+* ``POST /grievances`` with ``"preview": true``
+* ``POST /ai/suggestions/preview``
+* ``GET /admin/grievances/ai-summarize``
+
+Every other request, including non-preview submissions, is handed to the
+Flask app unchanged through a small WSGI bridge running in a thread pool.
+Multipart uploads and NDJSON bulk imports are not buffered: the bridge thread
+reads the body from the ASGI receive channel as the app consumes it.
+The async handlers run inside a Flask request context and go through the
+app's before/after request hooks, so responses (JSON body, CORS, metrics,
+trace ids) are identical to the WSGI path. SQLAlchemy and in-memory index
+lookups stay synchronous and are moved off the loop with ``asyncio.to_thread``,
+as is the local label model; before_request hooks run on the bridge pool.
+
+Serve with any ASGI server, e.g. ``uvicorn asgi:application --workers 2``.
+"""
+import asyncio
+import contextvars
+import io
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from flask import jsonify, request
+from werkzeug.exceptions import ClientDisconnected
+
+from app import (
+    PREVIEW_KB_TOP_K,
+    app as flask_app,
+    build_preview_response,
+    error_response,
+    load_suggestion_context,
+    load_summary_rows,
+    merge_classification,
+    parse_bool,
+    parse_grievance_id,
+    parse_submission,
+    preview_grievance,
+    start_background_services,
+)
+from config import settings
+from utils import (
+    classify_grievance_async,
+    generate_ai_suggestions_async,
+    get_kb_suggestions_for_grievance_async,
+    summarize_for_admin_async,
+)
+
+logger = logging.getLogger("grievance.asgi")
+
+_WSGI_EXECUTOR = ThreadPoolExecutor(
+    max_workers=max(1, settings.asgi.wsgi_threads), thread_name_prefix="asgi-wsgi"
+)
+_END_OF_BODY = object()
+
+
+async def preview_grievance_submission():
+    payload = request.get_json() or {}
+    submission, error = parse_submission(payload)
+    if error is not None:
+        return error
+
+    # The KB lookup only needs the description, so it runs alongside classification.
+    classification, kb_chunks = await asyncio.gather(
+        classify_grievance_async(submission["title"], submission["description"]),
+        get_kb_suggestions_for_grievance_async(submission["description"], top_k=PREVIEW_KB_TOP_K),
+    )
+    submission["tags"], submission["assigned"] = merge_classification(
+        payload, submission["tags"], submission["assigned"], classification
+    )
+    if not submission["cluster_tags"] and submission["cluster"]:
+        submission["cluster_tags"] = [submission["cluster"]]
+
+    ai_suggestions = await generate_ai_suggestions_async(preview_grievance(submission), [], kb_chunks)
+    return jsonify(build_preview_response(payload, submission, kb_chunks, ai_suggestions))
+
+
+async def preview_ai_suggestions():
+    grievance_id, error = parse_grievance_id(request.get_json(force=True))
+    if error is not None:
+        return error
+    context = await asyncio.to_thread(load_suggestion_context, grievance_id)
+    if context is None:
+        return error_response("Grievance not found", 404)
+
+    serialized_grievance, related_payload = context
+    suggestions = await generate_ai_suggestions_async(serialized_grievance, related_payload)
+    suggestions["grievance_id"] = grievance_id
+    return jsonify(suggestions)
+
+
+async def admin_ai_summarize():
+    rows = await asyncio.to_thread(load_summary_rows)
+    summary = await summarize_for_admin_async(rows)
+    return jsonify({"summary": summary})
+
+
+def _is_preview_submission(body: bytes, environ: Dict[str, Any]) -> bool:
+    probe = flask_app.request_class(dict(environ, **{"wsgi.input": io.BytesIO(body)}))
+    payload = probe.get_json(silent=True)
+    return isinstance(payload, dict) and parse_bool(payload.get("preview"), False)
+
+
+class AsyncRoute(NamedTuple):
+    handler: Callable[[], Awaitable[Any]]
+    accepts: Optional[Callable[[bytes, Dict[str, Any]], bool]] = None
+
+
+ASYNC_ROUTES: Dict[Tuple[str, str], AsyncRoute] = {
+    ("POST", "/grievances"): AsyncRoute(preview_grievance_submission, _is_preview_submission),
+    ("POST", "/ai/suggestions/preview"): AsyncRoute(preview_ai_suggestions),
+    ("GET", "/admin/grievances/ai-summarize"): AsyncRoute(admin_ai_summarize),
+}
+
+
+def build_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    """PEP 3333 environ for an ASGI HTTP scope whose body has been read."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode("utf-8").decode("latin-1"),
+        "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").lower()
+        value = raw_value.decode("latin-1")
+        if name == "content-length":
+            continue
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+            continue
+        key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _encode_headers(headers: List[Tuple[str, str]]) -> List[Tuple[bytes, bytes]]:
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+
+async def _read_body(receive) -> Optional[bytes]:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+class _ReceiveStream(io.RawIOBase):
+    """Blocking reader over the ASGI ``receive`` channel, for use from a bridge thread."""
+
+    def __init__(self, receive, loop: asyncio.AbstractEventLoop):
+        self._receive = receive
+        self._loop = loop
+        self._pending = b""
+        self._done = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._done:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message["type"] == "http.disconnect":
+                raise ClientDisconnected()
+            self._pending = message.get("body", b"")
+            self._done = not message.get("more_body", False)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+STREAMED_CONTENT_TYPES = (b"multipart/form-data", b"application/x-ndjson")
+
+
+def _streams_body(scope: Dict[str, Any]) -> bool:
+    for name, value in scope.get("headers", []):
+        if name.lower() == b"content-type":
+            return value.lower().startswith(STREAMED_CONTENT_TYPES)
+    return False
+
+
+def streaming_environ(scope: Dict[str, Any], receive) -> Dict[str, Any]:
+    """Environ whose ``wsgi.input`` reads the body lazily from ``receive``."""
+    environ = build_environ(scope, b"")
+    environ["wsgi.input"] = io.BufferedReader(_ReceiveStream(receive, asyncio.get_running_loop()))
+    length = next(
+        (value.decode("latin-1") for name, value in scope.get("headers", []) if name.lower() == b"content-length"),
+        None,
+    )
+    if length is None:
+        del environ["CONTENT_LENGTH"]
+        environ["wsgi.input_terminated"] = True
+    else:
+        environ["CONTENT_LENGTH"] = length
+    return environ
+
+
+def _run_in_context(context: contextvars.Context, func: Callable[..., Any], *args) -> "asyncio.Future[Any]":
+    """
+    ``func(*args)`` inside ``context`` on the bridge pool, awaited from a task
+    running in the same ``context``. The work is submitted from a loop
+    callback, so the task's current step has left the context before a
+    bridge thread enters it.
+    """
+    loop = asyncio.get_running_loop()
+    outcome = loop.create_future()
+
+    def settle(work) -> None:
+        if outcome.cancelled():
+            return
+        exc = work.exception()
+        if exc is not None:
+            outcome.set_exception(exc)
+        else:
+            outcome.set_result(work.result())
+
+    def submit() -> None:
+        work = _WSGI_EXECUTOR.submit(context.run, func, *args)
+        work.add_done_callback(lambda done: loop.call_soon_threadsafe(settle, done))
+
+    loop.call_soon(submit, context=contextvars.Context())
+    return outcome
+
+
+async def dispatch_async(route: AsyncRoute, environ: Dict[str, Any], send) -> None:
+    """Run an async handler the way ``Flask.full_dispatch_request`` runs a view."""
+    # before_request hooks can block (background service start, the replica
+    # lag check), so they run on the bridge pool. They set context variables
+    # the handler and teardown rely on, so the handler task and the bridge
+    # thread share one Context; they never run at the same time.
+    context = contextvars.copy_context()
+    await asyncio.create_task(_dispatch_async(route, environ, send, context), context=context)
+
+
+async def _dispatch_async(route: AsyncRoute, environ: Dict[str, Any], send, context: contextvars.Context) -> None:
+    ctx = flask_app.request_context(environ)
+    error: Optional[BaseException] = None
+    ctx.push()
+    try:
+        try:
+            try:
+                rv = await _run_in_context(context, flask_app.preprocess_request)
+                if rv is None:
+                    rv = await route.handler()
+            except Exception as exc:
+                rv = flask_app.handle_user_exception(exc)
+            response = flask_app.finalize_request(rv)
+        except Exception as exc:
+            error = exc
+            response = flask_app.handle_exception(exc)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": _encode_headers(response.get_wsgi_headers(environ).to_wsgi_list()),
+            }
+        )
+        await send({"type": "http.response.body", "body": response.get_data()})
+    finally:
+        ctx.pop(error)
+
+
+async def dispatch_wsgi(environ: Dict[str, Any], send) -> None:
+    """Hand the request to the Flask WSGI app on the bridge pool, streaming its body back."""
+    loop = asyncio.get_running_loop()
+    started: Dict[str, Any] = {}
+
+    def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = headers
+        return lambda data: None
+
+    result = await loop.run_in_executor(_WSGI_EXECUTOR, flask_app, environ, start_response)
+    try:
+        chunks = iter(result)
+        chunk = await loop.run_in_executor(_WSGI_EXECUTOR, next, chunks, _END_OF_BODY)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": started["status"],
+                "headers": _encode_headers(started["headers"]),
+            }
+        )
+        while chunk is not _END_OF_BODY:
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            chunk = await loop.run_in_executor(_WSGI_EXECUTOR, next, chunks, _END_OF_BODY)
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        close = getattr(result, "close", None)
+        if close is not None:
+            await loop.run_in_executor(_WSGI_EXECUTOR, close)
+
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await asyncio.to_thread(start_background_services, flask_app)
+            except Exception as exc:
+                # before_request retries on the first request, as under WSGI.
+                logger.warning("Background services failed to start: %s", exc)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            _WSGI_EXECUTOR.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send) -> None:
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        raise RuntimeError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+    if _streams_body(scope):
+        await dispatch_wsgi(streaming_environ(scope, receive), send)
+        return
+
+    body = await _read_body(receive)
+    if body is None:
+        return
+    environ = build_environ(scope, body)
+    route = ASYNC_ROUTES.get((scope["method"], environ["PATH_INFO"]))
+    if route is not None and (route.accepts is None or route.accepts(body, environ)):
+        await dispatch_async(route, environ, send)
+    else:
+        await dispatch_wsgi(environ, send)
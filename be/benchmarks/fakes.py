@@ -0,0 +1,346 @@
+"""
+Local stand-ins for the backend's external services, used by the benchmark
+suite so runs are reproducible and never touch real OpenAI, S3 or MongoDB.
+"""
+import base64
+import hashlib
+import io
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+TAG_VOCABULARY = {
+    "mess": "mess, food, hygiene",
+    "hostel": "hostel, water, maintenance",
+    "library": "library, books, infrastructure",
+    "faculty": "faculty, teaching, attendance",
+    "exam": "academics, exams, results",
+}
+
+
+def hashed_embedding(text: str, dimension: int) -> List[float]:
+    """Bag-of-words hashing embedding: texts sharing words get similar vectors."""
+    vector = [0.0] * dimension
+    for word in re.findall(r"\w+", text.lower()):
+        digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dimension
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class _BackloggedHTTPServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 refuses connections under concurrent load.
+    request_queue_size = 1024
+
+
+class _ServerThread:
+    def __init__(self, handler_class):
+        self.server = _BackloggedHTTPServer(("127.0.0.1", 0), handler_class)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - silence per-request stderr logging
+        return
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send_json(self, payload: Dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeOpenAIServer(_ServerThread):
+    """
+    Minimal OpenAI-compatible HTTP server implementing the endpoints the
+    backend calls (embeddings, chat completions, responses) with configurable
+    latency and embedding dimension. Point the SDK at it via OPENAI_BASE_URL.
+    """
+
+    def __init__(self, latency_ms: float = 50.0, embedding_dimension: int = 1536):
+        owner = self
+        self.latency_ms = latency_ms
+        self.embedding_dimension = embedding_dimension
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        class Handler(_JSONHandler):
+            def do_POST(self):
+                payload = json.loads(self._read_body() or b"{}")
+                owner._count(self.path)
+                if owner.latency_ms:
+                    time.sleep(owner.latency_ms / 1000.0)
+                if self.path.endswith("/embeddings"):
+                    self._send_json(owner._embeddings(payload))
+                elif self.path.endswith("/chat/completions"):
+                    self._send_json(owner._chat_completion(payload))
+                elif self.path.endswith("/responses"):
+                    self._send_json(owner._response(payload))
+                else:
+                    self._send_json({"error": {"message": f"unknown path {self.path}"}}, 404)
+
+        super().__init__(Handler)
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def _count(self, path: str) -> None:
+        with self._lock:
+            self.calls[path] = self.calls.get(path, 0) + 1
+
+    def _embeddings(self, payload: Dict) -> Dict:
+        inputs = payload.get("input")
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        return {
+            "object": "list",
+            "model": payload.get("model"),
+            "data": [
+                {
+                    "object": "embedding",
+                    "index": index,
+                    "embedding": hashed_embedding(text, self.embedding_dimension),
+                }
+                for index, text in enumerate(inputs or [])
+            ],
+            "usage": {"prompt_tokens": 1, "total_tokens": 1},
+        }
+
+    @staticmethod
+    def _reply_text(prompt: str) -> str:
+        lowered = prompt.lower()
+        if "comma-separated" in lowered:
+            for keyword, tags in TAG_VOCABULARY.items():
+                if keyword in lowered:
+                    return tags
+            return "general, campus"
+        return "Synthetic benchmark reply: check the notice board and contact the department office."
+
+    def _chat_completion(self, payload: Dict) -> Dict:
+        prompt = " ".join(message.get("content", "") for message in payload.get("messages", []))
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": self._reply_text(prompt)},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+
+    def _response(self, payload: Dict) -> Dict:
+        prompt = json.dumps(payload.get("input"))
+        return {
+            "id": "resp-bench",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": payload.get("model"),
+            "status": "completed",
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "output": [
+                {
+                    "type": "message",
+                    "id": "msg-bench",
+                    "status": "completed",
+                    "role": "assistant",
+                    "content": [
+                        {"type": "output_text", "text": self._reply_text(prompt), "annotations": []}
+                    ],
+                }
+            ],
+        }
+
+
+class FakeS3Server(_ServerThread):
+    """
+    In-memory S3 endpoint accepting path-style PUT/GET/HEAD of objects,
+    multipart uploads and presigned form POSTs. Signatures are not checked;
+    ``x-amz-checksum-sha256`` is. Point boto3 at it via AWS_ENDPOINT_URL_S3.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        owner = self
+        self.latency_ms = latency_ms
+        self.objects: Dict[str, bytes] = {}
+        self.multipart: Dict[str, Dict[int, bytes]] = {}
+        self._lock = threading.Lock()
+
+        class Handler(_JSONHandler):
+            def _delay(self):
+                if owner.latency_ms:
+                    time.sleep(owner.latency_ms / 1000.0)
+
+            def _target(self):
+                parts = urlsplit(self.path)
+                return parts.path, {name: values[0] for name, values in parse_qs(parts.query, keep_blank_values=True).items()}
+
+            def _send_xml(self, body: str, status: int = 200) -> None:
+                data = ('<?xml version="1.0" encoding="UTF-8"?>' + body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/xml")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _checksum_matches(self, body: bytes, expected: Optional[str]) -> bool:
+                if not expected:
+                    return True
+                if base64.b64encode(hashlib.sha256(body).digest()).decode() == expected:
+                    return True
+                self._send_xml("<Error><Code>BadDigest</Code></Error>", 400)
+                return False
+
+            def do_PUT(self):
+                body = self._read_body()
+                self._delay()
+                path, query = self._target()
+                if not self._checksum_matches(body, self.headers.get("x-amz-checksum-sha256")):
+                    return
+                if "uploadId" in query:
+                    with owner._lock:
+                        owner.multipart[query["uploadId"]][int(query["partNumber"])] = body
+                else:
+                    owner.objects[path] = body
+                self.send_response(200)
+                self.send_header("ETag", '"%s"' % hashlib.md5(body).hexdigest())
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                body = self._read_body()
+                path, query = self._target()
+                bucket, _, key = path.lstrip("/").partition("/")
+                if not key and (self.headers.get("Content-Type") or "").startswith("multipart/form-data"):
+                    self._form_upload(bucket, body)
+                    return
+                if "uploads" in query:
+                    upload_id = uuid.uuid4().hex
+                    with owner._lock:
+                        owner.multipart[upload_id] = {}
+                    self._send_xml(
+                        "<InitiateMultipartUploadResult><Bucket>%s</Bucket><Key>%s</Key>"
+                        "<UploadId>%s</UploadId></InitiateMultipartUploadResult>" % (bucket, key, upload_id)
+                    )
+                    return
+                with owner._lock:
+                    parts = owner.multipart.pop(query.get("uploadId", ""), None)
+                if parts is None:
+                    self._send_xml("<Error><Code>NoSuchUpload</Code></Error>", 404)
+                    return
+                body = b"".join(parts[number] for number in sorted(parts))
+                owner.objects[path] = body
+                self._send_xml(
+                    "<CompleteMultipartUploadResult><Bucket>%s</Bucket><Key>%s</Key>"
+                    '<ETag>"%s-%d"</ETag></CompleteMultipartUploadResult>'
+                    % (bucket, key, hashlib.md5(body).hexdigest(), len(parts))
+                )
+
+            def _form_upload(self, bucket: str, body: bytes) -> None:
+                from werkzeug.formparser import parse_form_data
+
+                _, form, files = parse_form_data(
+                    {
+                        "REQUEST_METHOD": "POST",
+                        "CONTENT_TYPE": self.headers["Content-Type"],
+                        "CONTENT_LENGTH": str(len(body)),
+                        "wsgi.input": io.BytesIO(body),
+                    }
+                )
+                upload = files.get("file")
+                if upload is None or "key" not in form:
+                    self._send_xml("<Error><Code>InvalidArgument</Code></Error>", 400)
+                    return
+                data = upload.read()
+                self._delay()
+                if not self._checksum_matches(data, form.get("x-amz-checksum-sha256")):
+                    return
+                owner.objects[f"/{bucket}/{form['key']}"] = data
+                self.send_response(204)
+                self.send_header("ETag", '"%s"' % hashlib.md5(data).hexdigest())
+                self.end_headers()
+
+            def do_DELETE(self):
+                path, query = self._target()
+                with owner._lock:
+                    if "uploadId" in query:
+                        owner.multipart.pop(query["uploadId"], None)
+                    else:
+                        owner.objects.pop(path, None)
+                self.send_response(204)
+                self.end_headers()
+
+            def do_GET(self):
+                self._delay()
+                body = owner.objects.get(self.path.split("?", 1)[0])
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_HEAD(self):
+                body = owner.objects.get(self.path.split("?", 1)[0])
+                self.send_response(200 if body is not None else 404)
+                self.send_header("Content-Length", str(len(body or b"")))
+                self.end_headers()
+
+        super().__init__(Handler)
+
+
+def install_mongo_stand_in(utils_module, client: Optional[object] = None):
+    """
+    Route every MongoRepository in ``utils_module`` to one shared in-process
+    mongomock client. Returns the client so callers can inspect collections.
+    """
+    try:
+        import mongomock  # type: ignore
+    except ImportError as exc:  # pragma: no cover - benchmark-only dependency
+        raise RuntimeError(
+            "mongomock is required for the in-process Mongo stand-in "
+            "(pip install -r benchmarks/requirements.txt)."
+        ) from exc
+    shared = client or mongomock.MongoClient()
+    utils_module.MongoClient = lambda *args, **kwargs: shared
+    utils_module._MONGO_CLIENT = None
+    return shared
@@ -0,0 +1,430 @@
+"""
+End-to-end load test for the Flask backend against local fakes.
+
+The app runs in-process on a threaded WSGI server, backed by SQLite (or the
+database in ``--database-url``), an in-process mongomock client, a fake
+OpenAI-compatible server with configurable latency and embedding dimension,
+and an in-memory S3 endpoint. Each scenario is driven at ``--concurrency``
+and reported as throughput plus p50/p95/p99 latency; results are written as
+JSON so runs can be compared with ``--compare``.
+
+    cd be
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.load_test --concurrency 8 --requests 200 --seed-grievances 1000
+"""
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fakes import FakeOpenAIServer, FakeS3Server, hashed_embedding, install_mongo_stand_in
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+SCENARIOS = (
+    "create",
+    "create_with_document",
+    "create_with_multipart",
+    "create_with_presigned",
+    "preview",
+    "chat_append",
+    "chat_fetch",
+    "admin_list",
+    "clustering",
+)
+
+TOPICS = (
+    ("Mess food quality", "The mess food served at dinner was stale and the hygiene in the kitchen is poor."),
+    ("Hostel water supply", "There has been no water supply in hostel block C since the morning."),
+    ("Library closing early", "The library closes at 6pm during exams and the reading hall has no seats."),
+    ("Faculty absent", "The faculty for the data structures course has missed four lectures this month."),
+    ("Exam results delayed", "Semester exam results have been delayed by three weeks with no notice."),
+)
+
+
+def _synthetic_grievance(rng: random.Random, sequence: int) -> Dict[str, str]:
+    title, description = rng.choice(TOPICS)
+    # A unique suffix keeps submissions below the near-duplicate threshold.
+    return {
+        "title": f"{title} #{sequence}",
+        "description": f"{description} Reference {sequence}-{rng.getrandbits(32):08x}.",
+    }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(name: str, latencies: List[float], errors: int, wall_seconds: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "scenario": name,
+        "requests": count,
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(count / wall_seconds, 2) if wall_seconds else 0.0,
+        "mean_ms": round(sum(ordered) / count * 1000, 2) if count else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if count else 0.0,
+    }
+
+
+class Environment:
+    """Starts the fakes, points the backend at them and serves the app on a local port."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.openai = FakeOpenAIServer(args.openai_latency_ms, args.embedding_dim).start()
+        self.s3 = FakeS3Server(args.s3_latency_ms).start()
+        self._tempdir = tempfile.TemporaryDirectory(prefix="grievance-bench-")
+        self._configure_environment()
+
+        # Settings are read at import time, so backend modules load only now.
+        import db
+        import utils
+
+        self.mongo = install_mongo_stand_in(utils)
+        db.init_db(drop_existing=bool(args.database_url))
+        self.db = db
+        self.utils = utils
+
+        from werkzeug.serving import make_server
+
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+        import app as app_module
+
+        self.app = app_module.app
+        self.server = make_server("127.0.0.1", 0, self.app, threaded=True)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def _configure_environment(self) -> None:
+        database_url = self.args.database_url or (
+            f"sqlite:///{Path(self._tempdir.name) / 'bench.db'}"
+        )
+        os.environ.update(
+            {
+                "DATABASE_URL": database_url,
+                "SQLALCHEMY_POOL_SIZE": str(max(5, self.args.concurrency)),
+                "OPENAI_API_KEY": "bench-key",
+                "OPENAI_BASE_URL": self.openai.base_url,
+                "AWS_ACCESS_KEY_ID": "bench",
+                "AWS_SECRET_ACCESS_KEY": "bench",
+                "AWS_ENDPOINT_URL_S3": self.s3.url,
+                "AWS_S3_BUCKET": "bench-bucket",
+                "FLASK_DEBUG": "false",
+                "TRACING_SAMPLE_RATE": "0",
+                # Background timers would compete with the measured requests.
+                "CLASSIFIER_ENABLED": os.environ.get("CLASSIFIER_ENABLED", "false"),
+                # Measure the service, not the OpenAI rate limit; set to true to exercise shedding.
+                "ADMISSION_ENABLED": os.environ.get("ADMISSION_ENABLED", "false"),
+                # A route over its SQL query budget fails its requests instead of passing slowly.
+                "SQL_QUERY_BUDGET_ENFORCE": os.environ.get("SQL_QUERY_BUDGET_ENFORCE", "true"),
+            }
+        )
+
+    def seed(self, count: int) -> List[int]:
+        """Insert ``count`` grievances with embeddings directly, bypassing the API."""
+        if count <= 0:
+            return []
+        rng = random.Random(self.args.seed)
+        db = self.db
+        statuses = list(db.GrievanceStatus)
+        departments = list(db.Department)
+        with db.session_scope() as session:
+            student = db.get_or_create_default_student(session)
+            rows = []
+            for sequence in range(count):
+                sample = _synthetic_grievance(rng, sequence)
+                rows.append(
+                    db.Grievance(
+                        student_id=student.id,
+                        title=sample["title"],
+                        description=sample["description"],
+                        status=rng.choice(statuses),
+                        assigned_to=rng.choice(departments),
+                        tags=sample["title"].lower().split()[:2],
+                        cluster_tags=[],
+                        s3_doc_urls=[],
+                    )
+                )
+            session.add_all(rows)
+            session.flush()
+            seeded = [(row.id, row.description) for row in rows]
+
+        repo = self.utils.MongoRepository()
+        now = datetime.utcnow()
+        repo.embeddings.insert_many(
+            [
+                {
+                    "grievance_id": grievance_id,
+                    "embedding": hashed_embedding(description, self.args.embedding_dim),
+                    "meta_info": {"seeded": True},
+                    "updated_at": now,
+                }
+                for grievance_id, description in seeded
+            ]
+        )
+        return [grievance_id for grievance_id, _ in seeded]
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.openai.stop()
+        self.s3.stop()
+        self._tempdir.cleanup()
+
+
+def _request_factories(
+    env: Environment, grievance_ids: List[int], seed: int, document_kb: int = 64
+) -> Dict[str, Callable]:
+    counter = iter(range(10_000_000, sys.maxsize))
+    lock = threading.Lock()
+    rng = random.Random(seed)
+    raw_document = os.urandom(document_kb * 1024)
+    document = base64.b64encode(raw_document).decode()
+    document_sha256 = hashlib.sha256(raw_document).hexdigest()
+
+    def next_sequence() -> int:
+        with lock:
+            return next(counter)
+
+    def pick_id() -> int:
+        with lock:
+            return rng.choice(grievance_ids)
+
+    def create(session):
+        return session.post(f"{env.base_url}/grievances", json=_synthetic_grievance(rng, next_sequence()))
+
+    def create_with_document(session):
+        payload = _synthetic_grievance(rng, next_sequence())
+        payload["documents"] = [
+            {"filename": "evidence.bin", "content_base64": document, "content_type": "application/octet-stream"}
+        ]
+        return session.post(f"{env.base_url}/grievances", json=payload)
+
+    def create_with_multipart(session):
+        # Fields first, then two attachments streamed to S3 by the server.
+        return session.post(
+            f"{env.base_url}/grievances",
+            files=[
+                ("payload", (None, json.dumps(_synthetic_grievance(rng, next_sequence())), "application/json")),
+                ("documents", ("evidence.bin", raw_document, "application/octet-stream")),
+                ("documents", ("scan.bin", raw_document, "application/octet-stream")),
+            ],
+        )
+
+    def create_with_presigned(session):
+        # Every request attaches the same file, so only the first one uploads it.
+        presigned = session.post(
+            f"{env.base_url}/uploads/presign",
+            json={"files": [{"sha256": document_sha256, "size": len(raw_document), "filename": "menu.bin"}]},
+        )
+        if presigned.status_code != 200:
+            return presigned
+        target = presigned.json()["uploads"][0]
+        if target["upload"]:
+            uploaded = session.put(target["upload"]["url"], data=raw_document, headers=target["upload"]["headers"])
+            if uploaded.status_code != 200:
+                return uploaded
+        created = session.post(f"{env.base_url}/grievances", json=_synthetic_grievance(rng, next_sequence()))
+        if created.status_code != 200:
+            return created
+        grievance_id = created.json()["grievance"]["id"]
+        return session.post(f"{env.base_url}/grievances/{grievance_id}/documents", json={"keys": [target["key"]]})
+
+    def preview(session):
+        payload = _synthetic_grievance(rng, next_sequence())
+        payload["preview"] = True
+        return session.post(f"{env.base_url}/grievances", json=payload)
+
+    def chat_append(session):
+        return session.post(
+            f"{env.base_url}/grievances/{pick_id()}/chat",
+            json={"message": f"Any update? ({next_sequence()})"},
+        )
+
+    def chat_fetch(session):
+        return session.get(f"{env.base_url}/grievances/{pick_id()}")
+
+    def admin_list(session):
+        return session.get(f"{env.base_url}/admin/grievances", params={"status": "NEW"})
+
+    def clustering(session):
+        return session.post(f"{env.base_url}/admin/clustering/trigger")
+
+    return {
+        "create": create,
+        "create_with_document": create_with_document,
+        "create_with_multipart": create_with_multipart,
+        "create_with_presigned": create_with_presigned,
+        "preview": preview,
+        "chat_append": chat_append,
+        "chat_fetch": chat_fetch,
+        "admin_list": admin_list,
+        "clustering": clustering,
+    }
+
+
+def run_scenario(name: str, factory: Callable, requests_total: int, concurrency: int) -> Dict[str, Any]:
+    import requests
+
+    local = threading.local()
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one_call(_):
+        nonlocal errors
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = factory(session)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_call, range(requests_total)))
+    return summarize(name, latencies, errors, time.perf_counter() - started)
+
+
+def print_table(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+    header = f"{'scenario':<22}{'reqs':>6}{'err':>5}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'Δp95':>10}{'Δrps':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        line = (
+            f"{row['scenario']:<22}{row['requests']:>6}{row['errors']:>5}{row['throughput_rps']:>9}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+        )
+        previous = (baseline or {}).get(row["scenario"])
+        if previous:
+            line += _delta(previous["p95_ms"], row["p95_ms"]) + _delta(
+                previous["throughput_rps"], row["throughput_rps"], width=9
+            )
+        print(line)
+
+
+def _delta(before: float, after: float, width: int = 10) -> str:
+    if not before:
+        return f"{'n/a':>{width}}"
+    return f"{(after - before) / before * 100:>+{width - 1}.1f}%"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+    parser.add_argument(
+        "--clustering-requests", type=int, default=3, help="Requests for the clustering scenario."
+    )
+    parser.add_argument("--seed-grievances", type=int, default=500)
+    parser.add_argument("--openai-latency-ms", type=float, default=50.0)
+    parser.add_argument("--s3-latency-ms", type=float, default=5.0)
+    parser.add_argument("--embedding-dim", type=int, default=1536)
+    parser.add_argument(
+        "--database-url",
+        default=None,
+        help="Benchmark against this database (e.g. a local Postgres) instead of a temporary SQLite file. "
+        "Its tables are dropped and recreated.",
+    )
+    parser.add_argument(
+        "--document-kb", type=int, default=64, help="Attachment size for the document scenarios."
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/<timestamp>.json).")
+    parser.add_argument("--compare", default=None, help="Earlier result JSON to compare against.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = sorted(set(scenarios) - set(SCENARIOS))
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    env = Environment(args)
+    try:
+        seed_start = time.perf_counter()
+        grievance_ids = env.seed(args.seed_grievances) or [1]
+        print(f"Seeded {args.seed_grievances} grievances in {time.perf_counter() - seed_start:.2f}s")
+        factories = _request_factories(env, grievance_ids, args.seed, args.document_kb)
+        results = []
+        for name in scenarios:
+            total = args.clustering_requests if name == "clustering" else args.requests
+            concurrency = 1 if name == "clustering" else args.concurrency
+            results.append(run_scenario(name, factories[name], total, concurrency))
+        openai_calls = dict(env.openai.calls)
+        s3_objects = len(env.s3.objects)
+    finally:
+        env.close()
+
+    report = {
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "config": {
+            key: getattr(args, key)
+            for key in (
+                "concurrency",
+                "requests",
+                "clustering_requests",
+                "seed_grievances",
+                "openai_latency_ms",
+                "s3_latency_ms",
+                "embedding_dim",
+                "document_kb",
+                "seed",
+            )
+        },
+        "database": "custom" if args.database_url else "sqlite",
+        "openai_calls": openai_calls,
+        "s3_objects": s3_objects,
+        "results": results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    baseline = None
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        baseline = {row["scenario"]: row for row in previous.get("results", [])}
+    print_table(results, baseline)
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+SQL query budget check.
+
+Serves the app against the load-test fakes, seeds ``--seed-grievances``
+grievances and calls every route listed in ``app.ROUTE_QUERY_BUDGETS`` a few
+times. The number of SQL statements each request issued before returning
+its response is read from the ``Server-Timing: db`` header. The check fails
+when a route exceeds its budget, or when a budgeted route has no request
+here, so the table and this check stay in sync.
+
+Seeding several grievances per student makes N+1 patterns (a query per row,
+or relationship loads nobody reads) show up as counts above the budget.
+
+    cd be
+    python -m benchmarks.query_budget --seed-grievances 200
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.load_test import Environment, parse_args as parse_load_test_args
+
+_SERVER_TIMING_DB = re.compile(r'db;dur=([0-9.]+);desc="(\d+) queries"')
+
+
+def _route_calls(base_url: str, grievance_id: int) -> Dict[str, Callable[[Any], Any]]:
+    """One request per budgeted endpoint, keyed by endpoint name."""
+    statuses = itertools.cycle(("IN_PROGRESS", "SOLVED"))
+    return {
+        "list_grievances": lambda session: session.get(f"{base_url}/grievances"),
+        "grievance_detail": lambda session: session.get(f"{base_url}/grievances/{grievance_id}"),
+        "admin_list_grievances": lambda session: session.get(
+            f"{base_url}/admin/grievances", params={"status": "NEW"}
+        ),
+        "admin_tag_facets": lambda session: session.get(f"{base_url}/admin/tags"),
+        "admin_stats": lambda session: session.get(f"{base_url}/admin/stats"),
+        "admin_search_grievances": lambda session: session.get(
+            f"{base_url}/admin/grievances/search", params={"q": "water supply"}
+        ),
+        "admin_similar_grievances": lambda session: session.get(
+            f"{base_url}/admin/grievances/similar", params={"id": grievance_id}
+        ),
+        # Alternating statuses so every request writes and moves a stats count.
+        "admin_update_grievance": lambda session: session.patch(
+            f"{base_url}/admin/grievances/{grievance_id}", json={"status": next(statuses)}
+        ),
+        "add_student_chat": lambda session: session.post(
+            f"{base_url}/grievances/{grievance_id}/chat", json={"message": "Any update?"}
+        ),
+        "create_grievance": lambda session: session.post(
+            f"{base_url}/grievances",
+            json={"title": "Budget check", "description": "The hostel fan in room 12 is broken."},
+        ),
+    }
+
+
+def measure(call: Callable[[Any], Any], session, repeats: int) -> Dict[str, Any]:
+    statements: List[int] = []
+    sql_ms: List[float] = []
+    statuses: List[int] = []
+    for _ in range(repeats):
+        response = call(session)
+        statuses.append(response.status_code)
+        match = _SERVER_TIMING_DB.search(response.headers.get("Server-Timing", ""))
+        if match:
+            sql_ms.append(float(match.group(1)))
+            statements.append(int(match.group(2)))
+    return {
+        "statements": max(statements) if statements else None,
+        "sql_ms": round(max(sql_ms), 2) if sql_ms else None,
+        "statuses": sorted(set(statuses)),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed-grievances", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3, help="Requests per route; the highest count is checked.")
+    parser.add_argument(
+        "--database-url",
+        default=None,
+        help="Check against this database instead of a temporary SQLite file. Its tables are dropped and recreated.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import requests
+
+    args = parse_args(argv)
+    os.environ["SQL_SERVER_TIMING"] = "true"
+    # Background work would query the database between requests; keep it quiet.
+    os.environ.setdefault("WARMUP_ENABLED", "false")
+    os.environ.setdefault("ARCHIVE_ENABLED", "false")
+    env_args = parse_load_test_args(["--openai-latency-ms", "0", "--s3-latency-ms", "0", "--embedding-dim", "64"])
+    env_args.database_url = args.database_url
+    env = Environment(env_args)
+    try:
+        grievance_ids = env.seed(args.seed_grievances) or [1]
+        from app import ROUTE_QUERY_BUDGETS
+
+        calls = _route_calls(env.base_url, grievance_ids[0])
+        session = requests.Session()
+        session.get(f"{env.base_url}/health")  # starts background services outside the measured requests
+        results = {endpoint: measure(call, session, max(1, args.repeats)) for endpoint, call in calls.items()}
+    finally:
+        env.close()
+
+    failures = []
+    for endpoint, budget in sorted(ROUTE_QUERY_BUDGETS.items()):
+        result = results.get(endpoint)
+        if result is None:
+            failures.append(f"{endpoint}: budgeted but not exercised by this check")
+            continue
+        result["budget"] = budget
+        if result["statements"] is None:
+            failures.append(f"{endpoint}: no Server-Timing header (statuses {result['statuses']})")
+        elif result["statements"] > budget:
+            failures.append(f"{endpoint}: {result['statements']} SQL statements, budget {budget}")
+        if any(status >= 500 for status in result["statuses"]):
+            failures.append(f"{endpoint}: server error (statuses {result['statuses']})")
+
+    print(json.dumps({"seed_grievances": args.seed_grievances, "routes": results}, indent=2))
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
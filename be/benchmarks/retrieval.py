@@ -0,0 +1,468 @@
+"""
+Micro-benchmarks for knowledge-base retrieval and grievance clustering.
+
+Generates synthetic, topic-clustered embeddings (default 1536 dimensions) at
+each requested corpus size and measures latency and peak traced memory for:
+
+* ``kb``: ``MongoRepository.search_similar_chunks`` and
+  ``get_kb_suggestions_for_grievance`` (over an in-process mongomock
+  collection) next to alternative search backends. Exact numpy search is the
+  brute-force reference; approximate backends also report recall@k against it.
+* ``clustering``: the DBSCAN step used by ``GrievanceClusteringEngine`` on its
+  own and the full ``_perform_clustering`` run (Mongo read, DBSCAN, SQL
+  updates, analytics).
+
+Backends that would be impractically slow or large at a size are skipped
+(see ``--max-scan-rows`` and ``--max-cluster-rows``) rather than run.
+
+    cd be
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.retrieval --sizes 1k,10k,100k --queries 50 --k 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.fakes import install_mongo_stand_in
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+GENERATION_CHUNK_ROWS = 50_000
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+def synthetic_embeddings(rows: int, dim: int, topics: int = 64, seed: int = 7) -> np.ndarray:
+    """
+    Unit-norm float32 vectors drawn around ``topics`` random centres, which
+    is closer to real text embeddings than uniform noise (neighbours exist).
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((topics, dim)).astype(np.float32)
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+    matrix = np.empty((rows, dim), dtype=np.float32)
+    for start in range(0, rows, GENERATION_CHUNK_ROWS):
+        stop = min(rows, start + GENERATION_CHUNK_ROWS)
+        assignment = rng.integers(0, topics, stop - start)
+        noise = rng.standard_normal((stop - start, dim)).astype(np.float32) * (0.6 / np.sqrt(dim))
+        block = centres[assignment] + noise
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        matrix[start:stop] = block
+    return matrix
+
+
+def synthetic_queries(corpus: np.ndarray, count: int, seed: int = 11) -> np.ndarray:
+    """Perturbed copies of random corpus rows, so each query has true neighbours."""
+    rng = np.random.default_rng(seed)
+    picked = corpus[rng.integers(0, len(corpus), count)]
+    queries = picked + rng.standard_normal(picked.shape).astype(np.float32) * 0.02
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+# --------------------------------------------------------------------------
+# Search backends. Each has ``build(corpus)`` and ``search(query, k) -> row ids``.
+# --------------------------------------------------------------------------
+
+
+class NumpyExactSearch:
+    """Brute-force cosine similarity over a float32 matrix; the recall reference."""
+
+    name = "numpy_exact"
+
+    def build(self, corpus: np.ndarray) -> None:
+        self.matrix = corpus
+
+    def search(self, query: np.ndarray, k: int) -> List[int]:
+        return _top_k(self.matrix @ query, k).tolist()
+
+
+class NumpyIVFSearch:
+    """
+    Inverted-file index: k-means coarse centroids, each query scans the
+    ``nprobe`` closest lists only.
+    """
+
+    name = "numpy_ivf"
+
+    def __init__(self, nprobe: int = 8, iterations: int = 8, seed: int = 3):
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+
+    def build(self, corpus: np.ndarray) -> None:
+        rng = np.random.default_rng(self.seed)
+        nlist = max(1, int(np.sqrt(len(corpus))))
+        sample = corpus[rng.choice(len(corpus), min(len(corpus), nlist * 40), replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for index in range(nlist):
+                members = sample[assignment == index]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    centroids[index] = centroid / (np.linalg.norm(centroid) or 1.0)
+        assignment = np.empty(len(corpus), dtype=np.int64)
+        for start in range(0, len(corpus), GENERATION_CHUNK_ROWS):
+            block = corpus[start : start + GENERATION_CHUNK_ROWS]
+            assignment[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        self.centroids = centroids
+        self.row_ids = order
+        self.vectors = corpus[order]
+        self.offsets = np.searchsorted(assignment[order], np.arange(nlist + 1))
+
+    def search(self, query: np.ndarray, k: int) -> List[int]:
+        probes = _top_k(self.centroids @ query, self.nprobe)
+        spans = [(self.offsets[probe], self.offsets[probe + 1]) for probe in probes]
+        candidates = np.concatenate([np.arange(start, stop) for start, stop in spans])
+        if not len(candidates):
+            return []
+        scores = self.vectors[candidates] @ query
+        return self.row_ids[candidates[_top_k(scores, k)]].tolist()
+
+
+class FaissHNSWSearch:
+    """HNSW graph index from faiss, when the optional dependency is installed."""
+
+    name = "faiss_hnsw"
+
+    def __init__(self, neighbours: int = 32, ef_search: int = 64):
+        import faiss  # type: ignore
+
+        self.faiss = faiss
+        self.neighbours = neighbours
+        self.ef_search = ef_search
+
+    def build(self, corpus: np.ndarray) -> None:
+        self.index = self.faiss.IndexHNSWFlat(corpus.shape[1], self.neighbours, self.faiss.METRIC_INNER_PRODUCT)
+        self.index.hnsw.efSearch = self.ef_search
+        self.index.add(corpus)
+
+    def search(self, query: np.ndarray, k: int) -> List[int]:
+        _, ids = self.index.search(query.reshape(1, -1), k)
+        return [int(item) for item in ids[0] if item >= 0]
+
+
+class RepositorySearch:
+    """
+    The shipped path: ``MongoRepository.search_similar_chunks``. Build loads the
+    chunks into mongomock and warms the in-memory KB index it searches.
+    """
+
+    name = "search_similar_chunks"
+
+    def __init__(self, backend: "BackendModules"):
+        self.backend = backend
+
+    def build(self, corpus: np.ndarray) -> None:
+        self.repo = self.backend.load_kb_chunks(corpus)
+        if self.backend.utils.HAS_NUMPY:
+            self.backend.utils.get_kb_vector_index().refresh(force=True)
+
+    def search(self, query: np.ndarray, k: int) -> List[int]:
+        chunks = self.repo.search_similar_chunks(query.tolist(), top_k=k)
+        return [int(chunk["_id"]) for chunk in chunks]
+
+
+class KBSuggestionSearch(RepositorySearch):
+    """
+    ``get_kb_suggestions_for_grievance`` with the query embedding injected in
+    place of OpenAI. Reuses the collection already loaded for ``search_similar_chunks``.
+    """
+
+    name = "get_kb_suggestions"
+
+    def search(self, query: np.ndarray, k: int) -> List[int]:
+        utils = self.backend.utils
+        original = utils.embed_text
+        utils.embed_text = lambda _text: query.tolist()
+        try:
+            suggestions = utils.get_kb_suggestions_for_grievance("benchmark query", top_k=k)
+        finally:
+            utils.embed_text = original
+        return [int(item["chunk_id"]) for item in suggestions]
+
+
+class BackendModules:
+    """
+    Imports ``db``/``utils`` against a temporary SQLite file and a shared
+    mongomock client. Settings are read at import time, so this must be
+    constructed before anything else imports the backend.
+    """
+
+    def __init__(self):
+        self._tempdir = tempfile.TemporaryDirectory(prefix="grievance-microbench-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(self._tempdir.name) / 'bench.db'}"
+        os.environ["OPENAI_API_KEY"] = ""
+        os.environ["CLASSIFIER_ENABLED"] = "false"
+        os.environ["TRACING_SAMPLE_RATE"] = "0"
+        import db
+        import utils
+
+        self.db = db
+        self.utils = utils
+        self.mongo = install_mongo_stand_in(utils)
+        db.init_db()
+        self._kb_rows = -1
+        self._grievance_rows = -1
+
+    def load_kb_chunks(self, corpus: np.ndarray):
+        repo = self.utils.MongoRepository()
+        if self._kb_rows != len(corpus):
+            repo.kb_chunks.delete_many({})
+            repo.kb_chunks.insert_many(
+                {
+                    "_id": row,
+                    "type": "kb_chunk",
+                    "doc_id": f"doc-{row // 20}",
+                    "chunk_id": row % 20,
+                    "doc_name": f"Handbook {row // 20}",
+                    "text": "Synthetic knowledge base chunk.",
+                    "embedding": vector.tolist(),
+                }
+                for row, vector in enumerate(corpus)
+            )
+            self._kb_rows = len(corpus)
+        return repo
+
+    def load_grievances(self, corpus: np.ndarray) -> None:
+        if self._grievance_rows == len(corpus):
+            return
+        db = self.db
+        repo = self.utils.MongoRepository()
+        repo.embeddings.delete_many({})
+        with db.session_scope() as session:
+            session.query(db.Grievance).delete()
+            student = db.get_or_create_default_student(session)
+            session.bulk_insert_mappings(
+                db.Grievance,
+                [
+                    {
+                        "id": row + 1,
+                        "student_id": student.id,
+                        "title": f"Synthetic grievance {row}",
+                        "description": "Synthetic grievance body.",
+                        "tags": [],
+                        "cluster_tags": [],
+                        "s3_doc_urls": [],
+                    }
+                    for row in range(len(corpus))
+                ],
+            )
+        now = datetime.utcnow()
+        repo.embeddings.insert_many(
+            {"grievance_id": row + 1, "embedding": vector.tolist(), "meta_info": {}, "updated_at": now}
+            for row, vector in enumerate(corpus)
+        )
+        self._grievance_rows = len(corpus)
+
+    def close(self) -> None:
+        self._tempdir.cleanup()
+
+
+# --------------------------------------------------------------------------
+# Measurement
+# --------------------------------------------------------------------------
+
+
+def traced_call(func: Callable[[], Any]) -> Tuple[float, int, Any]:
+    """Seconds and peak traced bytes of one call (timing includes tracemalloc overhead)."""
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def run_kb_suite(
+    sizes: List[int],
+    args: argparse.Namespace,
+    backend_factories: Dict[str, Callable[[], Any]],
+) -> Iterator[Dict[str, Any]]:
+    for size in sizes:
+        corpus = synthetic_embeddings(size, args.dim, seed=args.seed)
+        queries = synthetic_queries(corpus, args.queries, seed=args.seed + 1)
+        reference = NumpyExactSearch()
+        reference.build(corpus)
+        truth = [set(reference.search(query, args.k)) for query in queries]
+        for name, factory in backend_factories.items():
+            row = {"suite": "kb", "rows": size, "backend": name}
+            if name in ("search_similar_chunks", "get_kb_suggestions") and size > args.max_scan_rows:
+                yield {**row, "skipped": f"rows > --max-scan-rows ({args.max_scan_rows})"}
+                continue
+            try:
+                backend = factory()
+            except ImportError as exc:
+                yield {**row, "skipped": f"missing dependency: {exc.name or exc}"}
+                continue
+            build_seconds, build_peak, _ = traced_call(lambda: backend.build(corpus))
+            # Scan backends are pure Python per query; time a subset so large runs finish.
+            sample = queries[: args.scan_queries] if name in ("search_similar_chunks", "get_kb_suggestions") else queries
+            latencies = []
+            recalls = []
+            for query, expected in zip(sample, truth):
+                start = time.perf_counter()
+                found = backend.search(query, args.k)
+                latencies.append(time.perf_counter() - start)
+                recalls.append(len(expected.intersection(found)) / len(expected))
+            _, query_peak, _ = traced_call(lambda: backend.search(sample[0], args.k))
+            yield {
+                **row,
+                "build_s": round(build_seconds, 4),
+                "build_peak_mb": round(build_peak / 2**20, 2),
+                "queries": len(sample),
+                "p50_ms": round(statistics.median(latencies) * 1000, 3),
+                "p95_ms": round(_percentile(latencies, 0.95) * 1000, 3),
+                "query_peak_mb": round(query_peak / 2**20, 2),
+                f"recall@{args.k}": round(sum(recalls) / len(recalls), 4),
+            }
+        del corpus
+
+
+def _dbscan(corpus: np.ndarray):
+    # Same algorithm and parameters as GrievanceClusteringEngine._perform_clustering.
+    from sklearn.cluster import DBSCAN
+    from sklearn.preprocessing import normalize
+
+    return DBSCAN(eps=0.3, min_samples=2, metric="cosine").fit_predict(normalize(corpus, norm="l2"))
+
+
+def run_clustering_suite(sizes: List[int], args: argparse.Namespace, backend: BackendModules) -> Iterator[Dict[str, Any]]:
+    for size in sizes:
+        corpus = synthetic_embeddings(size, args.dim, seed=args.seed)
+        for name in ("dbscan", "engine"):
+            row = {"suite": "clustering", "rows": size, "backend": name}
+            if size > args.max_cluster_rows:
+                yield {**row, "skipped": f"rows > --max-cluster-rows ({args.max_cluster_rows})"}
+                continue
+            if name == "dbscan":
+                run = lambda: _dbscan(corpus)  # noqa: E731
+            else:
+                backend.load_grievances(corpus)
+                run = backend.utils.GrievanceClusteringEngine()._perform_clustering
+            # Timed untraced first; tracemalloc slows the Python-heavy engine loop.
+            start = time.perf_counter()
+            labels = run()
+            seconds = time.perf_counter() - start
+            _, peak, _ = traced_call(run)
+            result = {**row, "seconds": round(seconds, 3), "peak_mb": round(peak / 2**20, 2)}
+            if labels is not None:
+                result["clusters"] = int(len(set(labels.tolist())) - (1 if -1 in labels else 0))
+                result["noise_fraction"] = round(float(np.mean(labels == -1)), 4)
+            yield result
+        del corpus
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    by_suite: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_suite.setdefault(row["suite"], []).append(row)
+    for suite, suite_rows in by_suite.items():
+        columns = []
+        for row in suite_rows:
+            for key in row:
+                if key not in ("suite",) and key not in columns:
+                    columns.append(key)
+        widths = {
+            column: max(len(column), *(len(str(row.get(column, ""))) for row in suite_rows)) for column in columns
+        }
+        print(f"\n== {suite} ==")
+        print("  ".join(column.ljust(widths[column]) for column in columns))
+        print("  ".join("-" * widths[column] for column in columns))
+        for row in suite_rows:
+            print("  ".join(str(row.get(column, "")).ljust(widths[column]) for column in columns))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1k,10k", help="Corpus sizes, e.g. 1k,10k,100k,1m.")
+    parser.add_argument("--suites", default="kb,clustering", help="Comma-separated suites: kb, clustering.")
+    parser.add_argument(
+        "--backends",
+        default="search_similar_chunks,get_kb_suggestions,numpy_exact,numpy_ivf,faiss_hnsw",
+        help="KB search backends to compare.",
+    )
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, default=8, help="Lists scanned per query by numpy_ivf.")
+    parser.add_argument("--scan-queries", type=int, default=10, help="Queries timed for the mongomock-backed repository backends.")
+    parser.add_argument(
+        "--max-scan-rows", type=int, default=5_000, help="Largest corpus loaded into mongomock for repository backends."
+    )
+    parser.add_argument("--max-cluster-rows", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/retrieval-<timestamp>.json).")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    sizes = [parse_size(value) for value in args.sizes.split(",") if value.strip()]
+    suites = {value.strip() for value in args.suites.split(",") if value.strip()}
+    backend = BackendModules()
+    factories = {
+        "search_similar_chunks": lambda: RepositorySearch(backend),
+        "get_kb_suggestions": lambda: KBSuggestionSearch(backend),
+        "numpy_exact": NumpyExactSearch,
+        "numpy_ivf": lambda: NumpyIVFSearch(nprobe=args.nprobe),
+        "faiss_hnsw": FaissHNSWSearch,
+    }
+    selected = [name.strip() for name in args.backends.split(",") if name.strip()]
+    unknown = sorted(set(selected) - set(factories))
+    if unknown:
+        print(f"Unknown backends: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    rows: List[Dict[str, Any]] = []
+    try:
+        if "kb" in suites:
+            for row in run_kb_suite(sizes, args, {name: factories[name] for name in selected}):
+                print(json.dumps(row), file=sys.stderr)
+                rows.append(row)
+        if "clustering" in suites:
+            for row in run_clustering_suite(sizes, args, backend):
+                print(json.dumps(row), file=sys.stderr)
+                rows.append(row)
+    finally:
+        backend.close()
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"retrieval-{datetime.utcnow():%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    config = {key: getattr(args, key) for key in ("sizes", "dim", "queries", "k", "nprobe", "seed")}
+    output.write_text(json.dumps({"config": config, "results": rows}, indent=2), encoding="utf-8")
+    print_table(rows)
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Startup-time budget check.
+
+Imports ``app`` (which runs ``create_app()``) in fresh interpreters and fails
+when the median import time exceeds ``--budget-ms``, when a heavy optional
+dependency is loaded eagerly, or when startup touches the database or starts
+background threads. The child points at an empty SQLite file, so any query
+during startup fails loudly instead of passing by accident.
+
+    cd be
+    python -m benchmarks.startup --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+LAZY_MODULES = ("numpy", "sklearn", "boto3", "googleapiclient", "PyPDF2", "openai")
+
+_CHILD = """
+import json, sys, threading, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "loaded": [name for name in %r if name in sys.modules],
+    "threads": sorted(thread.name for thread in threading.enumerate() if thread is not threading.main_thread()),
+}))
+"""
+
+
+def measure_once(database_url: str) -> Dict[str, Any]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "DATABASE_URL": database_url,
+            "MONGODB_URI": "mongodb://127.0.0.1:1",
+            "OPENAI_API_KEY": "",
+        }
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", _CHILD % (LAZY_MODULES,)],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"importing app failed:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--runs", type=int, default=5)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="grievance-startup-") as tempdir:
+        database_url = f"sqlite:///{Path(tempdir) / 'empty.db'}"
+        try:
+            runs = [measure_once(database_url) for _ in range(max(1, args.runs))]
+        except RuntimeError as exc:
+            print(f"FAIL {exc}", file=sys.stderr)
+            return 1
+
+    median_ms = statistics.median(run["import_ms"] for run in runs)
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    threads = sorted({name for run in runs for name in run["threads"]})
+    if median_ms > args.budget_ms:
+        failures.append(f"median import+create_app {median_ms:.0f}ms exceeds budget {args.budget_ms:.0f}ms")
+    if loaded:
+        failures.append(f"heavy modules imported at startup: {', '.join(loaded)}")
+    if threads:
+        failures.append(f"background threads started at startup: {', '.join(threads)}")
+
+    print(
+        json.dumps(
+            {
+                "median_ms": round(median_ms, 1),
+                "runs_ms": [round(run["import_ms"], 1) for run in runs],
+                "budget_ms": args.budget_ms,
+                "eager_heavy_modules": loaded,
+                "threads": threads,
+            },
+            indent=2,
+        )
+    )
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
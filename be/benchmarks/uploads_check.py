@@ -0,0 +1,205 @@
+"""
+Presigned upload check.
+
+Serves the app against the load-test fakes and drives ``/uploads/presign``
+and ``/grievances/<id>/documents`` end to end, asserting on the fake S3
+bucket and the grievance rows:
+
+* the same content presigned and uploaded twice is stored once, under
+  ``documents/sha256/<hex>``, and the second presign reports ``exists``,
+* a body whose SHA-256 differs from the presigned one is rejected by the
+  bucket (PUT and form POST) and cannot be finalized,
+* finalize answers 400 for keys that are not upload keys or were never
+  uploaded, and 404 for a missing grievance,
+* ``s3_doc_urls`` holds each key once, including after repeated and
+  concurrent finalize calls.
+
+Exits non-zero on the first failed expectation of each case.
+
+    cd be
+    python -m benchmarks.uploads_check
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from benchmarks.load_test import Environment, parse_args as parse_load_test_args
+
+CONCURRENT_FINALIZES = 8
+
+
+class CheckFailed(AssertionError):
+    pass
+
+
+def expect(condition: bool, message: str) -> None:
+    if not condition:
+        raise CheckFailed(message)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class UploadsCheck:
+    def __init__(self, env: Environment, session):
+        self.env = env
+        self.session = session
+        self.url = env.base_url
+
+    def presign(self, data: bytes, method: str = "put") -> Dict[str, Any]:
+        response = self.session.post(
+            f"{self.url}/uploads/presign",
+            json={"method": method, "files": [{"sha256": _sha256(data), "size": len(data), "filename": "doc.bin"}]},
+        )
+        expect(response.status_code == 200, f"presign returned {response.status_code}: {response.text}")
+        return response.json()["uploads"][0]
+
+    def upload(self, target: Dict[str, Any], body: bytes) -> int:
+        upload = target["upload"]
+        if upload["method"] == "PUT":
+            return self.session.put(upload["url"], data=body, headers=upload["headers"]).status_code
+        files = {"file": ("doc.bin", body, upload["fields"].get("Content-Type", "application/octet-stream"))}
+        return self.session.post(upload["url"], data=upload["fields"], files=files).status_code
+
+    def create_grievance(self) -> int:
+        response = self.session.post(
+            f"{self.url}/grievances",
+            json={"title": "Upload check", "description": "The lab projector has not worked for a week."},
+        )
+        expect(response.status_code == 200, f"create returned {response.status_code}")
+        return response.json()["grievance"]["id"]
+
+    def finalize(self, grievance_id: int, keys: List[str]):
+        return self.session.post(f"{self.url}/grievances/{grievance_id}/documents", json={"keys": keys})
+
+    def stored_keys(self) -> List[str]:
+        return [path for path in self.env.s3.objects if "/documents/sha256/" in path]
+
+    def doc_urls(self, grievance_id: int) -> List[str]:
+        response = self.session.get(f"{self.url}/grievances/{grievance_id}")
+        expect(response.status_code == 200, f"detail returned {response.status_code}")
+        return response.json()["grievance"]["s3_doc_urls"]
+
+    def case_deduplicated_content(self) -> Dict[str, Any]:
+        data = os.urandom(4096)
+        first = self.presign(data)
+        expect(not first["exists"] and first["upload"], "first presign should return an upload target")
+        expect(first["key"] == f"documents/sha256/{_sha256(data)}", f"unexpected key {first['key']}")
+        expect(self.upload(first, data) == 200, "upload of matching content failed")
+        second = self.presign(data)
+        expect(second["exists"] and second["upload"] is None, "second presign should report exists")
+        matching = [path for path in self.stored_keys() if path.endswith(first["key"])]
+        expect(len(matching) == 1, f"expected one stored object, found {matching}")
+
+        grievance_id = self.create_grievance()
+        for _ in range(2):
+            response = self.finalize(grievance_id, [first["key"], first["key"]])
+            expect(response.status_code == 200, f"finalize returned {response.status_code}: {response.text}")
+        urls = self.doc_urls(grievance_id)
+        expect(sum(url.endswith(first["key"]) for url in urls) == 1, f"key not attached exactly once: {urls}")
+        return {"key": first["key"], "s3_doc_urls": urls}
+
+    def case_checksum_mismatch(self) -> Dict[str, Any]:
+        statuses = {}
+        for method in ("put", "post"):
+            data = os.urandom(2048)
+            target = self.presign(data, method)
+            status = self.upload(target, os.urandom(2048))
+            expect(400 <= status < 500, f"{method} upload with a different body returned {status}")
+            expect(
+                not any(path.endswith(target["key"]) for path in self.stored_keys()),
+                f"{method}: mismatched body was stored",
+            )
+            grievance_id = self.create_grievance()
+            response = self.finalize(grievance_id, [target["key"]])
+            expect(response.status_code == 400, f"{method}: finalize of a rejected upload returned {response.status_code}")
+            statuses[method] = status
+        return {"upload_statuses": statuses}
+
+    def case_finalize_errors(self) -> Dict[str, Any]:
+        grievance_id = self.create_grievance()
+        never_uploaded = f"documents/sha256/{_sha256(os.urandom(32))}"
+        cases = {
+            "unknown_key": (grievance_id, [never_uploaded], 400),
+            "not_an_upload_key": (grievance_id, ["documents/other/file.pdf"], 400),
+            "bad_digest_key": (grievance_id, ["documents/sha256/not-hex"], 400),
+            "no_keys": (grievance_id, [], 400),
+            "missing_grievance": (10 ** 9, [never_uploaded], 404),
+        }
+        statuses = {}
+        for name, (target_id, keys, expected) in cases.items():
+            statuses[name] = self.finalize(target_id, keys).status_code
+            expect(statuses[name] == expected, f"{name}: expected {expected}, got {statuses[name]}")
+        expect(self.doc_urls(grievance_id) == [], "a failed finalize attached documents")
+        return {"statuses": statuses}
+
+    def case_concurrent_finalize(self) -> Dict[str, Any]:
+        keys = []
+        for _ in range(CONCURRENT_FINALIZES):
+            data = os.urandom(1024)
+            target = self.presign(data)
+            expect(self.upload(target, data) == 200, "upload failed")
+            keys.append(target["key"])
+        grievance_id = self.create_grievance()
+        import requests
+
+        def finalize(key: str) -> int:
+            # One session per thread; requests.Session is not thread-safe.
+            return requests.post(f"{self.url}/grievances/{grievance_id}/documents", json={"keys": [key]}).status_code
+
+        with ThreadPoolExecutor(max_workers=CONCURRENT_FINALIZES) as pool:
+            statuses = list(pool.map(finalize, keys))
+        expect(all(status == 200 for status in statuses), f"concurrent finalize statuses {statuses}")
+        urls = self.doc_urls(grievance_id)
+        missing = [key for key in keys if sum(url.endswith(key) for url in urls) != 1]
+        expect(not missing, f"{len(missing)} of {len(keys)} keys lost or duplicated: {urls}")
+        return {"finalized": len(keys), "attached": len(urls)}
+
+
+CASES = ("deduplicated_content", "checksum_mismatch", "finalize_errors", "concurrent_finalize")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--database-url",
+        default=None,
+        help="Check against this database instead of a temporary SQLite file. Its tables are dropped and recreated.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import requests
+
+    args = parse_args(argv)
+    os.environ.setdefault("WARMUP_ENABLED", "false")
+    os.environ.setdefault("ARCHIVE_ENABLED", "false")
+    env_args = parse_load_test_args(["--openai-latency-ms", "0", "--s3-latency-ms", "0", "--embedding-dim", "64"])
+    env_args.database_url = args.database_url
+    env = Environment(env_args)
+    results: Dict[str, Any] = {}
+    failures = []
+    try:
+        check = UploadsCheck(env, requests.Session())
+        for name in CASES:
+            try:
+                results[name] = getattr(check, f"case_{name}")()
+            except CheckFailed as exc:
+                failures.append(f"{name}: {exc}")
+    finally:
+        env.close()
+
+    print(json.dumps(results, indent=2))
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+"""
+Bulk grievance import.
+
+``POST /admin/grievances/bulk`` takes newline-delimited JSON, one grievance
+per line with the fields of ``POST /grievances`` (plus an optional
+``created_at`` for migrated rows). Lines are read from the request stream and
+handled ``IMPORT_BATCH_SIZE`` at a time, so neither the upload nor the
+response is ever held in memory in full. For each batch:
+
+* rows without tags are classified together (one local-model pass, LLM
+  fallback only for the rows the model is unsure of),
+* all valid rows go to the database in a single multi-row INSERT,
+* descriptions are embedded with batched OpenAI requests and the vectors are
+  written to MongoDB with one ``bulk_write``,
+
+and a result line per input row is streamed back before the next batch is
+read. Bulk rows skip near-duplicate detection and document uploads.
+"""
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from admission import Priority, admission_priority
+from db import (
+    Department,
+    Grievance,
+    GrievanceStatus,
+    TAG_SOURCE_FALLBACK,
+    TAG_SOURCE_SUBMITTER,
+    default_student_ref,
+    queue_stat_deltas,
+    session_scope,
+    stat_key,
+)
+from utils import FALLBACK_TAGS, classify_grievances, embed_texts, persist_embeddings
+
+logger = logging.getLogger("grievance.bulk_import")
+
+IMPORT_BATCH_SIZE = 500
+MAX_LINE_BYTES = 1024 * 1024
+CLASSIFY_MODES = ("auto", "model", "none")
+
+_TAG_KEYS = ("category_tags", "issue_tags", "tags")
+_CLUSTER_TAG_KEYS = ("cluster_tags", "clusters")
+
+
+def _list_field(row: Dict[str, Any], keys: Iterable[str]) -> List[Any]:
+    for key in keys:
+        value = row.get(key)
+        if value is not None:
+            return value if isinstance(value, list) else [value]
+    return []
+
+
+def _enum_field(row: Dict[str, Any], key: str, enum, default):
+    value = row.get(key)
+    if value is None:
+        return default
+    try:
+        return enum[str(value).upper()]
+    except KeyError:
+        raise ValueError(f"Invalid {key} value") from None
+
+
+def _timestamp_field(row: Dict[str, Any], key: str) -> Optional[datetime]:
+    value = row.get(key)
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"{key} must be an ISO 8601 timestamp") from None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_row(row: Any) -> Dict[str, Any]:
+    """Validate one import line; raises ValueError with a message for the client."""
+    if not isinstance(row, dict):
+        raise ValueError("Each line must be a JSON object")
+    description = row.get("description")
+    if not description or not isinstance(description, str):
+        raise ValueError("Description is required")
+    cluster = row.get("cluster")
+    cluster_tags = _list_field(row, _CLUSTER_TAG_KEYS)
+    if not cluster_tags and cluster:
+        cluster_tags = [cluster]
+    tags = _list_field(row, _TAG_KEYS)
+    return {
+        "title": str(row.get("title") or "Untitled"),
+        "description": description,
+        "status": _enum_field(row, "status", GrievanceStatus, GrievanceStatus.NEW),
+        "assigned_to": _enum_field(row, "assigned_to", Department, None),
+        "tags": tags,
+        "tags_source": TAG_SOURCE_SUBMITTER if tags else None,
+        "cluster": cluster,
+        "cluster_tags": cluster_tags,
+        "drop_reason": row.get("drop_reason"),
+        "created_at": _timestamp_field(row, "created_at"),
+    }
+
+
+def read_lines(stream) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    ``(line_number, row, error)`` for each non-blank line of ``stream``.
+    Lines longer than ``MAX_LINE_BYTES`` are skipped with an error.
+    """
+    number = 0
+    while True:
+        line = stream.readline(MAX_LINE_BYTES + 1)
+        if not line:
+            return
+        number += 1
+        if len(line) > MAX_LINE_BYTES and not line.endswith(b"\n"):
+            while True:
+                rest = stream.readline(MAX_LINE_BYTES)
+                if not rest or rest.endswith(b"\n"):
+                    break
+            yield number, None, f"Line exceeds {MAX_LINE_BYTES} bytes"
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield number, parse_row(json.loads(line)), None
+        except ValueError as exc:
+            # json.JSONDecodeError is a ValueError too.
+            message = str(exc) if not isinstance(exc, json.JSONDecodeError) else f"Invalid JSON: {exc.msg}"
+            yield number, None, message
+
+
+class BulkImport:
+    """One ``POST /admin/grievances/bulk`` request; :meth:`run` yields result dicts."""
+
+    def __init__(self, stream, classify: str = "auto", embed: bool = True, batch_size: int = IMPORT_BATCH_SIZE):
+        if classify not in CLASSIFY_MODES:
+            raise ValueError("classify must be one of: auto, model, none")
+        self.stream = stream
+        self.classify = classify
+        self.embed = embed
+        self.batch_size = max(1, int(batch_size))
+        self.totals = {"rows": 0, "created": 0, "failed": 0, "embedded": 0}
+        self._student_id: Optional[int] = None
+
+    def run(self) -> Iterator[Dict[str, Any]]:
+        batch: List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]] = []
+        for item in read_lines(self.stream):
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield from self._import_batch(batch)
+                batch = []
+        if batch:
+            yield from self._import_batch(batch)
+        logger.info(
+            "Bulk import finished: rows=%d created=%d failed=%d embedded=%d",
+            self.totals["rows"],
+            self.totals["created"],
+            self.totals["failed"],
+            self.totals["embedded"],
+        )
+        yield {"summary": dict(self.totals)}
+
+    def _import_batch(self, batch) -> Iterator[Dict[str, Any]]:
+        results: Dict[int, Dict[str, Any]] = {}
+        valid: List[Tuple[int, Dict[str, Any]]] = []
+        for number, row, error in batch:
+            if error is not None:
+                results[number] = {"line": number, "status": "error", "error": error}
+            else:
+                valid.append((number, row))
+
+        if valid:
+            self._classify([row for _, row in valid])
+            try:
+                ids = self._insert([row for _, row in valid])
+            except Exception:
+                logger.exception("Bulk import: batch of %d rows failed", len(valid))
+                for number, _ in valid:
+                    results[number] = {"line": number, "status": "error", "error": "Batch insert failed"}
+            else:
+                embedded = self._embed(list(zip(ids, (row for _, row in valid))))
+                for (number, _), grievance_id in zip(valid, ids):
+                    results[number] = {
+                        "line": number,
+                        "status": "created",
+                        "id": grievance_id,
+                        "embedded": grievance_id in embedded,
+                    }
+
+        for number, _, _ in batch:
+            result = results[number]
+            self.totals["rows"] += 1
+            if result["status"] == "created":
+                self.totals["created"] += 1
+                self.totals["embedded"] += int(result["embedded"])
+            else:
+                self.totals["failed"] += 1
+            yield result
+
+    def _classify(self, rows: List[Dict[str, Any]]) -> None:
+        if self.classify == "none":
+            return
+        pending = [row for row in rows if not row["tags"]]
+        if not pending:
+            return
+        try:
+            with admission_priority(Priority.INGESTION):
+                classifications = classify_grievances(
+                    [(row["title"], row["description"]) for row in pending],
+                    use_llm=self.classify == "auto",
+                )
+        except Exception as exc:
+            # Shed by admission, an open breaker or a model error: the rows are
+            # still valid, so import them with the fallback tags.
+            logger.warning("Bulk import: classification of %d rows skipped: %s", len(pending), exc)
+            for row in pending:
+                row["tags"] = list(FALLBACK_TAGS)
+                row["tags_source"] = TAG_SOURCE_FALLBACK
+            return
+        for row, classification in zip(pending, classifications):
+            row["tags"] = classification["tags"]
+            row["tags_source"] = classification["source"]
+            if row["assigned_to"] is None and classification["department"]:
+                try:
+                    row["assigned_to"] = Department[classification["department"].upper()]
+                except KeyError:
+                    pass
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> List[int]:
+        now = datetime.utcnow()
+        with session_scope() as session:
+            if self._student_id is None:
+                self._student_id = default_student_ref(session).id
+            # Every parameter set has the same keys, so this is one executemany.
+            values = [
+                {
+                    "student_id": self._student_id,
+                    "title": row["title"],
+                    "description": row["description"],
+                    "status": row["status"],
+                    "assigned_to": row["assigned_to"] or Department.OTHERS,
+                    "tags": row["tags"],
+                    "tags_source": row["tags_source"],
+                    "cluster": row["cluster"],
+                    "cluster_tags": row["cluster_tags"],
+                    "drop_reason": row["drop_reason"],
+                    "created_at": row["created_at"] or now,
+                    "updated_at": now,
+                }
+                for row in rows
+            ]
+            result = session.execute(
+                insert(Grievance).returning(Grievance.id, sort_by_parameter_order=True),
+                values,
+            )
+            queue_stat_deltas(
+                session,
+                Counter(stat_key(value["created_at"], value["status"], value["assigned_to"]) for value in values),
+            )
+            return [grievance_id for (grievance_id,) in result]
+
+    def _embed(self, created: List[Tuple[int, Dict[str, Any]]]) -> set:
+        """Embed and persist vectors for ``created``; returns the ids that were stored."""
+        if not self.embed or not created:
+            return set()
+        try:
+            with admission_priority(Priority.INGESTION):
+                embeddings = embed_texts([row["description"] for _, row in created], fallback_when_open=False)
+            persist_embeddings(
+                [
+                    {
+                        "grievance_id": grievance_id,
+                        "embedding": embedding,
+                        "meta": {
+                            "tags": row["tags"],
+                            "issue_tags": row["tags"],
+                            "cluster": row["cluster"],
+                            "cluster_tags": row["cluster_tags"],
+                            "student_id": self._student_id,
+                        },
+                    }
+                    for (grievance_id, row), embedding in zip(created, embeddings)
+                ]
+            )
+        except Exception as exc:
+            # Rows stay created; embeddings can be backfilled later.
+            logger.warning("Bulk import: embeddings for %d rows skipped: %s", len(created), exc)
+            return set()
+        return {grievance_id for grievance_id, _ in created}
@@ -1,7 +1,7 @@
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 
 def _load_env_file(path: Path) -> None:
@@ -33,6 +33,13 @@ class DatabaseSettings:
     pool_size: int
 
 
+@dataclass(frozen=True)
+class ReplicaRoutingSettings:
+    max_lag_seconds: float
+    lag_check_seconds: float
+    sticky_seconds: int
+
+
 @dataclass(frozen=True)
 class MongoSettings:
     uri: str
@@ -41,6 +48,10 @@ class MongoSettings:
     embedding_collection: str
     analytics_collection: str
     kb_collection: str
+    summary_collection: str
+    server_selection_timeout_ms: int
+    connect_timeout_ms: int
+    socket_timeout_ms: int
 
 
 @dataclass(frozen=True)
@@ -48,6 +59,7 @@ class OpenAISettings:
     api_key: str
     embedding_model: str
     chat_model: str
+    timeout_seconds: float
 
 
 @dataclass(frozen=True)
@@ -56,12 +68,104 @@ class AWSSettings:
     secret_access_key: str
     region: str
     s3_bucket: str
+    connect_timeout_seconds: float
+    read_timeout_seconds: float
+    multipart_part_size_bytes: int
+    upload_concurrency: int
+    max_buffered_parts: int
+    presign_expiry_seconds: int
+    max_upload_bytes: int
 
 
 @dataclass(frozen=True)
 class GoogleDriveSettings:
     service_account_path: Optional[str]
     polling_interval_seconds: int
+    timeout_seconds: float
+
+
+@dataclass(frozen=True)
+class VectorIndexSettings:
+    refresh_interval_seconds: int
+    related_top_k: int
+
+
+@dataclass(frozen=True)
+class DeduplicationSettings:
+    enabled: bool
+    similarity_threshold: float
+    window_seconds: int
+    max_entries: int
+
+
+@dataclass(frozen=True)
+class ClassifierSettings:
+    enabled: bool
+    confidence_threshold: float
+    retrain_interval_seconds: int
+    min_training_rows: int
+    shadow_sample_rate: float
+
+
+@dataclass(frozen=True)
+class QueryBudgetSettings:
+    enforce: bool
+    server_timing: bool
+
+
+@dataclass(frozen=True)
+class StatsSettings:
+    reconcile_interval_seconds: int
+
+
+@dataclass(frozen=True)
+class ArchiveSettings:
+    enabled: bool
+    after_days: int
+    interval_seconds: int
+    batch_size: int
+
+
+@dataclass(frozen=True)
+class TracingSettings:
+    sample_rate: float
+    buffer_size: int
+    export_path: Optional[str]
+    force_token: Optional[str]
+
+
+@dataclass(frozen=True)
+class WarmupSettings:
+    enabled: bool
+    steps: Tuple[str, ...]
+    retry_seconds: int
+    database_connections: int
+
+
+@dataclass(frozen=True)
+class ResilienceSettings:
+    retry_attempts: int
+    retry_base_delay_seconds: float
+    retry_max_delay_seconds: float
+    breaker_failure_threshold: int
+    breaker_reset_seconds: float
+
+
+@dataclass(frozen=True)
+class AdmissionSettings:
+    enabled: bool
+    openai_requests_per_minute: float
+    openai_burst: int
+    max_wait_seconds: Dict[str, float]
+    max_queue: int
+    tenant_requests_per_minute: float
+    tenant_burst: int
+
+
+@dataclass(frozen=True)
+class AsgiSettings:
+    wsgi_threads: int
+    summary_concurrency: int
 
 
 @dataclass(frozen=True)
@@ -70,10 +174,23 @@ class ApplicationSettings:
     debug: bool
     flask_secret_key: str
     database: DatabaseSettings
+    database_replica: Optional[DatabaseSettings]
+    replica_routing: ReplicaRoutingSettings
     mongo: MongoSettings
     openai: OpenAISettings
     aws: AWSSettings
     gdrive: GoogleDriveSettings
+    vector_index: VectorIndexSettings
+    deduplication: DeduplicationSettings
+    classifier: ClassifierSettings
+    query_budget: QueryBudgetSettings
+    stats: StatsSettings
+    archive: ArchiveSettings
+    tracing: TracingSettings
+    warmup: WarmupSettings
+    asgi: AsgiSettings
+    admission: AdmissionSettings
+    resilience: ResilienceSettings
     allow_cors_origins: Optional[str]
 
     def as_flask_config(self) -> Dict[str, str]:
@@ -98,6 +215,21 @@ def load_settings(env_file: str = ".env") -> ApplicationSettings:
         pool_size=int(os.getenv("SQLALCHEMY_POOL_SIZE", "5")),
     )
 
+    # Read-only endpoints use the replica when DATABASE_REPLICA_URL is set.
+    database_replica = None
+    if os.getenv("DATABASE_REPLICA_URL"):
+        database_replica = DatabaseSettings(
+            url=os.environ["DATABASE_REPLICA_URL"],
+            echo=database.echo,
+            pool_size=int(os.getenv("SQLALCHEMY_REPLICA_POOL_SIZE", str(database.pool_size))),
+        )
+
+    replica_routing = ReplicaRoutingSettings(
+        max_lag_seconds=float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5")),
+        lag_check_seconds=float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "2")),
+        sticky_seconds=int(os.getenv("REPLICA_STICKY_SECONDS", "10")),
+    )
+
     mongo = MongoSettings(
         uri=os.getenv("MONGODB_URI", "mongodb://localhost:27017"),
         db_name=os.getenv("MONGODB_DB", "grievances"),
@@ -109,12 +241,17 @@ def load_settings(env_file: str = ".env") -> ApplicationSettings:
             "MONGODB_ANALYTICS_COLLECTION", "cluster_analytics"
         ),
         kb_collection=os.getenv("MONGODB_KB_COLLECTION", "knowledge_base_chunks"),
+        summary_collection=os.getenv("MONGODB_SUMMARY_COLLECTION", "summary_cache"),
+        server_selection_timeout_ms=int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "1000")),
+        connect_timeout_ms=int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "2000")),
+        socket_timeout_ms=int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "5000")),
     )
 
     openai = OpenAISettings(
         api_key=os.getenv("OPENAI_API_KEY", ""),
         embedding_model=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small"),
         chat_model=os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini"),
+        timeout_seconds=float(os.getenv("OPENAI_TIMEOUT_SECONDS", "20")),
     )
 
     aws = AWSSettings(
@@ -122,11 +259,105 @@ def load_settings(env_file: str = ".env") -> ApplicationSettings:
         secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", ""),
         region=os.getenv("AWS_REGION", "ap-south-1"),
         s3_bucket=os.getenv("AWS_S3_BUCKET", "student-grievances"),
+        connect_timeout_seconds=float(os.getenv("S3_CONNECT_TIMEOUT_SECONDS", "3")),
+        read_timeout_seconds=float(os.getenv("S3_READ_TIMEOUT_SECONDS", "15")),
+        # S3 rejects multipart parts smaller than 5 MiB (except the last one).
+        multipart_part_size_bytes=max(5, int(os.getenv("S3_MULTIPART_PART_SIZE_MB", "5"))) * 1024 * 1024,
+        upload_concurrency=int(os.getenv("S3_UPLOAD_CONCURRENCY", "16")),
+        max_buffered_parts=int(os.getenv("S3_UPLOAD_MAX_BUFFERED_PARTS", "4")),
+        presign_expiry_seconds=int(os.getenv("S3_PRESIGN_EXPIRY_SECONDS", "900")),
+        max_upload_bytes=int(os.getenv("S3_MAX_UPLOAD_MB", "25")) * 1024 * 1024,
     )
 
     gdrive = GoogleDriveSettings(
         service_account_path=str(project_root / "client.json"),
         polling_interval_seconds=int(os.getenv("GDRIVE_POLL_INTERVAL", "300")),
+        timeout_seconds=float(os.getenv("GDRIVE_TIMEOUT_SECONDS", "30")),
+    )
+
+    vector_index = VectorIndexSettings(
+        refresh_interval_seconds=int(os.getenv("VECTOR_INDEX_REFRESH_SECONDS", "60")),
+        related_top_k=int(os.getenv("RELATED_GRIEVANCES_TOP_K", "5")),
+    )
+
+    deduplication = DeduplicationSettings(
+        enabled=_to_bool(os.getenv("DEDUP_ENABLED"), default=True),
+        similarity_threshold=float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.95")),
+        window_seconds=int(os.getenv("DEDUP_WINDOW_SECONDS", "1800")),
+        max_entries=int(os.getenv("DEDUP_MAX_ENTRIES", "2048")),
+    )
+
+    classifier = ClassifierSettings(
+        enabled=_to_bool(os.getenv("CLASSIFIER_ENABLED"), default=True),
+        confidence_threshold=float(os.getenv("CLASSIFIER_CONFIDENCE_THRESHOLD", "0.7")),
+        retrain_interval_seconds=int(os.getenv("CLASSIFIER_RETRAIN_SECONDS", "3600")),
+        min_training_rows=int(os.getenv("CLASSIFIER_MIN_TRAINING_ROWS", "50")),
+        shadow_sample_rate=float(os.getenv("CLASSIFIER_SHADOW_SAMPLE_RATE", "0.05")),
+    )
+
+    query_budget = QueryBudgetSettings(
+        enforce=_to_bool(os.getenv("SQL_QUERY_BUDGET_ENFORCE"), default=False),
+        server_timing=_to_bool(os.getenv("SQL_SERVER_TIMING"), default=False),
+    )
+
+    stats = StatsSettings(
+        reconcile_interval_seconds=int(os.getenv("STATS_RECONCILE_SECONDS", "3600")),
+    )
+
+    archive = ArchiveSettings(
+        enabled=_to_bool(os.getenv("ARCHIVE_ENABLED"), default=False),
+        after_days=int(os.getenv("ARCHIVE_AFTER_DAYS", "180")),
+        interval_seconds=int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "86400")),
+        batch_size=int(os.getenv("ARCHIVE_BATCH_SIZE", "500")),
+    )
+
+    tracing = TracingSettings(
+        sample_rate=float(os.getenv("TRACING_SAMPLE_RATE", "0.05")),
+        buffer_size=int(os.getenv("TRACING_BUFFER_SIZE", "200")),
+        export_path=os.getenv("TRACING_EXPORT_PATH") or None,
+        force_token=os.getenv("TRACING_FORCE_TOKEN") or None,
+    )
+
+    warmup = WarmupSettings(
+        enabled=_to_bool(os.getenv("WARMUP_ENABLED"), default=True),
+        steps=tuple(
+            step.strip()
+            for step in os.getenv(
+                "WARMUP_STEPS",
+                "database,mongo,default_accounts,imports,kb_vectors,grievance_vectors,dedup_window,label_model",
+            ).split(",")
+            if step.strip()
+        ),
+        retry_seconds=int(os.getenv("WARMUP_RETRY_SECONDS", "15")),
+        database_connections=int(os.getenv("WARMUP_DB_CONNECTIONS", str(database.pool_size))),
+    )
+
+    asgi = AsgiSettings(
+        wsgi_threads=int(os.getenv("ASGI_WSGI_THREADS", "32")),
+        summary_concurrency=int(os.getenv("ASGI_SUMMARY_CONCURRENCY", "8")),
+    )
+
+    admission = AdmissionSettings(
+        enabled=_to_bool(os.getenv("ADMISSION_ENABLED"), default=True),
+        openai_requests_per_minute=float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "3000")),
+        openai_burst=int(os.getenv("OPENAI_BURST", "50")),
+        max_wait_seconds={
+            "interactive": float(os.getenv("ADMISSION_MAX_WAIT_INTERACTIVE", "10")),
+            "preview": float(os.getenv("ADMISSION_MAX_WAIT_PREVIEW", "3")),
+            "ingestion": float(os.getenv("ADMISSION_MAX_WAIT_INGESTION", "120")),
+            "summary": float(os.getenv("ADMISSION_MAX_WAIT_SUMMARY", "30")),
+        },
+        max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "256")),
+        tenant_requests_per_minute=float(os.getenv("TENANT_RATE_LIMIT_PER_MINUTE", "0")),
+        tenant_burst=int(os.getenv("TENANT_RATE_LIMIT_BURST", "20")),
+    )
+
+    resilience = ResilienceSettings(
+        retry_attempts=int(os.getenv("RETRY_ATTEMPTS", "3")),
+        retry_base_delay_seconds=float(os.getenv("RETRY_BASE_DELAY_SECONDS", "0.2")),
+        retry_max_delay_seconds=float(os.getenv("RETRY_MAX_DELAY_SECONDS", "2")),
+        breaker_failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+        breaker_reset_seconds=float(os.getenv("BREAKER_RESET_SECONDS", "30")),
     )
 
     settings = ApplicationSettings(
@@ -134,10 +365,23 @@ def load_settings(env_file: str = ".env") -> ApplicationSettings:
         debug=_to_bool(os.getenv("FLASK_DEBUG"), default=True),
         flask_secret_key=os.getenv("FLASK_SECRET_KEY", "change-me"),
         database=database,
+        database_replica=database_replica,
+        replica_routing=replica_routing,
         mongo=mongo,
         openai=openai,
         aws=aws,
         gdrive=gdrive,
+        vector_index=vector_index,
+        deduplication=deduplication,
+        classifier=classifier,
+        query_budget=query_budget,
+        stats=stats,
+        archive=archive,
+        tracing=tracing,
+        warmup=warmup,
+        asgi=asgi,
+        admission=admission,
+        resilience=resilience,
         allow_cors_origins=os.getenv("CORS_ALLOW_ORIGINS"),
     )
     return settings
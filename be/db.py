@@ -1,11 +1,20 @@
 import enum
 import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
 from contextlib import contextmanager
-from datetime import datetime
-from typing import Generator, Optional
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Tuple
 
 from sqlalchemy import (
+    Boolean,
     Column,
+    Date,
     DateTime,
     Enum,
     ForeignKey,
@@ -13,10 +22,16 @@ from sqlalchemy import (
     String,
     Text,
     create_engine,
+    delete,
     event,
+    func,
     inspect,
+    select,
+    and_,
     text,
+    union_all,
 )
+from sqlalchemy.sql import column, table
 from sqlalchemy.orm import (
     declarative_base,
     relationship,
@@ -28,11 +43,16 @@ from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.mutable import MutableList
 
 from config import settings
+from metrics import check_query_budget, instrument_engine
+from tracing import instrument_engine as instrument_engine_tracing
+
+logger = logging.getLogger("grievance.db")
 
 IS_POSTGRES = settings.database.url.startswith("postgresql")
 
 if IS_POSTGRES:
     from sqlalchemy.dialects.postgresql import ARRAY  # type: ignore
+    from sqlalchemy.dialects.postgresql import insert as upsert  # type: ignore
 
     def list_column_type():
         return ARRAY(String)
@@ -65,12 +85,25 @@ else:
     def list_column_type():
         return MutableList.as_mutable(JSONList)
 
+    from sqlalchemy.dialects.sqlite import insert as upsert  # type: ignore
+
 
 DEFAULT_STUDENT_NAME = "Default Student"
 DEFAULT_STUDENT_EMAIL = "student@grievances.local"
 DEFAULT_ADMIN_NAME = "Default Admin"
 DEFAULT_ADMIN_EMAIL = "admin@grievances.local"
 
+# Where a grievance's issue tags came from (``Grievance.tags_source``). Rows
+# written before the column existed have NULL.
+TAG_SOURCE_MODEL = "model"
+TAG_SOURCE_LLM = "llm"
+TAG_SOURCE_FALLBACK = "fallback"
+TAG_SOURCE_SUBMITTER = "submitter"
+TAG_SOURCE_ADMIN = "admin"
+# Tags the label model must not learn from: its own predictions and the
+# placeholder tags written when classification failed.
+UNTRAINABLE_TAG_SOURCES = (TAG_SOURCE_MODEL, TAG_SOURCE_FALLBACK)
+
 
 class GrievanceStatus(enum.Enum):
     NEW = "NEW"
@@ -91,20 +124,177 @@ class Department(enum.Enum):
 Base = declarative_base()
 
 
-def _create_engine():
+def _create_engine(database=None):
+    database = database or settings.database
     kwargs = {
-        "echo": settings.database.echo,
+        "echo": database.echo,
         "future": True,
     }
-    if not settings.database.url.startswith("sqlite:"):
-        kwargs["pool_size"] = settings.database.pool_size
-    return create_engine(settings.database.url, **kwargs)
+    if not database.url.startswith("sqlite:"):
+        kwargs["pool_size"] = database.pool_size
+    return create_engine(database.url, **kwargs)
 
 
 engine = _create_engine()
+instrument_engine(engine)
+instrument_engine_tracing(engine)
 SessionFactory = sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
 SessionLocal = scoped_session(SessionFactory)
 
+replica_engine = None
+ReadSessionFactory = SessionFactory
+if settings.database_replica is not None:
+    replica_engine = _create_engine(settings.database_replica)
+    instrument_engine(replica_engine, "sql_replica", "sqlalchemy_replica_pool_connections")
+    instrument_engine_tracing(replica_engine)
+    ReadSessionFactory = sessionmaker(bind=replica_engine, expire_on_commit=False, autoflush=False)
+
+_PRIMARY_READS: ContextVar[bool] = ContextVar("grievance_primary_reads", default=False)
+
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class ReplicaLagMonitor:
+    """
+    Replication lag of the read replica, measured at most every
+    ``check_interval`` seconds by whichever request asks first. The replica
+    is usable while the last measurement was within ``max_lag``; a failed
+    measurement counts as unusable until the next check.
+    """
+
+    def __init__(self, engine, max_lag_seconds: float, check_interval_seconds: float):
+        self.engine = engine
+        self.max_lag = max(0.0, float(max_lag_seconds))
+        self.check_interval = max(0.1, float(check_interval_seconds))
+        self._lock = threading.Lock()
+        self._checking = False
+        self._next_check = 0.0
+        self._usable = False
+        self._lag: Optional[float] = None
+        self._error: Optional[str] = None
+
+    def usable(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self._checking or now < self._next_check:
+                return self._usable
+            self._checking = True
+        lag, error = None, None
+        try:
+            lag = self._measure()
+        except Exception as exc:
+            error = str(exc)
+        usable = lag is not None and lag <= self.max_lag
+        with self._lock:
+            # Before the first check only a failure is worth logging.
+            if usable != self._usable and (self._next_check or not usable):
+                logger.warning(
+                    "Read replica %s (lag=%s, error=%s)",
+                    "back in sync, routing reads to it" if usable else "unusable, reading from the primary",
+                    lag,
+                    error,
+                )
+            self._usable, self._lag, self._error = usable, lag, error
+            self._next_check = time.monotonic() + self.check_interval
+            self._checking = False
+        return usable
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "usable": self._usable,
+                "lag_seconds": self._lag,
+                "max_lag_seconds": self.max_lag,
+                "error": self._error,
+            }
+
+    def _measure(self) -> Optional[float]:
+        with self.engine.connect() as connection:
+            if self.engine.dialect.name != "postgresql":
+                connection.execute(text("SELECT 1"))
+                return 0.0
+            lag = connection.execute(_REPLICA_LAG_SQL).scalar()
+        return None if lag is None else max(0.0, float(lag))
+
+
+_REPLICA_MONITOR = (
+    ReplicaLagMonitor(
+        replica_engine,
+        settings.replica_routing.max_lag_seconds,
+        settings.replica_routing.lag_check_seconds,
+    )
+    if replica_engine is not None
+    else None
+)
+
+
+def replica_enabled() -> bool:
+    return replica_engine is not None
+
+
+def replica_status() -> Optional[Dict[str, Any]]:
+    """Lag and routing state of the read replica, or None when none is configured."""
+    return _REPLICA_MONITOR.status() if _REPLICA_MONITOR is not None else None
+
+
+def set_primary_reads(enabled: bool) -> Token:
+    """Send this context's ``session_scope(readonly=True)`` reads to the primary (read-your-writes)."""
+    return _PRIMARY_READS.set(enabled)
+
+
+def reset_primary_reads(token: Token) -> None:
+    _PRIMARY_READS.reset(token)
+
+
+class _WriteRecord:
+    __slots__ = ("committed",)
+
+    def __init__(self):
+        self.committed = False
+
+
+# A mutable record rather than a flag, so commits made from pool threads that
+# copied this context are seen by the request.
+_COMMITTED_WRITES: ContextVar[Optional[_WriteRecord]] = ContextVar("grievance_committed_writes", default=None)
+
+
+def track_committed_writes() -> Token:
+    """Start recording whether this context commits INSERT/UPDATE/DELETE statements on the primary."""
+    return _COMMITTED_WRITES.set(_WriteRecord())
+
+
+def committed_writes() -> bool:
+    record = _COMMITTED_WRITES.get()
+    return record is not None and record.committed
+
+
+def reset_committed_writes(token: Token) -> None:
+    _COMMITTED_WRITES.reset(token)
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _note_write(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and (context.isinsert or context.isupdate or context.isdelete):
+        conn.info["uncommitted_write"] = True
+
+
+@event.listens_for(engine, "commit")
+def _record_committed_write(conn):
+    if conn.info.pop("uncommitted_write", False):
+        record = _COMMITTED_WRITES.get()
+        if record is not None:
+            record.committed = True
+
+
+@event.listens_for(engine, "rollback")
+def _forget_write(conn):
+    conn.info.pop("uncommitted_write", None)
+
 
 class TimestampMixin:
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -120,7 +310,9 @@ class Student(Base, TimestampMixin):
     name = Column(String(120), nullable=False)
     email = Column(String(255), unique=True, nullable=False, index=True)
 
-    grievances = relationship("Grievance", back_populates="student", lazy="selectin")
+    # Loaded only when accessed: no route reads a student's grievances through
+    # the relationship, and eager loading made every student lookup fetch them all.
+    grievances = relationship("Grievance", back_populates="student", lazy="select")
 
 
 class Admin(Base, TimestampMixin):
@@ -142,12 +334,42 @@ class Grievance(Base, TimestampMixin):
     status = Column(Enum(GrievanceStatus), default=GrievanceStatus.NEW, nullable=False)
     assigned_to = Column(Enum(Department), default=Department.OTHERS, nullable=False)
     tags = Column(list_column_type(), default=list)
+    tags_source = Column(String(16), nullable=True)
     s3_doc_urls = Column(list_column_type(), default=list)
     cluster_tags = Column(list_column_type(), default=list)
     cluster = Column(String(120), nullable=True)
     drop_reason = Column(Text, nullable=True)
+    duplicate_of_id = Column(Integer, ForeignKey("grievances.id"), nullable=True, index=True)
 
-    student = relationship("Student", back_populates="grievances", lazy="joined")
+    student = relationship("Student", back_populates="grievances", lazy="select")
+
+
+class ArchivedGrievance(Base):
+    """
+    A closed grievance moved out of ``grievances`` by the archival job. Same
+    columns, without foreign keys, plus when it was archived and whether its
+    MongoDB documents have been moved too.
+    """
+
+    __tablename__ = "grievances_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    student_id = Column(Integer, nullable=False, index=True)
+    title = Column(String(200), nullable=False)
+    description = Column(Text, nullable=False)
+    status = Column(Enum(GrievanceStatus), nullable=False)
+    assigned_to = Column(Enum(Department), nullable=False)
+    tags = Column(list_column_type(), default=list)
+    tags_source = Column(String(16), nullable=True)
+    s3_doc_urls = Column(list_column_type(), default=list)
+    cluster_tags = Column(list_column_type(), default=list)
+    cluster = Column(String(120), nullable=True)
+    drop_reason = Column(Text, nullable=True)
+    duplicate_of_id = Column(Integer, nullable=True, index=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    documents_archived = Column(Boolean, default=False, nullable=False, index=True)
 
 
 class GDriveConfig(Base):
@@ -160,6 +382,17 @@ class GDriveConfig(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 
+class GrievanceDailyStat(Base):
+    """Grievance count per creation day, current status and department."""
+
+    __tablename__ = "grievance_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(GrievanceStatus), primary_key=True)
+    assigned_to = Column(Enum(Department), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
 @event.listens_for(SessionFactory, "after_flush")
 def _update_timestamp(session, flush_context):
     for instance in session.dirty:
@@ -167,11 +400,121 @@ def _update_timestamp(session, flush_context):
             instance.updated_at = datetime.utcnow()
 
 
+StatKey = Tuple[date, GrievanceStatus, Department]
+
+
+def stat_key(created_at: Any, status: GrievanceStatus, assigned_to: Department) -> StatKey:
+    day = created_at.date() if isinstance(created_at, datetime) else created_at
+    if isinstance(day, str):  # SQLite's date() returns text
+        day = date.fromisoformat(day)
+    return day, status or GrievanceStatus.NEW, assigned_to or Department.OTHERS
+
+
+def queue_stat_deltas(session, deltas: Dict[StatKey, int]) -> None:
+    """Add rollup changes to ``session``; they are applied once it commits."""
+    pending = session.info.setdefault("stat_deltas", Counter())
+    pending.update(deltas)
+
+
+def _history_value(history, current):
+    return history.deleted[0] if history.deleted else current
+
+
+@event.listens_for(SessionFactory, "after_flush")
+def _collect_stat_deltas(session, flush_context):
+    # Status and department changes of ORM-managed grievances; bulk Core
+    # statements call queue_stat_deltas themselves.
+    deltas: Counter = Counter()
+    for instance in session.new:
+        if isinstance(instance, Grievance):
+            deltas[stat_key(instance.created_at, instance.status, instance.assigned_to)] += 1
+    for instance in session.dirty:
+        if not isinstance(instance, Grievance):
+            continue
+        attrs = inspect(instance).attrs
+        status_history = attrs.status.history
+        department_history = attrs.assigned_to.history
+        if not (status_history.has_changes() or department_history.has_changes()):
+            continue
+        old_status = _history_value(status_history, instance.status)
+        old_department = _history_value(department_history, instance.assigned_to)
+        deltas[stat_key(instance.created_at, old_status, old_department)] -= 1
+        deltas[stat_key(instance.created_at, instance.status, instance.assigned_to)] += 1
+    for instance in session.deleted:
+        if isinstance(instance, Grievance):
+            deltas[stat_key(instance.created_at, instance.status, instance.assigned_to)] -= 1
+    if deltas:
+        queue_stat_deltas(session, deltas)
+
+
+@event.listens_for(SessionFactory, "after_commit")
+def _apply_queued_stat_deltas(session):
+    deltas = session.info.pop("stat_deltas", None)
+    if not deltas:
+        return
+    # Applied in a short transaction of its own so the hot counter rows are
+    # not locked while a request is still talking to S3 or OpenAI. A failure
+    # here only leaves drift for the next reconcile.
+    try:
+        apply_stat_deltas(deltas)
+    except Exception as exc:
+        logger.warning("Grievance stats update failed, reconcile will correct it: %s", exc)
+
+
+@event.listens_for(SessionFactory, "after_rollback")
+def _discard_stat_deltas(session):
+    session.info.pop("stat_deltas", None)
+
+
+def on_commit(session, callback: Callable[[], None]) -> None:
+    """
+    Run ``callback`` once ``session``'s transaction commits, and never if it
+    rolls back. For in-process state that must only reflect committed rows.
+    """
+    session.info.setdefault("commit_callbacks", []).append(callback)
+
+
+@event.listens_for(SessionFactory, "after_commit")
+def _run_commit_callbacks(session):
+    for callback in session.info.pop("commit_callbacks", ()):
+        try:
+            callback()
+        except Exception as exc:
+            logger.warning("Post-commit callback %r failed: %s", callback, exc)
+
+
+@event.listens_for(SessionFactory, "after_rollback")
+def _discard_commit_callbacks(session):
+    session.info.pop("commit_callbacks", None)
+
+
 @contextmanager
-def session_scope() -> Generator:
+def session_scope(readonly: bool = False) -> Generator:
+    """
+    Session committed on success and rolled back on error. ``readonly=True``
+    sessions go to the read replica when one is configured, its lag is within
+    ``REPLICA_MAX_LAG_SECONDS`` and the context is not pinned to the primary
+    (see :func:`set_primary_reads`); they are never committed and must not
+    add or change objects.
+    """
+    if readonly:
+        use_replica = (
+            _REPLICA_MONITOR is not None and not _PRIMARY_READS.get() and _REPLICA_MONITOR.usable()
+        )
+        session = ReadSessionFactory() if use_replica else SessionFactory()
+        try:
+            yield session
+            if session.new or session.dirty or session.deleted:
+                raise RuntimeError("session_scope(readonly=True) cannot write")
+        finally:
+            session.close()
+        return
     session = SessionLocal()
     try:
         yield session
+        # Flush first so an over-budget request fails before its writes commit.
+        session.flush()
+        check_query_budget()
         session.commit()
     except Exception:
         session.rollback()
@@ -213,9 +556,118 @@ def upsert_gdrive_config(session, folder_id: str, start_page_token: Optional[str
     else:
         config = GDriveConfig(folder_id=folder_id, start_page_token=start_page_token)
         session.add(config)
+    # Drop it now and again once committed, so a concurrent read between the
+    # two cannot leave the old row cached.
+    REFERENCE_CACHE.invalidate_gdrive_config()
+    on_commit(session, REFERENCE_CACHE.invalidate_gdrive_config)
     return config
 
 
+REFERENCE_CACHE_TTL_SECONDS = 300.0
+
+
+@dataclass(frozen=True)
+class AccountRef:
+    """Detached snapshot of a student or admin row."""
+
+    id: int
+    name: str
+    email: str
+
+
+@dataclass(frozen=True)
+class GDriveConfigRef:
+    """Detached snapshot of the Google Drive configuration row."""
+
+    folder_id: str
+    start_page_token: Optional[str]
+
+
+class ReferenceCache:
+    """
+    Process-level cache of rows that almost never change: the default
+    student and admin and the Google Drive configuration. Entries are frozen
+    snapshots, so they are safe to share across sessions and threads.
+
+    A miss is looked up through the caller's session. A default account the
+    miss had to create is not cached until a later lookup finds it committed.
+    ``upsert_gdrive_config`` invalidates the Drive entry in this process;
+    other processes see the change within ``ttl_seconds``.
+    """
+
+    def __init__(self, ttl_seconds: float = REFERENCE_CACHE_TTL_SECONDS):
+        self.ttl = float(ttl_seconds)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+
+    def _get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return False, None
+        return True, entry[1]
+
+    def _put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def _account(self, key: str, session, model, email: str, get_or_create) -> AccountRef:
+        hit, ref = self._get(key)
+        if hit:
+            return ref
+        row = session.query(model).filter(model.email == email).first()
+        existed = row is not None
+        if not existed:
+            row = get_or_create(session)
+        ref = AccountRef(id=row.id, name=row.name, email=row.email)
+        if existed:
+            self._put(key, ref)
+        return ref
+
+    def default_student(self, session) -> AccountRef:
+        return self._account(
+            "default_student", session, Student, DEFAULT_STUDENT_EMAIL, get_or_create_default_student
+        )
+
+    def default_admin(self, session) -> AccountRef:
+        return self._account("default_admin", session, Admin, DEFAULT_ADMIN_EMAIL, get_or_create_default_admin)
+
+    def gdrive_config(self, session) -> Optional[GDriveConfigRef]:
+        hit, ref = self._get("gdrive_config")
+        if hit:
+            return ref
+        config = get_gdrive_config(session)
+        ref = GDriveConfigRef(config.folder_id, config.start_page_token) if config else None
+        self._put("gdrive_config", ref)
+        return ref
+
+    def invalidate_gdrive_config(self) -> None:
+        with self._lock:
+            self._entries.pop("gdrive_config", None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+REFERENCE_CACHE = ReferenceCache()
+
+
+def default_student_ref(session) -> AccountRef:
+    """The default student, from the reference cache."""
+    return REFERENCE_CACHE.default_student(session)
+
+
+def default_admin_ref(session) -> AccountRef:
+    """The default admin, from the reference cache."""
+    return REFERENCE_CACHE.default_admin(session)
+
+
+def gdrive_config_ref(session) -> Optional[GDriveConfigRef]:
+    """The Google Drive configuration, from the reference cache; None when none is registered."""
+    return REFERENCE_CACHE.gdrive_config(session)
+
+
 def seed_default_entities() -> None:
     with session_scope() as session:
         get_or_create_default_student(session)
@@ -224,10 +676,20 @@ def seed_default_entities() -> None:
 
 def init_db(drop_existing: bool = False) -> None:
     if drop_existing:
+        if not IS_POSTGRES:
+            with engine.begin() as connection:
+                connection.execute(text("DROP TABLE IF EXISTS grievances_fts"))
+                connection.execute(text("DROP TABLE IF EXISTS grievance_tags"))
         Base.metadata.drop_all(bind=engine)
+        REFERENCE_CACHE.clear()
     Base.metadata.create_all(bind=engine)
     _ensure_cluster_tags_column()
+    _ensure_duplicate_of_column()
+    _ensure_tags_source_column()
+    _ensure_search_index()
+    _ensure_tag_index()
     seed_default_entities()
+    _ensure_stats_rollup()
 
 
 def _ensure_cluster_tags_column() -> None:
@@ -253,5 +715,500 @@ def _ensure_cluster_tags_column() -> None:
             )
 
 
+def _ensure_duplicate_of_column() -> None:
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns("grievances")}
+    if "duplicate_of_id" in columns:
+        return
+
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "ALTER TABLE grievances ADD COLUMN duplicate_of_id INTEGER "
+                "REFERENCES grievances(id)"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_grievances_duplicate_of_id "
+                "ON grievances (duplicate_of_id)"
+            )
+        )
+
+
+def _ensure_tags_source_column() -> None:
+    # The archive copies every hot column, so both tables need it.
+    for table in ("grievances", "grievances_archive"):
+        columns = {column["name"] for column in inspect(engine).get_columns(table)}
+        if "tags_source" in columns:
+            continue
+        with engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN tags_source VARCHAR(16)"))
+
+
+def _ensure_search_index() -> None:
+    """Create the full-text index backing grievance search.
+
+    Postgres gets a generated, weighted tsvector column with a GIN index; other
+    engines (SQLite) get an external-content FTS5 table kept in sync by triggers.
+    """
+    with engine.begin() as connection:
+        if IS_POSTGRES:
+            connection.execute(
+                text(
+                    "ALTER TABLE grievances ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                    "GENERATED ALWAYS AS ("
+                    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+                    ") STORED"
+                )
+            )
+            connection.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_grievances_search_vector "
+                    "ON grievances USING GIN (search_vector)"
+                )
+            )
+            return
+
+        exists = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'grievances_fts'")
+        ).first()
+        if not exists:
+            connection.execute(
+                text(
+                    "CREATE VIRTUAL TABLE grievances_fts USING fts5("
+                    "title, description, content='grievances', content_rowid='id')"
+                )
+            )
+            connection.execute(text("INSERT INTO grievances_fts(grievances_fts) VALUES ('rebuild')"))
+        connection.execute(
+            text(
+                "CREATE TRIGGER IF NOT EXISTS grievances_fts_ai AFTER INSERT ON grievances BEGIN "
+                "INSERT INTO grievances_fts(rowid, title, description) "
+                "VALUES (new.id, new.title, new.description); END"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE TRIGGER IF NOT EXISTS grievances_fts_ad AFTER DELETE ON grievances BEGIN "
+                "INSERT INTO grievances_fts(grievances_fts, rowid, title, description) "
+                "VALUES ('delete', old.id, old.title, old.description); END"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE TRIGGER IF NOT EXISTS grievances_fts_au "
+                "AFTER UPDATE OF title, description ON grievances BEGIN "
+                "INSERT INTO grievances_fts(grievances_fts, rowid, title, description) "
+                "VALUES ('delete', old.id, old.title, old.description); "
+                "INSERT INTO grievances_fts(rowid, title, description) "
+                "VALUES (new.id, new.title, new.description); END"
+            )
+        )
+
+
+TAG_KINDS = ("issue", "cluster")
+_TAG_COLUMNS = {"issue": "tags", "cluster": "cluster_tags"}
+
+# SQLite only: one row per (kind, tag, grievance), kept in sync by triggers.
+grievance_tags = table("grievance_tags", column("grievance_id"), column("kind"), column("tag"))
+
+
+def _tag_rows_sql(kind: str, source: str, tables: str = "") -> str:
+    # Expand the JSON list column of ``source`` (a trigger's ``new`` row, or
+    # an alias listed in ``tables``) into (grievance_id, kind, tag) rows.
+    value = f"{source}.{_TAG_COLUMNS[kind]}"
+    return (
+        f"SELECT DISTINCT {source}.id, '{kind}', tag.value "
+        f"FROM {tables}json_each(CASE WHEN json_valid({value}) THEN {value} ELSE '[]' END) AS tag "
+        "WHERE tag.type = 'text'"
+    )
+
+
+def _ensure_tag_index() -> None:
+    """Index grievance tags for filtering and facets.
+
+    Postgres gets GIN indexes on the array columns. SQLite stores them as JSON
+    text, so tags are mirrored into a ``grievance_tags`` table by triggers,
+    which keeps it in step with every write path, including bulk statements.
+    """
+    with engine.begin() as connection:
+        if IS_POSTGRES:
+            for kind, name in _TAG_COLUMNS.items():
+                connection.execute(
+                    text(f"CREATE INDEX IF NOT EXISTS ix_grievances_{name} ON grievances USING GIN ({name})")
+                )
+            return
+
+        exists = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'grievance_tags'")
+        ).first()
+        if not exists:
+            connection.execute(
+                text(
+                    "CREATE TABLE grievance_tags ("
+                    "kind TEXT NOT NULL, tag TEXT NOT NULL, "
+                    "grievance_id INTEGER NOT NULL REFERENCES grievances(id), "
+                    "PRIMARY KEY (kind, tag, grievance_id)) WITHOUT ROWID"
+                )
+            )
+            connection.execute(
+                text("CREATE INDEX ix_grievance_tags_grievance_id ON grievance_tags (grievance_id)")
+            )
+            for kind in TAG_KINDS:
+                connection.execute(
+                    text(
+                        "INSERT OR IGNORE INTO grievance_tags (grievance_id, kind, tag) "
+                        + _tag_rows_sql(kind, "g", tables="grievances AS g, ")
+                    )
+                )
+        connection.execute(
+            text(
+                "CREATE TRIGGER IF NOT EXISTS grievance_tags_ai AFTER INSERT ON grievances BEGIN "
+                + "".join(
+                    f"INSERT OR IGNORE INTO grievance_tags (grievance_id, kind, tag) {_tag_rows_sql(kind, 'new')}; "
+                    for kind in TAG_KINDS
+                )
+                + "END"
+            )
+        )
+        for kind, name in _TAG_COLUMNS.items():
+            connection.execute(
+                text(
+                    f"CREATE TRIGGER IF NOT EXISTS grievance_tags_au_{kind} "
+                    f"AFTER UPDATE OF {name} ON grievances BEGIN "
+                    f"DELETE FROM grievance_tags WHERE grievance_id = old.id AND kind = '{kind}'; "
+                    f"INSERT OR IGNORE INTO grievance_tags (grievance_id, kind, tag) {_tag_rows_sql(kind, 'new')}; "
+                    "END"
+                )
+            )
+        connection.execute(
+            text(
+                "CREATE TRIGGER IF NOT EXISTS grievance_tags_ad AFTER DELETE ON grievances BEGIN "
+                "DELETE FROM grievance_tags WHERE grievance_id = old.id; END"
+            )
+        )
+
+
+def _tag_column(kind: str, model=None):
+    return getattr(model or Grievance, _TAG_COLUMNS[kind])
+
+
+def tags_filter(kind: str, tags: Iterable[str], model=None):
+    """
+    Criterion matching grievances that carry every tag in ``tags`` (``kind``:
+    issue or cluster). ``model`` is ``Grievance`` (default) or ``ArchivedGrievance``.
+    """
+    tags = list(dict.fromkeys(tags))
+    if IS_POSTGRES:
+        return _tag_column(kind, model).contains(tags)
+    if model is ArchivedGrievance:
+        # Archived rows are not mirrored into grievance_tags; read the JSON directly.
+        criteria = []
+        for tag in tags:
+            values = func.json_each(_tag_column(kind, model)).table_valued("value")
+            criteria.append(select(values.c.value).where(values.c.value == tag).exists())
+        return and_(*criteria)
+    matching = (
+        select(grievance_tags.c.grievance_id)
+        .where(grievance_tags.c.kind == kind, grievance_tags.c.tag.in_(tags))
+        .group_by(grievance_tags.c.grievance_id)
+        .having(func.count() == len(tags))
+    )
+    return Grievance.id.in_(matching)
+
+
+def tag_facets(session, kind: str, criteria: Iterable[Any] = (), limit: int = 50) -> List[Tuple[str, int]]:
+    """``(tag, grievance_count)`` for grievances matching ``criteria``, most used first."""
+    criteria = list(criteria)
+    if IS_POSTGRES:
+        expanded = (
+            select(Grievance.id.label("grievance_id"), func.unnest(_tag_column(kind)).label("tag"))
+            .where(*criteria)
+            .subquery()
+        )
+        tag = expanded.c.tag
+        count = func.count(func.distinct(expanded.c.grievance_id))
+        statement = select(tag, count)
+    else:
+        tag = grievance_tags.c.tag
+        count = func.count()
+        statement = select(tag, count).where(grievance_tags.c.kind == kind)
+        if criteria:
+            statement = statement.where(
+                grievance_tags.c.grievance_id.in_(select(Grievance.id).where(*criteria))
+            )
+    statement = statement.group_by(tag).order_by(count.desc(), tag).limit(limit)
+    return [(row[0], int(row[1])) for row in session.execute(statement)]
+
+
+def _fts5_match_expression(query: str) -> str:
+    # Quote every term so user input can never be parsed as FTS5 syntax.
+    terms = re.findall(r"\w+", query)
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def search_grievances(
+    session,
+    query: str,
+    status: Optional[GrievanceStatus] = None,
+    assigned_to: Optional[Department] = None,
+    limit: int = 20,
+    after: Optional[Tuple[float, int]] = None,
+) -> List[Tuple[Grievance, float]]:
+    """Rank grievances against ``query`` using the engine's full-text index.
+
+    Results are ordered by descending rank then id; ``after`` is the
+    ``(rank, id)`` of the last row of the previous page (keyset pagination).
+    """
+    params = {"limit": limit}
+    filters = []
+    if status:
+        filters.append("status = :status")
+        params["status"] = status.name
+    if assigned_to:
+        filters.append("assigned_to = :assigned_to")
+        params["assigned_to"] = assigned_to.name
+
+    if IS_POSTGRES:
+        params["query"] = query
+        matched = (
+            "SELECT g.id, g.status, g.assigned_to, ts_rank_cd(g.search_vector, q) AS rank "
+            "FROM grievances g, websearch_to_tsquery('english', :query) q "
+            "WHERE g.search_vector @@ q"
+        )
+    else:
+        match = _fts5_match_expression(query)
+        if not match:
+            return []
+        params["query"] = match
+        # bm25() is lower-is-better; negate it so both engines rank descending.
+        matched = (
+            "SELECT g.id, g.status, g.assigned_to, "
+            "-bm25(grievances_fts, 10.0, 5.0) AS rank "
+            "FROM grievances_fts JOIN grievances g ON g.id = grievances_fts.rowid "
+            "WHERE grievances_fts MATCH :query"
+        )
+
+    if after is not None:
+        filters.append("(rank < :after_rank OR (rank = :after_rank AND id < :after_id))")
+        params["after_rank"], params["after_id"] = after
+
+    where = f"WHERE {' AND '.join(filters)} " if filters else ""
+    statement = text(
+        f"SELECT id, rank FROM ({matched}) AS matched {where}"
+        "ORDER BY rank DESC, id DESC LIMIT :limit"
+    )
+    ranked = [(row.id, float(row.rank)) for row in session.execute(statement, params)]
+    if not ranked:
+        return []
+
+    grievances = {
+        grievance.id: grievance
+        for grievance in session.query(Grievance).filter(
+            Grievance.id.in_([grievance_id for grievance_id, _ in ranked])
+        )
+    }
+    return [
+        (grievances[grievance_id], rank)
+        for grievance_id, rank in ranked
+        if grievance_id in grievances
+    ]
+
+
 def get_grievance(session, grievance_id: int) -> Optional[Grievance]:
     return session.query(Grievance).filter(Grievance.id == grievance_id).first()
+
+
+ARCHIVE_STATUSES = (GrievanceStatus.SOLVED, GrievanceStatus.DROPPED)
+
+
+def get_archived_grievance(session, grievance_id: int) -> Optional[ArchivedGrievance]:
+    return session.query(ArchivedGrievance).filter(ArchivedGrievance.id == grievance_id).first()
+
+
+def archive_closed_grievances(cutoff: datetime, limit: int) -> List[int]:
+    """
+    Move up to ``limit`` SOLVED/DROPPED grievances last updated before
+    ``cutoff`` into ``grievances_archive``; returns the ids moved.
+
+    Copy and delete share one transaction. Rows that a grievance staying in
+    the hot table still points at through ``duplicate_of_id`` are left alone.
+    The delete fires the SQLite search and tag index triggers, and bypasses
+    the ORM so the stats rollup keeps counting archived rows.
+    """
+    hot = Grievance.__table__
+    archive = ArchivedGrievance.__table__
+    columns = [column.name for column in hot.columns]
+    with engine.begin() as connection:
+        ids = (
+            connection.execute(
+                select(hot.c.id)
+                .where(hot.c.status.in_(ARCHIVE_STATUSES), hot.c.updated_at < cutoff)
+                .order_by(hot.c.id)
+                .limit(limit)
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            return []
+        referenced = set(
+            connection.execute(
+                select(hot.c.duplicate_of_id).where(hot.c.duplicate_of_id.in_(ids), hot.c.id.notin_(ids))
+            ).scalars()
+        )
+        ids = [grievance_id for grievance_id in ids if grievance_id not in referenced]
+        if not ids:
+            return []
+        connection.execute(
+            archive.insert().from_select(columns, select(*(hot.c[name] for name in columns)).where(hot.c.id.in_(ids)))
+        )
+        connection.execute(hot.delete().where(hot.c.id.in_(ids)))
+    return ids
+
+
+def grievances_pending_document_archive(limit: int) -> List[int]:
+    """Archived grievances whose MongoDB documents are still in the hot collections."""
+    with session_scope() as session:
+        return (
+            session.execute(
+                select(ArchivedGrievance.id)
+                .where(ArchivedGrievance.documents_archived.is_(False))
+                .order_by(ArchivedGrievance.id)
+                .limit(limit)
+            )
+            .scalars()
+            .all()
+        )
+
+
+def mark_documents_archived(grievance_ids: Iterable[int]) -> None:
+    grievance_ids = list(grievance_ids)
+    if not grievance_ids:
+        return
+    with engine.begin() as connection:
+        connection.execute(
+            ArchivedGrievance.__table__.update()
+            .where(ArchivedGrievance.id.in_(grievance_ids))
+            .values(documents_archived=True)
+        )
+
+
+def apply_stat_deltas(deltas: Dict[StatKey, int]) -> None:
+    """Add ``deltas`` to the daily stats rollup with one upsert per key."""
+    rows = [
+        {"day": day, "status": status, "assigned_to": department, "count": delta}
+        for (day, status, department), delta in sorted(
+            deltas.items(), key=lambda item: (item[0][0], item[0][1].name, item[0][2].name)
+        )
+        if delta
+    ]
+    if not rows:
+        return
+    table = GrievanceDailyStat.__table__
+    statement = upsert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.status, table.c.assigned_to],
+        set_={"count": table.c.count + statement.excluded.count},
+    )
+    # Sorted keys give concurrent writers the same lock order.
+    with engine.begin() as connection:
+        connection.execute(statement, rows)
+
+
+def stat_deltas_for_update(session, criteria: Iterable[Any], changes: Dict[str, Any]) -> Dict[StatKey, int]:
+    """
+    Rollup changes for an ``UPDATE grievances ... WHERE criteria`` setting
+    ``changes``, from one grouped query over the rows it will touch.
+    """
+    if "status" not in changes and "assigned_to" not in changes:
+        return {}
+    groups = session.execute(
+        select(
+            func.date(Grievance.created_at),
+            Grievance.status,
+            Grievance.assigned_to,
+            func.count(),
+        )
+        .where(*criteria)
+        .group_by(func.date(Grievance.created_at), Grievance.status, Grievance.assigned_to)
+    )
+    deltas: Counter = Counter()
+    for day, status, department, count in groups:
+        deltas[stat_key(day, status, department)] -= count
+        deltas[
+            stat_key(day, changes.get("status", status), changes.get("assigned_to", department))
+        ] += count
+    return deltas
+
+
+def reconcile_grievance_stats() -> Dict[str, int]:
+    """
+    Rebuild the daily stats rollup from the grievances and archive tables.
+    Returns the number of groups and how many of them had drifted.
+    """
+    table = GrievanceDailyStat.__table__
+    with engine.begin() as connection:
+        if IS_POSTGRES:
+            # Hold off incremental updates until the rebuilt rows are committed.
+            connection.execute(text("LOCK TABLE grievance_daily_stats IN SHARE ROW EXCLUSIVE MODE"))
+        # Archived grievances stay in the dashboard totals.
+        rows = union_all(
+            *(
+                select(model.created_at, model.status, model.assigned_to)
+                for model in (Grievance, ArchivedGrievance)
+            )
+        ).subquery()
+        created_day = func.date(rows.c.created_at)
+        actual = Counter()
+        for day, status, department, count in connection.execute(
+            select(created_day, rows.c.status, rows.c.assigned_to, func.count()).group_by(
+                created_day, rows.c.status, rows.c.assigned_to
+            )
+        ):
+            actual[stat_key(day, status, department)] = count
+        stored = {
+            (row.day, row.status, row.assigned_to): row.count
+            for row in connection.execute(select(table)).all()
+            if row.count
+        }
+        drifted = sum(1 for key in set(actual) | set(stored) if actual.get(key, 0) != stored.get(key, 0))
+        if drifted:
+            connection.execute(delete(table))
+        if drifted and actual:
+            connection.execute(
+                table.insert(),
+                [
+                    {"day": day, "status": status, "assigned_to": department, "count": count}
+                    for (day, status, department), count in actual.items()
+                ],
+            )
+    if drifted:
+        logger.warning("Grievance stats reconcile corrected %d drifted groups", drifted)
+    return {"groups": len(actual), "drifted": drifted}
+
+
+def _ensure_stats_rollup() -> None:
+    with engine.connect() as connection:
+        has_stats = connection.execute(select(GrievanceDailyStat.day).limit(1)).first()
+        has_grievances = connection.execute(select(Grievance.id).limit(1)).first() or connection.execute(
+            select(ArchivedGrievance.id).limit(1)
+        ).first()
+    if has_grievances and not has_stats:
+        reconcile_grievance_stats()
+
+
+def grievance_stats(
+    session,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> List[GrievanceDailyStat]:
+    """Rollup rows between ``since`` and ``until`` (inclusive), oldest first."""
+    query = session.query(GrievanceDailyStat).filter(GrievanceDailyStat.count != 0)
+    if since is not None:
+        query = query.filter(GrievanceDailyStat.day >= since)
+    if until is not None:
+        query = query.filter(GrievanceDailyStat.day <= until)
+    return query.order_by(GrievanceDailyStat.day).all()
@@ -0,0 +1,544 @@
+import functools
+import inspect
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from tracing import span
+
+logger = logging.getLogger("grievance.metrics")
+
+SQL_QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class _ShardedValues:
+    """
+    Fixed-size array of numbers updated without locks: every thread writes to
+    its own shard and shards are only summed when metrics are scraped. Shards of
+    threads that have exited are folded into a single retired array so
+    thread-per-request servers do not grow memory without bound.
+    """
+
+    __slots__ = ("_size", "_local", "_shards", "_retired", "_lock")
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, List[float]]] = []
+        self._retired: List[float] = [0] * size
+        self._lock = threading.Lock()
+
+    def shard(self) -> List[float]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values: List[float] = [0] * self._size
+            with self._lock:
+                self._shards.append((threading.current_thread(), values))
+            self._local.values = values
+            return values
+
+    def snapshot(self) -> List[float]:
+        with self._lock:
+            live = []
+            for thread, values in self._shards:
+                if thread.is_alive():
+                    live.append((thread, values))
+                else:
+                    for index, value in enumerate(values):
+                        self._retired[index] += value
+            self._shards = live
+            totals = list(self._retired)
+            for _, values in live:
+                for index, value in enumerate(values):
+                    totals[index] += value
+            return totals
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], _ShardedValues] = {}
+        self._lock = threading.Lock()
+
+    def _values_for(self, labels: Tuple[str, ...], size: int) -> _ShardedValues:
+        series = self._series.get(labels)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(labels, _ShardedValues(size))
+        return series
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, series in sorted(self._series.items()):
+            lines.extend(self._render_series(labels, series.snapshot()))
+        return lines
+
+    def _render_series(self, labels: Tuple[str, ...], values: List[float]) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self._values_for(labels, 1).shard()[0] += amount
+
+    def _render_series(self, labels, values):
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(values[0])}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # One slot per finite bucket, one for +Inf and a trailing running sum.
+        self._size = len(self.buckets) + 2
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        values = self._values_for(labels, self._size).shard()
+        values[bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    def _render_series(self, labels, values):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+            cumulative += count
+            le = 'le="{}"'.format(_format_number(bound))
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {_format_number(cumulative)}")
+        rendered = _format_labels(self.labelnames, labels)
+        lines.append(f"{self.name}_sum{rendered} {_format_number(values[-1])}")
+        lines.append(f"{self.name}_count{rendered} {_format_number(cumulative)}")
+        return lines
+
+
+class Gauge:
+    """Last-value gauge; either set directly or computed by a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        self._values[labels] = value
+
+    def render(self) -> List[str]:
+        values = dict(self._values)
+        if self.callback is not None:
+            try:
+                values.update(self.callback())
+            except Exception:
+                pass
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[object] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Flask request latency by route template, method and status.",
+        ("route", "method", "status"),
+    )
+)
+DEPENDENCY_CALL_DURATION = REGISTRY.register(
+    Histogram(
+        "dependency_call_duration_seconds",
+        "Latency of calls to external dependencies (sql, mongo, openai, s3, gdrive).",
+        ("dependency", "operation", "outcome"),
+    )
+)
+HTTP_REQUEST_SQL_QUERIES = REGISTRY.register(
+    Histogram(
+        "http_request_sql_queries",
+        "SQL statements issued per request, by route template and method.",
+        ("route", "method"),
+        buckets=SQL_QUERY_COUNT_BUCKETS,
+    )
+)
+HTTP_REQUEST_SQL_DURATION = REGISTRY.register(
+    Histogram(
+        "http_request_sql_duration_seconds",
+        "Total time spent in SQL statements per request, by route template and method.",
+        ("route", "method"),
+    )
+)
+SQL_QUERY_BUDGET_EXCEEDED = REGISTRY.register(
+    Counter(
+        "sql_query_budget_exceeded_total",
+        "Requests that issued more SQL statements than their endpoint's query budget.",
+        ("endpoint",),
+    )
+)
+ADMISSION_DECISIONS = REGISTRY.register(
+    Counter(
+        "openai_admission_decisions_total",
+        "OpenAI admission outcomes (admitted, rejected, tenant_rejected) by priority class.",
+        ("priority", "outcome"),
+    )
+)
+ADMISSION_WAIT = REGISTRY.register(
+    Histogram(
+        "openai_admission_wait_seconds",
+        "Time admitted OpenAI calls spent queued for a rate-limit token.",
+        ("priority",),
+    )
+)
+CIRCUIT_BREAKER_STATE = REGISTRY.register(
+    Gauge(
+        "circuit_breaker_state",
+        "Circuit breaker state per dependency (0 closed, 1 half-open, 2 open).",
+        ("dependency",),
+    )
+)
+CLUSTERING_DURATION = REGISTRY.register(
+    Gauge(
+        "clustering_last_duration_seconds",
+        "Wall-clock duration of the most recent clustering run.",
+    )
+)
+INGESTION_BACKLOG = REGISTRY.register(
+    Gauge(
+        "kb_ingestion_backlog_files",
+        "Drive files discovered by the current knowledge-base sync that are not yet ingested.",
+    )
+)
+
+
+@contextmanager
+def track(dependency: str, operation: str) -> Iterator[None]:
+    """Time a block as one call to an external dependency and trace it as a span."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        with span(f"{dependency}.{operation}"):
+            yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        DEPENDENCY_CALL_DURATION.observe(
+            (dependency, operation, outcome), time.perf_counter() - start
+        )
+
+
+def timed(dependency: str, operation: str):
+    """Decorator form of :func:`track`."""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track(dependency, operation):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(dependency, operation):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised before a commit when the request is already over its enforced query budget."""
+
+    def __init__(self, endpoint: Optional[str], statements: int, budget: int):
+        super().__init__(f"{endpoint} issued {statements} SQL statements (budget {budget})")
+        self.endpoint = endpoint
+        self.statements = statements
+        self.budget = budget
+
+
+class QueryCount:
+    """
+    SQL statements issued, and the time spent in them, on behalf of one
+    request. ``budget`` is set when the request's query budget is enforced.
+    """
+
+    __slots__ = ("statements", "seconds", "endpoint", "budget", "_lock")
+
+    def __init__(self, endpoint: Optional[str] = None, budget: Optional[int] = None):
+        self.statements = 0
+        self.seconds = 0.0
+        self.endpoint = endpoint
+        self.budget = budget
+        # Requests can fan work out to pool threads that share this context.
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.statements += 1
+            self.seconds += seconds
+
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_QUERY_COUNT: ContextVar[Optional[QueryCount]] = ContextVar("grievance_query_count", default=None)
+
+
+def check_query_budget() -> None:
+    """
+    Raise :class:`QueryBudgetExceeded` when the current request is over an
+    enforced query budget. ``session_scope`` calls this before committing,
+    so an over-budget write fails without leaving its rows behind.
+    """
+    count = _QUERY_COUNT.get()
+    if count is not None and count.budget is not None and count.statements > count.budget:
+        raise QueryBudgetExceeded(count.endpoint, count.statements, count.budget)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCount]:
+    """Count the SQL statements executed in this context while the block runs."""
+    count = QueryCount()
+    token = _QUERY_COUNT.set(count)
+    try:
+        yield count
+    finally:
+        _QUERY_COUNT.reset(token)
+
+
+_SQL_VERBS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "CREATE", "ALTER", "DROP"})
+
+
+def _statement_verb(statement: Optional[str]) -> str:
+    # Bounded label cardinality: anything unusual is reported as OTHER.
+    tokens = (statement or "").split(None, 1)
+    verb = tokens[0].upper() if tokens else ""
+    return verb if verb in _SQL_VERBS else "OTHER"
+
+
+def instrument_engine(
+    engine, dependency: str = "sql", pool_metric: str = "sqlalchemy_pool_connections"
+) -> None:
+    """Time every SQL statement and expose connection-pool gauges for ``engine``."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["metrics_query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("metrics_query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        DEPENDENCY_CALL_DURATION.observe((dependency, _statement_verb(statement), "ok"), elapsed)
+        count = _QUERY_COUNT.get()
+        if count is not None:
+            count.record(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        connection = context.connection
+        if connection is None:
+            return
+        start = connection.info.pop("metrics_query_start", None)
+        if start is not None:
+            elapsed = time.perf_counter() - start
+            DEPENDENCY_CALL_DURATION.observe((dependency, _statement_verb(context.statement), "error"), elapsed)
+            count = _QUERY_COUNT.get()
+            if count is not None:
+                count.record(elapsed)
+
+    def _pool_state() -> Dict[Tuple[str, ...], float]:
+        pool = engine.pool
+        state = {}
+        for name in ("size", "checkedout", "overflow", "checkedin"):
+            reader = getattr(pool, name, None)
+            if callable(reader):
+                state[(name,)] = reader()
+        return state
+
+    REGISTRY.register(
+        Gauge(
+            pool_metric,
+            "SQLAlchemy connection pool state.",
+            ("state",),
+            callback=_pool_state,
+        )
+    )
+
+
+def instrument_flask(
+    app,
+    query_budgets: Optional[Mapping[str, int]] = None,
+    enforce_budgets: bool = False,
+    server_timing: bool = False,
+) -> None:
+    """
+    Record per-route latency and SQL statement count/time for every request
+    handled by ``app``.
+
+    ``query_budgets`` maps endpoint names to the most statements a request
+    may issue before its response is returned; requests over budget are
+    logged and counted. With ``enforce_budgets`` they fail with a 500 so
+    benchmarks and tests catch them: writes at their commit (see
+    :func:`check_query_budget`), so nothing is stored for a request that
+    reports an error, and reads when the response is returned. A write
+    that only goes over budget after committing is logged and counted but
+    keeps its response. ``server_timing`` adds a
+    ``Server-Timing: db`` header with the count and time so far.
+    """
+    from flask import g, jsonify, request
+
+    query_budgets = dict(query_budgets or {})
+
+    @app.errorhandler(QueryBudgetExceeded)
+    def _query_budget_exceeded(exc):
+        return jsonify({"error": str(exc)}), 500
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_request_start = time.perf_counter()
+        budget = query_budgets.get(request.endpoint) if enforce_budgets else None
+        g.metrics_query_count = QueryCount(request.endpoint, budget)
+        g.metrics_query_token = _QUERY_COUNT.set(g.metrics_query_count)
+
+    @app.after_request
+    def _observe_request(response):
+        start = g.pop("metrics_request_start", None)
+        if start is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            HTTP_REQUEST_DURATION.observe(
+                (rule, request.method, str(response.status_code)),
+                time.perf_counter() - start,
+            )
+        count = g.get("metrics_query_count")
+        if count is None:
+            return response
+        budget = query_budgets.get(request.endpoint)
+        if budget is not None and count.statements > budget:
+            SQL_QUERY_BUDGET_EXCEEDED.inc((request.endpoint,))
+            logger.warning(
+                "SQL query budget exceeded: endpoint=%s statements=%d budget=%d sql_ms=%.1f",
+                request.endpoint,
+                count.statements,
+                budget,
+                count.seconds * 1000,
+            )
+            if enforce_budgets and request.method in SAFE_METHODS:
+                response = jsonify(
+                    {"error": f"{request.endpoint} issued {count.statements} SQL statements (budget {budget})"}
+                )
+                response.status_code = 500
+        if server_timing:
+            response.headers.add(
+                "Server-Timing", f'db;dur={count.seconds * 1000:.1f};desc="{count.statements} queries"'
+            )
+        return response
+
+    @app.teardown_request
+    def _observe_request_queries(exc):
+        # Runs after streamed bodies finish, so their statements are included.
+        count = g.pop("metrics_query_count", None)
+        token = g.pop("metrics_query_token", None)
+        if token is not None:
+            try:
+                _QUERY_COUNT.reset(token)
+            except ValueError:
+                # Streamed bodies can finish on another thread (asgi.py).
+                _QUERY_COUNT.set(None)
+        if count is None:
+            return
+        rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        HTTP_REQUEST_SQL_QUERIES.observe((rule, request.method), count.statements)
+        HTTP_REQUEST_SQL_DURATION.observe((rule, request.method), count.seconds)
+        logger.debug(
+            "%s %s: %d SQL statements in %.1f ms", request.method, rule, count.statements, count.seconds * 1000
+        )
+
+
+def render_latest() -> str:
+    return REGISTRY.render()
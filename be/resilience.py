@@ -0,0 +1,309 @@
+import asyncio
+import functools
+import inspect
+import logging
+import random
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from config import settings
+from metrics import CIRCUIT_BREAKER_STATE
+
+logger = logging.getLogger("grievance.resilience")
+
+DEPENDENCIES = ("mongo", "openai", "s3", "gdrive")
+_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose circuit breaker is open."""
+
+    def __init__(self, dependency: str, retry_after: float):
+        super().__init__(f"{dependency} is unavailable (circuit open)")
+        self.dependency = dependency
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. After ``failure_threshold`` dependency
+    failures in a row the circuit opens and calls fail immediately. Once
+    ``reset_seconds`` have passed, one probe call is let through (half-open):
+    success closes the circuit, failure opens it for another period.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_seconds = max(0.1, float(reset_seconds))
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._last_error: Optional[str] = None
+        CIRCUIT_BREAKER_STATE.set(0, (name,))
+
+    def _set_state_locked(self, state: str) -> None:
+        if state != self._state:
+            logger.warning("Circuit breaker %s: %s -> %s", self.name, self._state, state)
+        self._state = state
+        CIRCUIT_BREAKER_STATE.set(_STATE_VALUES[state], (self.name,))
+
+    def _open_remaining_locked(self) -> float:
+        return self.reset_seconds - (time.monotonic() - self._opened_at)
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected without a probe being due."""
+        with self._lock:
+            if self._state == "open":
+                return self._open_remaining_locked() > 0
+            return self._state == "half_open" and self._probing
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._state == "open":
+                remaining = self._open_remaining_locked()
+                if remaining > 0:
+                    raise CircuitOpenError(self.name, remaining)
+                self._set_state_locked("half_open")
+                self._probing = False
+            if self._state == "half_open":
+                if self._probing:
+                    raise CircuitOpenError(self.name, 1)
+                self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._set_state_locked("closed")
+
+    def release_probe(self) -> None:
+        """
+        End a call that says nothing about the dependency's health (a bad
+        request, a cancellation) without touching the failure count. A
+        half-open breaker lets the next call probe again.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self, exc: BaseException) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            self._last_error = f"{type(exc).__name__}: {exc}"
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state_locked("open")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self._state == "open":
+                retry_in = round(max(0.0, self._open_remaining_locked()), 2)
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "retry_in_seconds": retry_in,
+                "last_error": self._last_error,
+            }
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(dependency: str) -> CircuitBreaker:
+    breaker = _BREAKERS.get(dependency)
+    if breaker is None:
+        with _BREAKERS_LOCK:
+            breaker = _BREAKERS.setdefault(
+                dependency,
+                CircuitBreaker(
+                    dependency,
+                    failure_threshold=settings.resilience.breaker_failure_threshold,
+                    reset_seconds=settings.resilience.breaker_reset_seconds,
+                ),
+            )
+    return breaker
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    return {dependency: get_breaker(dependency).snapshot() for dependency in DEPENDENCIES}
+
+
+def ensure_available(dependency: str) -> None:
+    """Fail fast, without reserving the half-open probe, when ``dependency`` is open."""
+    breaker = get_breaker(dependency)
+    if breaker.is_open():
+        raise CircuitOpenError(dependency, breaker.snapshot()["retry_in_seconds"] or 1)
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for attribute in ("status_code", "status"):
+        value = getattr(exc, attribute, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None) or getattr(exc, "resp", None)
+    if isinstance(response, dict):  # botocore ClientError
+        return response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    value = getattr(response, "status", None) or getattr(response, "status_code", None)
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_dependency_failure(dependency: str, exc: BaseException) -> bool:
+    """
+    Whether ``exc`` means the dependency is unhealthy (network errors, timeouts,
+    5xx, throttling) rather than a bad request. Only these trip breakers and
+    are retried. Client libraries are looked up in ``sys.modules`` so this
+    never imports them.
+    """
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    if dependency == "mongo":
+        errors = sys.modules.get("pymongo.errors")
+        return errors is not None and isinstance(exc, (errors.ConnectionFailure, errors.ExecutionTimeout))
+    if dependency == "openai":
+        openai = sys.modules.get("openai")
+        if openai is None:
+            return False
+        if isinstance(exc, openai.APIConnectionError):
+            return True
+        return isinstance(exc, openai.APIStatusError) and (exc.status_code >= 500 or exc.status_code == 429)
+    if dependency == "s3":
+        botocore = sys.modules.get("botocore.exceptions")
+        if botocore is None:
+            return False
+        if isinstance(exc, (botocore.ConnectionError, botocore.HTTPClientError)):
+            return True
+        status = _status_code(exc) if isinstance(exc, botocore.ClientError) else None
+        return status is not None and (status >= 500 or status == 429)
+    if dependency == "gdrive":
+        httplib2 = sys.modules.get("httplib2")
+        if httplib2 is not None and isinstance(exc, httplib2.HttpLib2Error):
+            return True
+        errors = sys.modules.get("googleapiclient.errors")
+        if errors is not None and isinstance(exc, errors.HttpError):
+            status = _status_code(exc)
+            return status is not None and (status >= 500 or status == 429)
+    return False
+
+
+def is_client_error(dependency: str, exc: BaseException) -> bool:
+    """
+    Whether ``exc`` came from ``dependency``'s client library, whether or not
+    it counts as a dependency failure (an OpenAI 401 or a Mongo operation
+    error does not trip the breaker, but is still not the caller's fault).
+    """
+    if is_dependency_failure(dependency, exc):
+        return True
+    if dependency == "mongo":
+        errors = sys.modules.get("pymongo.errors")
+        return errors is not None and isinstance(exc, errors.PyMongoError)
+    if dependency == "openai":
+        openai = sys.modules.get("openai")
+        return openai is not None and isinstance(exc, openai.OpenAIError)
+    return False
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter: uniform over [0, min(max_delay, base * 2^(attempt-1))].
+    ceiling = min(
+        settings.resilience.retry_max_delay_seconds,
+        settings.resilience.retry_base_delay_seconds * (2 ** (attempt - 1)),
+    )
+    return random.uniform(0, ceiling)
+
+
+def _attempts(idempotent: bool) -> int:
+    return max(1, settings.resilience.retry_attempts) if idempotent else 1
+
+
+def call(dependency: str, func: Callable[..., Any], *args, idempotent: bool = False, **kwargs) -> Any:
+    """
+    Call ``func`` through ``dependency``'s circuit breaker. Idempotent calls are
+    retried on dependency failures with jittered exponential backoff.
+    """
+    breaker = get_breaker(dependency)
+    attempts = _attempts(idempotent)
+    for attempt in range(1, attempts + 1):
+        breaker.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            if not is_dependency_failure(dependency, exc):
+                breaker.release_probe()
+                raise
+            breaker.record_failure(exc)
+            if attempt >= attempts:
+                raise
+            delay = _backoff(attempt)
+            logger.info("%s call failed (%s), retry %d/%d in %.2fs", dependency, exc, attempt, attempts - 1, delay)
+            time.sleep(delay)
+        except BaseException:
+            # Cancelled or interrupted: free the half-open probe so the breaker
+            # cannot stay half-open with no probe in flight.
+            breaker.release_probe()
+            raise
+        else:
+            breaker.record_success()
+            return result
+
+
+async def call_async(
+    dependency: str, func: Callable[..., Any], *args, idempotent: bool = False, **kwargs
+) -> Any:
+    """asyncio version of :func:`call`; ``func`` returns an awaitable."""
+    breaker = get_breaker(dependency)
+    attempts = _attempts(idempotent)
+    for attempt in range(1, attempts + 1):
+        breaker.before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as exc:
+            if not is_dependency_failure(dependency, exc):
+                breaker.release_probe()
+                raise
+            breaker.record_failure(exc)
+            if attempt >= attempts:
+                raise
+            delay = _backoff(attempt)
+            logger.info("%s call failed (%s), retry %d/%d in %.2fs", dependency, exc, attempt, attempts - 1, delay)
+            await asyncio.sleep(delay)
+        except BaseException:
+            # Cancelled or interrupted: free the half-open probe so the breaker
+            # cannot stay half-open with no probe in flight.
+            breaker.release_probe()
+            raise
+        else:
+            breaker.record_success()
+            return result
+
+
+def guarded(dependency: str, idempotent: bool = False):
+    """Decorator form of :func:`call` / :func:`call_async`."""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await call_async(dependency, func, *args, idempotent=idempotent, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return call(dependency, func, *args, idempotent=idempotent, **kwargs)
+
+        return wrapper
+
+    return decorator
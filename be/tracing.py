@@ -0,0 +1,277 @@
+import functools
+import hmac
+import inspect
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import settings
+
+logger = logging.getLogger("grievance.tracing")
+
+MAX_SPANS_PER_TRACE = 500
+STATEMENT_PREVIEW_CHARS = 200
+# Propagated trace ids are only accepted in this shape (W3C trace ids are 32
+# hex chars); anything else is dropped rather than exported or echoed back.
+TRACE_ID_PATTERN = re.compile(r"[0-9a-f]{16,32}")
+
+
+class Trace:
+    __slots__ = ("trace_id", "name", "started_at", "spans", "dropped")
+
+    def __init__(self, trace_id: str, name: str):
+        self.trace_id = trace_id
+        self.name = name
+        self.started_at = time.time()
+        self.spans: List["Span"] = []
+        self.dropped = 0
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start", "duration", "attributes", "status")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def fail(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.attributes["error"] = f"{type(exc).__name__}: {exc}"[:STATEMENT_PREVIEW_CHARS]
+
+    def finish(self) -> None:
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self.start
+        # list.append is atomic, so spans finished on worker threads are safe.
+        if len(self.trace.spans) < MAX_SPANS_PER_TRACE:
+            self.trace.spans.append(self)
+        else:
+            self.trace.dropped += 1
+
+
+_CURRENT_SPAN: ContextVar[Optional[Span]] = ContextVar("grievance_current_span", default=None)
+
+
+class TraceExporter:
+    """Keeps the most recent finished traces in memory and optionally appends them to a JSONL file."""
+
+    def __init__(self, buffer_size: int, export_path: Optional[str] = None):
+        self._traces: deque = deque(maxlen=max(1, int(buffer_size)))
+        self._lock = threading.Lock()
+        self.export_path = export_path
+
+    def export(self, root: Span) -> None:
+        record = _serialize_trace(root)
+        with self._lock:
+            self._traces.append(record)
+            if not self.export_path:
+                return
+            try:
+                with open(self.export_path, "a", encoding="utf-8") as handle:
+                    handle.write(json.dumps(record, default=str) + "\n")
+            except OSError as exc:
+                logger.warning("Failed to write trace to %s: %s", self.export_path, exc)
+
+    def recent(self, limit: int = 50, min_duration_ms: float = 0.0) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self._traces)
+        selected = [trace for trace in reversed(traces) if trace["duration_ms"] >= min_duration_ms]
+        return selected[:limit]
+
+
+def _serialize_trace(root: Span) -> Dict[str, Any]:
+    trace = root.trace
+    spans = sorted(trace.spans, key=lambda item: item.start)
+    return {
+        "trace_id": trace.trace_id,
+        "name": trace.name,
+        "started_at": trace.started_at,
+        "duration_ms": round((root.duration or 0.0) * 1000, 3),
+        "status": root.status,
+        "dropped_spans": trace.dropped,
+        "spans": [
+            {
+                "span_id": item.span_id,
+                "parent_id": item.parent_id,
+                "name": item.name,
+                "offset_ms": round((item.start - root.start) * 1000, 3),
+                "duration_ms": round((item.duration or 0.0) * 1000, 3),
+                "status": item.status,
+                "attributes": item.attributes,
+            }
+            for item in spans
+        ],
+    }
+
+
+_EXPORTER: Optional[TraceExporter] = None
+
+
+def get_trace_exporter() -> TraceExporter:
+    global _EXPORTER
+    if _EXPORTER is None:
+        _EXPORTER = TraceExporter(settings.tracing.buffer_size, settings.tracing.export_path)
+    return _EXPORTER
+
+
+def begin_trace(name: str, trace_id: Optional[str] = None, force: bool = False):
+    """
+    Start a root span when the request is sampled. Returns ``(span, token)``
+    to hand to :func:`end_trace`, or None when the request is not traced.
+    """
+    if not force and random.random() >= settings.tracing.sample_rate:
+        return None
+    root = Span(Trace(trace_id or uuid.uuid4().hex, name), name, None, {})
+    return root, _CURRENT_SPAN.set(root)
+
+
+def end_trace(handle) -> None:
+    if handle is None:
+        return
+    root, token = handle
+    try:
+        _CURRENT_SPAN.reset(token)
+    except ValueError:
+        _CURRENT_SPAN.set(None)
+    root.finish()
+    get_trace_exporter().export(root)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Child span of the active span; a no-op when the current request is not traced."""
+    parent = _CURRENT_SPAN.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _CURRENT_SPAN.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.fail(exc)
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        child.finish()
+
+
+def traced(name: str):
+    """Decorator that wraps a function call (or coroutine) in a child span."""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _CURRENT_SPAN.get() is None:
+                    return await func(*args, **kwargs)
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _CURRENT_SPAN.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_engine(engine) -> None:
+    """Record a span for every SQL statement issued while a trace is active."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = _CURRENT_SPAN.get()
+        if parent is None:
+            return
+        conn.info["trace_span"] = Span(
+            parent.trace,
+            "sql",
+            parent.span_id,
+            {"statement": statement[:STATEMENT_PREVIEW_CHARS], "executemany": executemany},
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        active = conn.info.pop("trace_span", None)
+        if active is not None:
+            active.finish()
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        connection = context.connection
+        active = connection.info.pop("trace_span", None) if connection is not None else None
+        if active is not None:
+            active.fail(context.original_exception)
+            active.finish()
+
+
+def _propagated_trace_id(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip().lower()
+    return value if TRACE_ID_PATTERN.fullmatch(value) else None
+
+
+def _force_requested(value: Optional[str]) -> bool:
+    token = settings.tracing.force_token
+    if not token or not value:
+        return False
+    return hmac.compare_digest(value.encode(), token.encode())
+
+
+def instrument_flask(app) -> None:
+    """Open a sampled root span per request and export it when the request ends."""
+    from flask import g, request
+
+    @app.before_request
+    def _begin_request_trace():
+        # An incoming X-Trace-Id only names the trace if the request is
+        # sampled; forcing a trace takes the TRACING_FORCE_TOKEN secret.
+        rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        g.trace_handle = begin_trace(
+            f"{request.method} {rule}",
+            trace_id=_propagated_trace_id(request.headers.get("X-Trace-Id")),
+            force=_force_requested(request.headers.get("X-Trace-Force")),
+        )
+
+    @app.after_request
+    def _tag_response(response):
+        handle = g.get("trace_handle")
+        if handle is not None:
+            root = handle[0]
+            root.set_attribute("status_code", response.status_code)
+            if response.status_code >= 500:
+                root.status = "error"
+            response.headers["X-Trace-Id"] = root.trace.trace_id
+        return response
+
+    @app.teardown_request
+    def _end_request_trace(exc):
+        handle = g.pop("trace_handle", None)
+        if handle is not None and exc is not None:
+            handle[0].fail(exc)
+        end_trace(handle)
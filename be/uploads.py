@@ -0,0 +1,269 @@
+"""
+Streaming ``multipart/form-data`` submissions.
+
+``POST /grievances`` can send its fields and attachments as multipart form
+data instead of base64 inside JSON. The body is read in small chunks: form
+fields first, then each file part is written straight into an S3 upload
+(multipart for anything larger than one part), so an attachment is never
+held in memory in full. Parts of every document in the request upload
+concurrently on the shared S3 pool while the rest of the body is still
+being read.
+
+Form fields must come before the file parts, since the S3 keys include the
+grievance id and the grievance is created from the fields.
+
+Browsers can also skip the web tier entirely: ``POST /uploads/presign``
+returns presigned PUT or POST targets for files identified by their SHA-256,
+and ``POST /grievances/<id>/documents`` attaches the uploaded objects to a
+grievance. Those objects are keyed by content hash, so a file attached to
+many grievances is stored, and uploaded, once.
+"""
+import base64
+import binascii
+import json
+import logging
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.sansio.multipart import NEED_DATA, Data, Epilogue, Field, File, MultipartDecoder
+from werkzeug.utils import secure_filename
+
+from config import settings
+from resilience import CircuitOpenError
+from utils import S3Storage, S3StreamingUpload
+
+logger = logging.getLogger("grievance.uploads")
+
+CONTENT_KEY_PREFIX = "documents/sha256/"
+PRESIGN_METHODS = ("put", "post")
+MAX_PRESIGN_FILES = 20
+
+_SHA256_HEX = re.compile(r"^[0-9a-f]{64}$")
+
+READ_CHUNK_BYTES = 64 * 1024
+MAX_FIELD_BYTES = 1024 * 1024
+MAX_PARTS = 64
+
+
+class MultipartSubmission:
+    """A multipart grievance submission read incrementally from the request stream."""
+
+    def __init__(self, stream, boundary: bytes):
+        self._stream = stream
+        self._decoder = MultipartDecoder(boundary, max_parts=MAX_PARTS)
+        self._pending_file: Optional[File] = None
+        self._finished = False
+        self._uploads: List[S3StreamingUpload] = []
+
+    @classmethod
+    def from_request(cls, request) -> "MultipartSubmission":
+        boundary = request.mimetype_params.get("boundary")
+        if not boundary:
+            raise ValueError("Missing multipart boundary")
+        return cls(request.stream, boundary.encode("latin-1"))
+
+    def _next_event(self):
+        while True:
+            event = self._decoder.next_event()
+            if event is not NEED_DATA:
+                return event
+            if self._decoder.complete:
+                raise ValueError("Truncated multipart body")
+            chunk = self._stream.read(READ_CHUNK_BYTES)
+            self._decoder.receive_data(chunk or None)
+
+    def _read_field(self) -> bytes:
+        value = bytearray()
+        while True:
+            event = self._next_event()
+            if not isinstance(event, Data):
+                raise ValueError("Malformed multipart body")
+            value += event.data
+            if len(value) > MAX_FIELD_BYTES:
+                raise RequestEntityTooLarge()
+            if not event.more_data:
+                return bytes(value)
+
+    def read_fields(self) -> Dict[str, Any]:
+        """
+        Read form fields up to the first file. A ``payload`` field holding a
+        JSON object is used as the base; other fields override it, and
+        repeated fields (e.g. ``tags``) become lists.
+        """
+        payload: Dict[str, Any] = {}
+        fields: Dict[str, Any] = {}
+        while True:
+            event = self._next_event()
+            if isinstance(event, File):
+                self._pending_file = event
+                break
+            if isinstance(event, Epilogue):
+                self._finished = True
+                break
+            if not isinstance(event, Field):
+                continue
+            value = self._read_field().decode(event.headers.get("charset") or "utf-8", errors="replace")
+            if event.name == "payload":
+                try:
+                    base = json.loads(value)
+                except ValueError as exc:
+                    raise ValueError("payload field is not valid JSON") from exc
+                if not isinstance(base, dict):
+                    raise ValueError("payload field must be a JSON object")
+                payload.update(base)
+            elif event.name in fields:
+                existing = fields[event.name]
+                fields[event.name] = (existing if isinstance(existing, list) else [existing]) + [value]
+            else:
+                fields[event.name] = value
+        payload.update(fields)
+        return payload
+
+    def upload_documents(self, grievance_id: int) -> List[str]:
+        """Stream the remaining file parts into S3 under ``grievances/<id>/``; returns their URLs."""
+        if self._finished:
+            return []
+        slots = threading.BoundedSemaphore(max(1, settings.aws.max_buffered_parts))
+        try:
+            storage = S3Storage()
+            event = self._pending_file
+            self._pending_file = None
+            upload: Optional[S3StreamingUpload] = None
+            while True:
+                if event is None:
+                    event = self._next_event()
+                if isinstance(event, Epilogue):
+                    break
+                if isinstance(event, File):
+                    filename = secure_filename(event.filename or "") or f"document-{len(self._uploads) + 1}"
+                    upload = storage.open_stream(
+                        f"grievances/{grievance_id}/{filename}",
+                        event.headers.get("content-type", "application/octet-stream"),
+                        slots,
+                    )
+                    self._uploads.append(upload)
+                elif isinstance(event, Data) and upload is not None:
+                    upload.write(event.data)
+                    if not event.more_data:
+                        upload.close()
+                        upload = None
+                elif isinstance(event, Field):
+                    logger.warning("Ignoring form field %r sent after the documents", event.name)
+                    upload = None
+                event = None
+            self._finished = True
+            urls = [upload.result() for upload in self._uploads]
+            logger.info(
+                "Streamed %d documents (%d bytes) for grievance %s",
+                len(urls),
+                sum(upload.size for upload in self._uploads),
+                grievance_id,
+            )
+            self._uploads = []
+            return urls
+        except CircuitOpenError:
+            self.close()
+            raise
+        except Exception as exc:
+            self.close()
+            raise RuntimeError(f"S3 upload failed: {exc}") from exc
+
+    def close(self) -> None:
+        """Abort unfinished uploads and discard any unread input."""
+        for upload in self._uploads:
+            upload.abort()
+        self._uploads = []
+        if not self._finished:
+            self._finished = True
+            try:
+                while self._stream.read(READ_CHUNK_BYTES):
+                    pass
+            except Exception:  # pragma: no cover - client went away
+                pass
+
+
+def content_key(sha256_hex: str) -> str:
+    return f"{CONTENT_KEY_PREFIX}{sha256_hex}"
+
+
+def _parse_upload_request(item: Any) -> Dict[str, Any]:
+    if not isinstance(item, dict):
+        raise ValueError("Each file must be an object")
+    sha256_hex = str(item.get("sha256") or "").strip().lower()
+    if not _SHA256_HEX.match(sha256_hex):
+        raise ValueError("sha256 must be a 64-character hex digest")
+    try:
+        size = int(item.get("size"))
+    except (TypeError, ValueError):
+        raise ValueError("size must be an integer") from None
+    if size <= 0 or size > settings.aws.max_upload_bytes:
+        raise ValueError(f"size must be between 1 and {settings.aws.max_upload_bytes} bytes")
+    return {
+        "sha256": sha256_hex,
+        "size": size,
+        "content_type": str(item.get("content_type") or "application/octet-stream"),
+        "filename": item.get("filename"),
+    }
+
+
+def presign_uploads(files: Iterable[Any], method: str = "put") -> List[Dict[str, Any]]:
+    """
+    Upload targets for ``files`` (``sha256``, ``size``, optional
+    ``content_type``/``filename``). Files whose content is already in the
+    bucket come back with ``exists: true`` and no upload target.
+    """
+    method = (method or "put").lower()
+    if method not in PRESIGN_METHODS:
+        raise ValueError("method must be one of: put, post")
+    requested = [_parse_upload_request(item) for item in files]
+    if not requested:
+        raise ValueError("files is required")
+    if len(requested) > MAX_PRESIGN_FILES:
+        raise ValueError(f"At most {MAX_PRESIGN_FILES} files per request")
+
+    storage = S3Storage()
+    expires_in = settings.aws.presign_expiry_seconds
+    results = []
+    for item in requested:
+        key = content_key(item["sha256"])
+        checksum = base64.b64encode(binascii.unhexlify(item["sha256"])).decode()
+        exists = storage.object_size(key) == item["size"]
+        upload = None
+        if not exists:
+            if method == "put":
+                upload = storage.presign_put(key, item["content_type"], checksum, expires_in)
+            else:
+                upload = storage.presign_post(key, item["content_type"], checksum, item["size"], expires_in)
+        results.append(
+            {
+                "sha256": item["sha256"],
+                "filename": item["filename"],
+                "key": key,
+                "exists": exists,
+                "upload": upload,
+                "expires_in": None if exists else expires_in,
+            }
+        )
+    return results
+
+
+def finalize_uploads(keys: Iterable[Any]) -> List[str]:
+    """
+    Check that each content-addressed ``key`` was uploaded and return its
+    ``s3://`` URL. Raises ValueError naming the first key that is invalid or
+    missing from the bucket.
+    """
+    keys = [str(key or "") for key in keys]
+    if not keys:
+        raise ValueError("keys is required")
+    storage = S3Storage()
+    urls = []
+    for key in keys:
+        if not key.startswith(CONTENT_KEY_PREFIX) or not _SHA256_HEX.match(key[len(CONTENT_KEY_PREFIX):]):
+            raise ValueError(f"Not an upload key: {key!r}")
+        if storage.object_size(key) is None:
+            raise ValueError(f"Upload not found: {key}")
+        urls.append(f"s3://{storage.bucket}/{key}")
+    return urls
@@ -1,62 +1,81 @@
+import asyncio
 import base64
 import hashlib
+import importlib
+import importlib.util
 import io
 import json
 import logging
+import contextvars
+import random
 import time
 import threading
-from datetime import datetime
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from config import settings
+from metrics import CLUSTERING_DURATION, INGESTION_BACKLOG, track, timed
+from tracing import traced
+from admission import (
+    AdmissionRejected,
+    Priority,
+    admission_priority,
+    openai_call,
+    openai_call_async,
+)
+from resilience import CircuitOpenError, call, call_async, ensure_available, guarded
 
 try:
-    import boto3  # type: ignore
-except ImportError:  # pragma: no cover
-    boto3 = None
-
-try:
-    from openai import OpenAI  # type: ignore
-except ImportError:  # pragma: no cover
-    OpenAI = None
-
-try:
-    from pymongo import MongoClient, ReturnDocument, UpdateOne  # type: ignore
+    from pymongo import MongoClient, ReplaceOne, ReturnDocument, UpdateOne  # type: ignore
 except ImportError:  # pragma: no cover
     MongoClient = None
+    ReplaceOne = None
     ReturnDocument = None
     UpdateOne = None
+try:
+    from pymongo import AsyncMongoClient  # type: ignore
+except ImportError:  # pragma: no cover - pymongo < 4.9
+    AsyncMongoClient = None
 try:
     from bson import ObjectId  # type: ignore
 except ImportError:  # pragma: no cover
     ObjectId = None
 
-try:
-    from google.oauth2 import service_account  # type: ignore
-    from googleapiclient.discovery import build  # type: ignore
-    from googleapiclient.errors import HttpError  # type: ignore
-    from googleapiclient.http import MediaIoBaseDownload  # type: ignore
-except ImportError:  # pragma: no cover
-    service_account = None
-    build = None
-    HttpError = None
-    MediaIoBaseDownload = None
 
-try:
-    from PyPDF2 import PdfReader  # type: ignore
-except ImportError:  # pragma: no cover
-    PdfReader = None
+def _module_available(name: str) -> bool:
+    """Whether an optional dependency is installed, without importing it."""
+    return importlib.util.find_spec(name) is not None
 
-try:
-    import numpy as np  # type: ignore
-    from sklearn.cluster import DBSCAN  # type: ignore
-except ImportError:  # pragma: no cover
-    np = None
-    DBSCAN = None
+
+class _LazyModule:
+    """Stand-in for a heavy module that is imported on first attribute access."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+
+# numpy/scikit-learn, boto3, the Google API client, PyPDF2 and the OpenAI SDK
+# are imported where they are first used: importing this module (and so the
+# app) stays fast, and pre-fork servers do not load them into the master.
+HAS_NUMPY = _module_available("numpy")
+HAS_SKLEARN = HAS_NUMPY and _module_available("sklearn")
+np = _LazyModule("numpy")
 
 logger = logging.getLogger("grievance.backend")
 
+FALLBACK_TAGS = ("general", "unclassified")
+# Inputs per OpenAI embeddings request; the API accepts up to 2048.
+EMBEDDING_BATCH_SIZE = 100
+
 
 def _stringify_object_ids(value: Any) -> Any:
     if ObjectId is not None and isinstance(value, ObjectId):
@@ -156,13 +175,23 @@ class KnowledgeBaseChangePoller:
 
 class S3Storage:
     def __init__(self):
-        if boto3 is None:
-            raise RuntimeError("boto3 is required for S3 interactions.")
+        try:
+            import boto3  # type: ignore
+        except ImportError as exc:  # pragma: no cover
+            raise RuntimeError("boto3 is required for S3 interactions.") from exc
+        from botocore.config import Config  # type: ignore
+
         self.client = boto3.client(
             "s3",
             aws_access_key_id=settings.aws.access_key_id,
             aws_secret_access_key=settings.aws.secret_access_key,
             region_name=settings.aws.region,
+            config=Config(
+                connect_timeout=settings.aws.connect_timeout_seconds,
+                read_timeout=settings.aws.read_timeout_seconds,
+                # Retries happen in the resilience layer, which also drives the breaker.
+                retries={"total_max_attempts": 1},
+            ),
         )
         self.bucket = settings.aws.s3_bucket
 
@@ -174,34 +203,280 @@ class S3Storage:
             binary = base64.b64decode(content_b64) if content_b64 else doc.get("content_bytes", b"")
             key = f"grievances/{grievance_id}/{filename}"
             try:
-                self.client.put_object(
-                    Bucket=self.bucket,
-                    Key=key,
-                    Body=binary,
-                    ContentType=doc.get("content_type", "application/octet-stream"),
-                )
+                with track("s3", "put_object"):
+                    # PUT of the same key and body is idempotent, so it is safe to retry.
+                    call(
+                        "s3",
+                        self.client.put_object,
+                        idempotent=True,
+                        Bucket=self.bucket,
+                        Key=key,
+                        Body=binary,
+                        ContentType=doc.get("content_type", "application/octet-stream"),
+                    )
+            except CircuitOpenError:
+                raise
             except Exception as exc:  # pragma: no cover - network/AWS specific
                 raise RuntimeError(f"S3 upload failed: {exc}") from exc
             urls.append(f"s3://{self.bucket}/{key}")
         return urls
 
+    def open_stream(
+        self, key: str, content_type: str, slots: threading.BoundedSemaphore
+    ) -> "S3StreamingUpload":
+        return S3StreamingUpload(self, key, content_type, slots)
+
+    def object_size(self, key: str) -> Optional[int]:
+        """Size of ``key`` in the bucket, or None when it does not exist."""
+        from botocore.exceptions import ClientError  # type: ignore
+
+        try:
+            with track("s3", "head_object"):
+                response = call("s3", self.client.head_object, idempotent=True, Bucket=self.bucket, Key=key)
+        except ClientError as exc:
+            if _s3_error_status(exc) == 404:
+                return None
+            raise
+        return int(response.get("ContentLength") or 0)
+
+    def presign_put(self, key: str, content_type: str, checksum_sha256: str, expires_in: int) -> Dict[str, Any]:
+        """
+        Presigned PUT for ``key``. The checksum header is signed, so S3 rejects
+        a body whose SHA-256 differs from the one the key was derived from.
+        """
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ChecksumSHA256": checksum_sha256,
+            },
+            ExpiresIn=expires_in,
+        )
+        return {
+            "method": "PUT",
+            "url": url,
+            "headers": {"Content-Type": content_type, "x-amz-checksum-sha256": checksum_sha256},
+        }
+
+    def presign_post(
+        self, key: str, content_type: str, checksum_sha256: str, size: int, expires_in: int
+    ) -> Dict[str, Any]:
+        """Presigned browser form POST for ``key``, limited to exactly ``size`` bytes."""
+        fields = {"Content-Type": content_type, "x-amz-checksum-sha256": checksum_sha256}
+        post = self.client.generate_presigned_post(
+            self.bucket,
+            key,
+            Fields=fields,
+            Conditions=[
+                {"Content-Type": content_type},
+                {"x-amz-checksum-sha256": checksum_sha256},
+                ["content-length-range", size, size],
+            ],
+            ExpiresIn=expires_in,
+        )
+        return {"method": "POST", "url": post["url"], "fields": post["fields"]}
+
+
+def _s3_error_status(exc: Exception) -> Optional[int]:
+    return getattr(exc, "response", {}).get("ResponseMetadata", {}).get("HTTPStatusCode")
+
+
+_S3_UPLOAD_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_S3_UPLOAD_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_s3_upload_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for S3 part uploads, shared by every streaming upload."""
+    global _S3_UPLOAD_EXECUTOR
+    if _S3_UPLOAD_EXECUTOR is None:
+        with _S3_UPLOAD_EXECUTOR_LOCK:
+            if _S3_UPLOAD_EXECUTOR is None:
+                _S3_UPLOAD_EXECUTOR = ThreadPoolExecutor(
+                    max_workers=max(1, settings.aws.upload_concurrency), thread_name_prefix="s3-upload"
+                )
+    return _S3_UPLOAD_EXECUTOR
+
+
+class S3StreamingUpload:
+    """
+    Streams one object into S3 without holding it in memory. Written data is
+    cut into ``multipart_part_size_bytes`` parts that upload on the shared
+    pool while the caller keeps reading; ``slots`` caps how many parts a
+    caller has buffered or in flight, so ``write`` blocks once it is full.
+    Objects smaller than one part are sent with a single put_object.
+    """
+
+    def __init__(self, storage: S3Storage, key: str, content_type: str, slots: threading.BoundedSemaphore):
+        self.storage = storage
+        self.key = key
+        self.content_type = content_type
+        self.part_size = settings.aws.multipart_part_size_bytes
+        self.size = 0
+        self._slots = slots
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: List[Future] = []
+        self._closed = False
+
+    @property
+    def url(self) -> str:
+        return f"s3://{self.storage.bucket}/{self.key}"
+
+    def write(self, data: bytes) -> None:
+        for part in self._parts:
+            if part.done() and part.exception() is not None:
+                raise part.exception()
+        self._buffer += data
+        self.size += len(data)
+        while len(self._buffer) >= self.part_size:
+            body = bytes(self._buffer[: self.part_size])
+            del self._buffer[: self.part_size]
+            self._submit(self._upload_part, len(self._parts) + 1, body)
+
+    def close(self) -> None:
+        """Send whatever is buffered; uploads finish in the background until :meth:`result`."""
+        if self._closed:
+            return
+        self._closed = True
+        body = bytes(self._buffer)
+        self._buffer = bytearray()
+        if not self._parts:
+            self._submit(self._put_object, body)
+        elif body:
+            self._submit(self._upload_part, len(self._parts) + 1, body)
+
+    def result(self) -> str:
+        """Wait for every part, complete the multipart upload and return the object URL."""
+        self.close()
+        parts = [part.result() for part in self._parts]
+        if self._upload_id is not None:
+            with track("s3", "complete_multipart_upload"):
+                call(
+                    "s3",
+                    self.storage.client.complete_multipart_upload,
+                    Bucket=self.storage.bucket,
+                    Key=self.key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+        return self.url
+
+    def abort(self) -> None:
+        for part in self._parts:
+            part.cancel()
+        for part in self._parts:
+            try:
+                part.result()
+            except Exception:
+                pass
+        if self._upload_id is None:
+            return
+        try:
+            with track("s3", "abort_multipart_upload"):
+                self.storage.client.abort_multipart_upload(
+                    Bucket=self.storage.bucket, Key=self.key, UploadId=self._upload_id
+                )
+        except Exception as exc:  # pragma: no cover - network/AWS specific
+            logger.warning("Failed to abort multipart upload of %s: %s", self.key, exc)
+
+    def _submit(self, func, *args) -> None:
+        if func == self._upload_part and self._upload_id is None:
+            with track("s3", "create_multipart_upload"):
+                response = call(
+                    "s3",
+                    self.storage.client.create_multipart_upload,
+                    Bucket=self.storage.bucket,
+                    Key=self.key,
+                    ContentType=self.content_type,
+                )
+            self._upload_id = response["UploadId"]
+        self._slots.acquire()
+        try:
+            future = get_s3_upload_executor().submit(contextvars.copy_context().run, func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        self._parts.append(future)
+
+    def _upload_part(self, number: int, body: bytes) -> Dict[str, Any]:
+        with track("s3", "upload_part"):
+            response = call(
+                "s3",
+                self.storage.client.upload_part,
+                idempotent=True,
+                Bucket=self.storage.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                PartNumber=number,
+                Body=body,
+            )
+        return {"PartNumber": number, "ETag": response["ETag"]}
+
+    def _put_object(self, body: bytes) -> None:
+        with track("s3", "put_object"):
+            call(
+                "s3",
+                self.storage.client.put_object,
+                idempotent=True,
+                Bucket=self.storage.bucket,
+                Key=self.key,
+                Body=body,
+                ContentType=self.content_type,
+            )
+
+
+_MONGO_CLIENT = None
+_MONGO_CLIENT_LOCK = threading.Lock()
+
+
+def _mongo_timeouts() -> Dict[str, int]:
+    return {
+        "serverSelectionTimeoutMS": settings.mongo.server_selection_timeout_ms,
+        "connectTimeoutMS": settings.mongo.connect_timeout_ms,
+        "socketTimeoutMS": settings.mongo.socket_timeout_ms,
+    }
+
+
+def get_mongo_client():
+    """
+    Process-wide MongoClient. pymongo pools connections per client, so
+    repositories share one instead of opening a new pool per call. Created on
+    first use, i.e. after a pre-fork server has forked its workers.
+    """
+    global _MONGO_CLIENT
+    if _MONGO_CLIENT is None:
+        with _MONGO_CLIENT_LOCK:
+            if _MONGO_CLIENT is None:
+                _MONGO_CLIENT = MongoClient(settings.mongo.uri, **_mongo_timeouts())
+    return _MONGO_CLIENT
+
 
 class MongoRepository:
+    _indexes_ensured = False
+
     def __init__(self):
         if MongoClient is None:
             raise RuntimeError("pymongo is required for MongoDB interactions.")
         try:
-            self.client = MongoClient(settings.mongo.uri, serverSelectionTimeoutMS=2000)
+            self.client = get_mongo_client()
             self.db = self.client[settings.mongo.db_name]
             self.chats = self.db[settings.mongo.chat_collection]
             self.embeddings = self.db[settings.mongo.embedding_collection]
             self.analytics = self.db[settings.mongo.analytics_collection]
             self.kb_chunks = self.db[settings.mongo.kb_collection]
+            self.summaries = self.db[settings.mongo.summary_collection]
+            self.chats_archive = self.db[f"{settings.mongo.chat_collection}_archive"]
+            self.embeddings_archive = self.db[f"{settings.mongo.embedding_collection}_archive"]
             self._ensure_indexes()
         except Exception as exc:
             raise RuntimeError(f"MongoDB connection failed: {exc}") from exc
 
     def _ensure_indexes(self) -> None:
+        if MongoRepository._indexes_ensured:
+            return
         try:
             self.kb_chunks.create_index(
                 [("doc_id", 1), ("chunk_id", 1)],
@@ -212,9 +487,12 @@ class MongoRepository:
                 [("folder_id", 1), ("doc_id", 1)],
                 name="kb_folder_doc_idx",
             )
+            MongoRepository._indexes_ensured = True
         except Exception as exc:  # pragma: no cover - index creation best effort
             logger.warning("Failed to ensure KB Mongo indexes: %s", exc)
 
+    @timed("mongo", "append_chat_message")
+    @guarded("mongo")
     def append_chat_message(self, grievance_id: int, role: str, message: str) -> Dict[str, Any]:
         payload = {
             "role": role,
@@ -231,11 +509,16 @@ class MongoRepository:
             record = {"grievance_id": grievance_id, "conversations": [payload]}
         return _stringify_object_ids(record)
 
-    def fetch_chat(self, grievance_id: int) -> Dict[str, Any]:
-        record = self.chats.find_one({"grievance_id": grievance_id}) or {}
+    @timed("mongo", "fetch_chat")
+    @guarded("mongo", idempotent=True)
+    def fetch_chat(self, grievance_id: int, archived: bool = False) -> Dict[str, Any]:
+        collection = self.chats_archive if archived else self.chats
+        record = collection.find_one({"grievance_id": grievance_id}) or {}
         record = _stringify_object_ids(record)
         return {"grievance_id": grievance_id, "conversations": record.get("conversations", [])}
 
+    @timed("mongo", "upsert_embedding")
+    @guarded("mongo", idempotent=True)
     def upsert_embedding(self, grievance_id: int, embedding: List[float], meta: Dict[str, Any]) -> None:
         record = {
             "grievance_id": grievance_id,
@@ -249,10 +532,97 @@ class MongoRepository:
             upsert=True,
         )
 
+    @timed("mongo", "bulk_upsert_embeddings")
+    @guarded("mongo", idempotent=True)
+    def bulk_upsert_embeddings(self, records: List[Dict[str, Any]]) -> int:
+        """Upsert many ``{grievance_id, embedding, meta}`` records in one ``bulk_write``."""
+        if not records:
+            return 0
+        if UpdateOne is None:
+            raise RuntimeError("pymongo is required for MongoDB interactions.")
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"grievance_id": record["grievance_id"]},
+                {
+                    "$set": {
+                        "grievance_id": record["grievance_id"],
+                        "embedding": record["embedding"],
+                        "meta_info": record["meta"],
+                        "updated_at": now,
+                    }
+                },
+                upsert=True,
+            )
+            for record in records
+        ]
+        result = self.embeddings.bulk_write(operations, ordered=False)
+        modified = result.modified_count or 0
+        upserted = len(result.upserted_ids) if result.upserted_ids else 0
+        return modified + upserted
+
+    @timed("mongo", "update_embedding_meta")
+    @guarded("mongo", idempotent=True)
+    def update_embedding_meta(self, grievance_ids: Sequence[int], meta: Dict[str, Any]) -> int:
+        """Set the same ``meta_info`` fields on the embeddings of many grievances in one update."""
+        if not grievance_ids or not meta:
+            return 0
+        # updated_at is left alone: the vectors did not change, so the index has nothing to reload.
+        update = {f"meta_info.{key}": value for key, value in meta.items()}
+        result = self.embeddings.update_many({"grievance_id": {"$in": list(grievance_ids)}}, {"$set": update})
+        return result.modified_count
+
+    @timed("mongo", "archive_grievance_documents")
+    @guarded("mongo", idempotent=True)
+    def archive_grievance_documents(self, grievance_ids: Sequence[int]) -> Dict[str, int]:
+        """
+        Move the chats and embeddings of ``grievance_ids`` to the ``*_archive``
+        collections. Copies are upserts by ``_id``, so a retry after a partial
+        failure is safe.
+        """
+        if not grievance_ids:
+            return {"chats": 0, "embeddings": 0}
+        if ReplaceOne is None:
+            raise RuntimeError("pymongo is required for MongoDB interactions.")
+        selector = {"grievance_id": {"$in": list(grievance_ids)}}
+        moved = {}
+        for name, hot, archive in (
+            ("chats", self.chats, self.chats_archive),
+            ("embeddings", self.embeddings, self.embeddings_archive),
+        ):
+            documents = list(hot.find(selector))
+            if documents:
+                archive.bulk_write(
+                    [ReplaceOne({"_id": document["_id"]}, document, upsert=True) for document in documents],
+                    ordered=False,
+                )
+                hot.delete_many(selector)
+            moved[name] = len(documents)
+        return moved
+
+    @timed("mongo", "fetch_summary")
+    @guarded("mongo", idempotent=True)
+    def fetch_summary(self, cache_key: str) -> Optional[str]:
+        record = self.summaries.find_one({"_id": cache_key}, {"summary": 1})
+        return record.get("summary") if record else None
+
+    @timed("mongo", "store_summary")
+    @guarded("mongo", idempotent=True)
+    def store_summary(self, cache_key: str, summary: str) -> None:
+        self.summaries.update_one(
+            {"_id": cache_key},
+            {"$set": {"summary": summary, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    @timed("mongo", "fetch_cluster_analytics")
+    @guarded("mongo", idempotent=True)
     def fetch_cluster_analytics(self) -> List[Dict[str, Any]]:
         results = list(self.analytics.find({}))
         return _stringify_object_ids(results)
 
+    @timed("mongo", "bulk_upsert_kb_chunks")
+    @guarded("mongo", idempotent=True)
     def bulk_upsert_kb_chunks(self, chunks: Sequence[Dict[str, Any]]) -> int:
         if not chunks:
             return 0
@@ -269,16 +639,22 @@ class MongoRepository:
             payload["updated_at"] = datetime.utcnow()
             operations.append(UpdateOne(selector, {"$set": payload}, upsert=True))
         result = self.kb_chunks.bulk_write(operations, ordered=False)
+        _invalidate_kb_vector_index()
         modified = result.modified_count or 0
         upserted = len(result.upserted_ids) if result.upserted_ids else 0
         return modified + upserted
 
+    @timed("mongo", "delete_folder_kb_chunks")
+    @guarded("mongo", idempotent=True)
     def delete_folder_kb_chunks(self, folder_id: str) -> int:
         result = self.kb_chunks.delete_many(
             {"type": "kb_chunk", "folder_id": folder_id}
         )
+        _invalidate_kb_vector_index()
         return result.deleted_count or 0
 
+    @timed("mongo", "delete_kb_chunks")
+    @guarded("mongo", idempotent=True)
     def delete_kb_chunks(self, chunk_refs: Sequence[Dict[str, Any]]) -> int:
         if not chunk_refs:
             return 0
@@ -295,6 +671,7 @@ class MongoRepository:
                     {"type": "kb_chunk", "doc_id": doc_id, "chunk_id": chunk_id}
                 )
             total_deleted += result.deleted_count or 0
+        _invalidate_kb_vector_index()
         return total_deleted
 
     def replace_kb_folder_chunks(
@@ -304,40 +681,62 @@ class MongoRepository:
         upserted = self.bulk_upsert_kb_chunks(chunks)
         return {"deleted": deleted, "upserted": upserted}
 
+    @timed("mongo", "search_similar_chunks")
     def search_similar_chunks(self, query_embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
         """
         Search for similar KB chunks using cosine similarity with the query embedding.
         Returns top_k most similar chunks.
         """
+        if HAS_NUMPY:
+            try:
+                results = get_kb_vector_index().search(query_embedding, top_k=top_k)
+            except CircuitOpenError:
+                raise
+            except RuntimeError as exc:
+                logger.warning("KB vector index unavailable, scanning chunks: %s", exc)
+                results = None
+            if results is not None:
+                if not results:
+                    logger.warning("No KB chunks with embeddings found")
+                return results
+
         # Fetch all KB chunks with embeddings
-        all_chunks = list(self.kb_chunks.find({"type": "kb_chunk", "embedding": {"$exists": True}}))
-        
-        if not all_chunks:
-            logger.warning("No KB chunks with embeddings found")
-            return []
+        all_chunks = call(
+            "mongo", lambda: list(self.kb_chunks.find(KnowledgeBaseVectorIndex.SELECTOR)), idempotent=True
+        )
+        return _rank_chunks_by_similarity(all_chunks, query_embedding, top_k)
+
+
+def _rank_chunks_by_similarity(
+    all_chunks: List[Dict[str, Any]], query_embedding: Sequence[float], top_k: int
+) -> List[Dict[str, Any]]:
+    """Brute-force cosine ranking used when the in-memory KB index is unavailable."""
+    if not all_chunks:
+        logger.warning("No KB chunks with embeddings found")
+        return []
+    
+    # Calculate cosine similarity for each chunk
+    similarities = []
+    for chunk in all_chunks:
+        chunk_embedding = chunk.get("embedding", [])
+        if not chunk_embedding:
+            continue
         
-        # Calculate cosine similarity for each chunk
-        similarities = []
-        for chunk in all_chunks:
-            chunk_embedding = chunk.get("embedding", [])
-            if not chunk_embedding:
-                continue
-            
-            # Cosine similarity calculation
-            dot_product = sum(a * b for a, b in zip(query_embedding, chunk_embedding))
-            magnitude_query = sum(a * a for a in query_embedding) ** 0.5
-            magnitude_chunk = sum(b * b for b in chunk_embedding) ** 0.5
-            
-            if magnitude_query > 0 and magnitude_chunk > 0:
-                similarity = dot_product / (magnitude_query * magnitude_chunk)
-                similarities.append({
-                    **chunk,
-                    "score": similarity
-                })
+        # Cosine similarity calculation
+        dot_product = sum(a * b for a, b in zip(query_embedding, chunk_embedding))
+        magnitude_query = sum(a * a for a in query_embedding) ** 0.5
+        magnitude_chunk = sum(b * b for b in chunk_embedding) ** 0.5
         
-        # Sort by similarity score (descending) and return top_k
-        similarities.sort(key=lambda x: x["score"], reverse=True)
-        return _stringify_object_ids(similarities[:top_k])
+        if magnitude_query > 0 and magnitude_chunk > 0:
+            similarity = dot_product / (magnitude_query * magnitude_chunk)
+            similarities.append({
+                **chunk,
+                "score": similarity
+            })
+    
+    # Sort by similarity score (descending) and return top_k
+    similarities.sort(key=lambda x: x["score"], reverse=True)
+    return _stringify_object_ids(similarities[:top_k])
 
 
 class KnowledgeBaseIngestor:
@@ -450,17 +849,31 @@ class KnowledgeBaseIngestor:
         }
 
     def _build_drive_client(self):
+        try:
+            from google.oauth2 import service_account  # type: ignore
+            from googleapiclient.discovery import build  # type: ignore
+        except ImportError as exc:  # pragma: no cover
+            raise RuntimeError("google-api-python-client is required for Drive ingestion.") from exc
         logger.debug("Authenticating with service account: %s", self.service_account_path)
         credentials = service_account.Credentials.from_service_account_file(
             self.service_account_path,
             scopes=self._scopes,
         )
         logger.debug("Building Drive v3 API client...")
-        return build("drive", "v3", credentials=credentials, cache_discovery=False)
+        try:
+            import google_auth_httplib2  # type: ignore
+            import httplib2  # type: ignore
+        except ImportError:  # pragma: no cover - both ship with google-api-python-client
+            return build("drive", "v3", credentials=credentials, cache_discovery=False)
+        http = google_auth_httplib2.AuthorizedHttp(
+            credentials, http=httplib2.Http(timeout=settings.gdrive.timeout_seconds)
+        )
+        return build("drive", "v3", http=http, cache_discovery=False)
 
     def _get_start_page_token(self, drive) -> str:
         logger.debug("Requesting start page token from Drive API...")
-        response = drive.changes().getStartPageToken().execute()
+        with track("gdrive", "changes.getStartPageToken"):
+            response = call("gdrive", drive.changes().getStartPageToken().execute, idempotent=True)
         token = response.get("startPageToken")
         logger.debug("Start page token retrieved: %s", token)
         return token
@@ -471,11 +884,13 @@ class KnowledgeBaseIngestor:
         logger.info("Found %d files in folder %s", len(files), folder_id)
         
         chunks: List[Dict[str, Any]] = []
+        INGESTION_BACKLOG.set(len(files))
         for idx, file in enumerate(files, 1):
             logger.info("Processing file %d/%d: %s (id=%s)", idx, len(files), file.get("name"), file.get("id"))
             file_chunks = self._build_chunks_for_file(drive, folder_id, file)
             logger.info("Generated %d chunks for file %s", len(file_chunks), file.get("name"))
             chunks.extend(file_chunks)
+            INGESTION_BACKLOG.set(len(files) - idx)
         
         logger.info("Total chunks generated from all files: %d", len(chunks))
         next_token = self._get_start_page_token(drive)
@@ -510,11 +925,13 @@ class KnowledgeBaseIngestor:
                     supportsAllDrives=True,
                 )
             )
-            response = request.execute()
+            with track("gdrive", "changes.list"):
+                response = call("gdrive", request.execute, idempotent=True)
             changes = response.get("changes", [])
             logger.info("Received %d changes in page %d", len(changes), page_count)
             
-            for change in changes:
+            for processed, change in enumerate(changes):
+                INGESTION_BACKLOG.set(len(changes) - processed)
                 file_obj = change.get("file")
                 file_id = change.get("fileId")
                 if change.get("removed") or not file_obj:
@@ -531,6 +948,7 @@ class KnowledgeBaseIngestor:
                 logger.info("Generated %d chunks for updated file %s", len(file_updates), file_obj.get("name"))
                 updates.extend(file_updates)
 
+            INGESTION_BACKLOG.set(0)
             page_token = response.get("nextPageToken")
             if not page_token:
                 new_token = response.get("newStartPageToken") or change_token
@@ -548,18 +966,16 @@ class KnowledgeBaseIngestor:
         while True:
             page_count += 1
             logger.debug("Fetching files page %d", page_count)
-            response = (
-                drive.files()
-                .list(
-                    q=query,
-                    pageSize=100,
-                    pageToken=page_token,
-                    fields="nextPageToken, files(id, name, mimeType, modifiedTime, md5Checksum, headRevisionId)",
-                    includeItemsFromAllDrives=True,
-                    supportsAllDrives=True,
-                )
-                .execute()
+            request = drive.files().list(
+                q=query,
+                pageSize=100,
+                pageToken=page_token,
+                fields="nextPageToken, files(id, name, mimeType, modifiedTime, md5Checksum, headRevisionId)",
+                includeItemsFromAllDrives=True,
+                supportsAllDrives=True,
             )
+            with track("gdrive", "files.list"):
+                response = call("gdrive", request.execute, idempotent=True)
             page_files = response.get("files", [])
             logger.debug("Page %d returned %d files", page_count, len(page_files))
             files.extend(page_files)
@@ -602,7 +1018,8 @@ class KnowledgeBaseIngestor:
         for index, chunk_text in enumerate(chunks, start=1):
             chunk_id = f"chunk_{index:04d}"
             logger.debug("Generating embedding for chunk %s of file %s", chunk_id, file_name)
-            embedding = facade.generate_embedding(chunk_text)
+            with admission_priority(Priority.INGESTION):
+                embedding = facade.generate_embedding(chunk_text, fallback_when_open=False)
             logger.debug("Embedding generated: %d dimensions for chunk %s", len(embedding), chunk_id)
             
             records.append(
@@ -623,6 +1040,9 @@ class KnowledgeBaseIngestor:
         return records
 
     def _download_file_content(self, drive, file_obj: Dict[str, Any]) -> Optional[str]:
+        from googleapiclient.errors import HttpError  # type: ignore
+        from googleapiclient.http import MediaIoBaseDownload  # type: ignore
+
         file_id = file_obj.get("id")
         mime_type = file_obj.get("mimeType")
         file_name = file_obj.get("name")
@@ -641,10 +1061,11 @@ class KnowledgeBaseIngestor:
                 buffer = io.BytesIO()
                 downloader = MediaIoBaseDownload(buffer, request)
                 done = False
-                while not done:
-                    status, done = downloader.next_chunk()
-                    if status:
-                        logger.debug("Download progress for %s: %d%%", file_name, int(status.progress() * 100))
+                with track("gdrive", "files.get_media"):
+                    while not done:
+                        status, done = call("gdrive", downloader.next_chunk, idempotent=True)
+                        if status:
+                            logger.debug("Download progress for %s: %d%%", file_name, int(status.progress() * 100))
                 
                 buffer.seek(0)
                 logger.debug("Download complete for %s, extracting text from PDF...", file_name)
@@ -676,10 +1097,11 @@ class KnowledgeBaseIngestor:
             buffer = io.BytesIO()
             downloader = MediaIoBaseDownload(buffer, request)
             done = False
-            while not done:
-                status, done = downloader.next_chunk()
-                if status:
-                    logger.debug("Download progress for %s: %d%%", file_name, int(status.progress() * 100))
+            with track("gdrive", "files.download"):
+                while not done:
+                    status, done = call("gdrive", downloader.next_chunk, idempotent=True)
+                    if status:
+                        logger.debug("Download progress for %s: %d%%", file_name, int(status.progress() * 100))
             
             buffer.seek(0)
             logger.debug("Download complete for %s, decoding content...", file_name)
@@ -697,7 +1119,9 @@ class KnowledgeBaseIngestor:
 
     def _extract_text_from_pdf(self, pdf_buffer: io.BytesIO, file_name: str) -> Optional[str]:
         """Extract text content from a PDF file buffer."""
-        if PdfReader is None:
+        try:
+            from PyPDF2 import PdfReader  # type: ignore
+        except ImportError:
             logger.error("PyPDF2 is not installed, cannot extract PDF text from %s", file_name)
             return None
         
@@ -830,7 +1254,10 @@ class GrievanceClusteringEngine:
             self._stop_event.set()
             thread = self._thread
             self._thread = None
+            shadow_pool, self._shadow_pool = self._shadow_pool, None
         thread.join(timeout=2.0)
+        if shadow_pool is not None:
+            shadow_pool.shutdown(wait=False, cancel_futures=True)
         logger.info("Stopped Grievance Clustering Engine")
 
     def trigger_now(self) -> None:
@@ -857,16 +1284,20 @@ class GrievanceClusteringEngine:
 
     def _perform_clustering(self) -> None:
         """Execute clustering algorithm on all grievance embeddings."""
-        if np is None or DBSCAN is None:
+        if not HAS_SKLEARN:
             logger.warning("numpy or sklearn not available, clustering disabled")
             return
+        from sklearn.cluster import DBSCAN
+        from sklearn.preprocessing import normalize
 
+        started = time.perf_counter()
         try:
             logger.debug("Starting clustering operation...")
             repo = MongoRepository()
             
             # Fetch all grievance embeddings from MongoDB
-            all_embeddings = list(repo.embeddings.find({"embedding": {"$exists": True}}))
+            with track("mongo", "embeddings.find"):
+                all_embeddings = list(repo.embeddings.find({"embedding": {"$exists": True}}))
             
             if len(all_embeddings) < 2:
                 logger.debug("Not enough grievances to cluster (need at least 2, got %d)", len(all_embeddings))
@@ -889,7 +1320,6 @@ class GrievanceClusteringEngine:
             
             # Normalize embeddings for cosine similarity
             # Cosine distance = 1 - cosine_similarity
-            from sklearn.preprocessing import normalize
             X_normalized = normalize(X, norm='l2')
             
             # Use DBSCAN with cosine metric
@@ -944,6 +1374,7 @@ class GrievanceClusteringEngine:
             # Update last cluster time
             with self._lock:
                 self._last_cluster_time = datetime.utcnow()
+            CLUSTERING_DURATION.set(time.perf_counter() - started)
             
             logger.info("Clustering operation completed successfully")
             
@@ -1012,9 +1443,10 @@ class GrievanceClusteringEngine:
                 analytics_data.append(analytics_doc)
             
             # Clear old analytics and insert new ones
-            repo.analytics.delete_many({"type": "cluster_analytics"})
-            if analytics_data:
-                repo.analytics.insert_many(analytics_data)
+            with track("mongo", "analytics.replace"):
+                repo.analytics.delete_many({"type": "cluster_analytics"})
+                if analytics_data:
+                    repo.analytics.insert_many(analytics_data)
                 logger.info("Generated analytics for %d clusters", len(analytics_data))
             
         except Exception as exc:
@@ -1032,144 +1464,1720 @@ def get_clustering_engine() -> GrievanceClusteringEngine:
     return _CLUSTERING_ENGINE
 
 
-class OpenAIClientFacade:
-    def __init__(self):
-        self.api_key = settings.openai.api_key
-        self.embedding_model = settings.openai.embedding_model
-        self.chat_model = settings.openai.chat_model
-        self.client = OpenAI(api_key=self.api_key) if self.api_key and OpenAI else None
+class GrievanceStatsReconciler:
+    """
+    Periodically rebuilds the daily stats rollup from the grievances and
+    archive tables, correcting drift from incremental updates that failed or raced.
+    """
 
-    def generate_embedding(self, text: str) -> List[float]:
-        if self.client:
-            logger.debug("Calling OpenAI API for embedding (model=%s, text_length=%d)", 
-                        self.embedding_model, len(text))
-            response = self.client.embeddings.create(
-                input=text,
-                model=self.embedding_model,
-            )
-            embedding = response.data[0].embedding
-            logger.debug("OpenAI embedding received: %d dimensions", len(embedding))
-            return embedding
-        # Deterministic fallback to keep downstream logic working offline.
-        logger.warning("OpenAI client not configured, using fallback embedding generation")
-        digest = hashlib.sha256(text.encode()).digest()
-        return [int(b) / 255.0 for b in digest]
+    def __init__(self, interval_seconds: int = 3600):
+        self.interval = max(60, int(interval_seconds))
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_result: Optional[Dict[str, Any]] = None
 
-    def summarize_grievances(self, grievances: List[Dict[str, Any]]) -> str:
-        if not grievances:
-            return "No grievances available for summarization."
-        prompt = (
-            "Summarize the following grievances with trends and suggested actions:\n"
-            f"{json.dumps(grievances, default=str)}"
-        )
-        if self.client:
-            completion = self.client.responses.create(
-                model=self.chat_model,
-                input=[{"role": "user", "content": prompt}],
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="grievance-stats-reconciler", daemon=True
             )
-            return completion.output_text
-        return "AI summarization unavailable (missing OpenAI credentials)."
+            self._thread.start()
+            logger.info("Started grievance stats reconciler (interval=%ss)", self.interval)
 
-    def generate_student_suggestion(self, grievance: Dict[str, Any], kb_chunks: List[Dict[str, Any]]) -> str:
-        """
-        Generate a short, actionable suggestion for students (30-40 words) using KB context.
-        """
-        if not self.client:
-            return "AI suggestions unavailable. Your grievance will be reviewed by our team."
-        
-        # Build context from KB chunks
-        kb_context = ""
-        if kb_chunks:
-            kb_context = "\n\n**Relevant Knowledge Base Information:**\n"
-            for i, chunk in enumerate(kb_chunks[:3], 1):  # Use top 3 chunks
-                doc_name = chunk.get("doc_name", "Document")
-                excerpt = chunk.get("excerpt", "")[:200]  # Limit excerpt length
-                kb_context += f"{i}. {doc_name}: {excerpt}\n"
-        
-        prompt = f"""You are a helpful assistant helping students with their campus grievances.
+    def stop(self) -> None:
+        with self._lock:
+            if not self._thread:
+                return
+            self._stop_event.set()
+            thread = self._thread
+            self._thread = None
+        thread.join(timeout=2.0)
 
-**Grievance:**
-Title: {grievance.get('title', 'N/A')}
-Description: {grievance.get('description', 'N/A')}
-{kb_context}
+    def reconcile(self) -> Dict[str, Any]:
+        from db import reconcile_grievance_stats
 
-Provide a brief, actionable suggestion (30-40 words max) for the student. Use markdown formatting. Focus on:
-1. Immediate steps they can take
-2. Relevant resources from the knowledge base
-3. Expected timeline or next steps
+        result = reconcile_grievance_stats()
+        result["reconciled_at"] = datetime.utcnow().isoformat()
+        self._last_result = result
+        return result
 
-Keep it concise, friendly, and solution-focused."""
+    def last_result(self) -> Optional[Dict[str, Any]]:
+        return self._last_result
 
-        try:
-            completion = self.client.chat.completions.create(
-                model=self.chat_model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=100,
-                temperature=0.7,
-            )
-            return completion.choices[0].message.content.strip()
-        except Exception as e:
-            logger.error(f"Error generating student suggestion: {e}")
-            return "Your grievance will be reviewed by our team shortly."
+    def _run(self) -> None:
+        # init_db builds the rollup, so the first pass waits a full interval.
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.reconcile()
+            except Exception as exc:  # pragma: no cover - background worker should never crash app
+                logger.error("Grievance stats reconcile failed: %s", exc, exc_info=True)
 
 
-def upload_documents_to_s3(grievance_id: int, documents: Iterable[Dict[str, Any]]) -> List[str]:
-    if not documents:
-        return []
-    storage = S3Storage()
-    return storage.upload_documents(grievance_id, documents)
+_STATS_RECONCILER: Optional[GrievanceStatsReconciler] = None
 
 
-def persist_embedding(grievance_id: int, embedding: List[float], meta: Dict[str, Any]) -> None:
-    repo = MongoRepository()
-    repo.upsert_embedding(grievance_id, embedding, meta)
+def get_stats_reconciler() -> GrievanceStatsReconciler:
+    global _STATS_RECONCILER
+    if _STATS_RECONCILER is None:
+        _STATS_RECONCILER = GrievanceStatsReconciler(settings.stats.reconcile_interval_seconds)
+    return _STATS_RECONCILER
 
 
-def append_chat(grievance_id: int, role: str, message: str) -> Dict[str, Any]:
-    repo = MongoRepository()
-    return repo.append_chat_message(grievance_id, role, message)
+class GrievanceArchiver:
+    """
+    Moves grievances that were closed (SOLVED/DROPPED) and untouched for
+    ``after_days`` into ``grievances_archive``, and their chats and embeddings
+    into the ``*_archive`` MongoDB collections, so hot queries, the vector
+    index and clustering only see the active working set.
+    """
 
+    def __init__(self, interval_seconds: int = 86400, after_days: int = 180, batch_size: int = 500):
+        self.interval = max(60, int(interval_seconds))
+        self.after_days = max(1, int(after_days))
+        self.batch_size = max(1, int(batch_size))
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_result: Optional[Dict[str, Any]] = None
 
-def fetch_chat(grievance_id: int) -> Dict[str, Any]:
-    repo = MongoRepository()
-    return repo.fetch_chat(grievance_id)
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="grievance-archiver", daemon=True)
+            self._thread.start()
+            logger.info(
+                "Started grievance archiver (interval=%ss, after_days=%s)", self.interval, self.after_days
+            )
 
+    def stop(self) -> None:
+        with self._lock:
+            if not self._thread:
+                return
+            self._stop_event.set()
+            thread = self._thread
+            self._thread = None
+        thread.join(timeout=2.0)
 
-def fetch_cluster_analytics() -> List[Dict[str, Any]]:
-    repo = MongoRepository()
-    return repo.fetch_cluster_analytics()
+    def archive(self) -> Dict[str, Any]:
+        """One archival pass; returns how many grievances and documents were moved."""
+        from db import archive_closed_grievances, grievances_pending_document_archive
 
+        with self._run_lock:
+            cutoff = datetime.utcnow() - timedelta(days=self.after_days)
+            result = {"grievances": 0, "chats": 0, "embeddings": 0, "documents_pending": 0}
+            try:
+                # Documents left behind by an earlier pass that lost MongoDB go first.
+                while True:
+                    pending = grievances_pending_document_archive(self.batch_size)
+                    if not pending:
+                        break
+                    self._archive_documents(pending, result)
+                    if len(pending) < self.batch_size:
+                        break
+                while not self._stop_event.is_set():
+                    moved = archive_closed_grievances(cutoff, self.batch_size)
+                    if not moved:
+                        break
+                    result["grievances"] += len(moved)
+                    self._archive_documents(moved, result)
+            except Exception as exc:
+                # Rows already moved keep documents_archived false and are retried next pass.
+                logger.warning("Grievance archival stopped early: %s", exc)
+                result["error"] = str(exc)
+                result["documents_pending"] = len(grievances_pending_document_archive(self.batch_size))
+            result["cutoff"] = cutoff.isoformat()
+            result["archived_at"] = datetime.utcnow().isoformat()
+            self._last_result = result
+        if result["grievances"]:
+            logger.info(
+                "Archived %d grievances (%d chats, %d embeddings)",
+                result["grievances"],
+                result["chats"],
+                result["embeddings"],
+            )
+        return result
 
-def schedule_gdrive_ingestion(folder_id: str) -> Dict[str, Any]:
-    ingestor = KnowledgeBaseIngestor()
-    response = ingestor.register_folder(folder_id)
-    poller = get_gdrive_poller()
-    poller.start(folder_id)
-    response.update(
-        {
-            "status": "POLLING",
-            "polling_interval_seconds": settings.gdrive.polling_interval_seconds,
-            "next_poll_in_seconds": 0,
-        }
-    )
-    return response
+    def last_result(self) -> Optional[Dict[str, Any]]:
+        return self._last_result
 
+    def _archive_documents(self, grievance_ids: List[int], result: Dict[str, Any]) -> None:
+        from db import mark_documents_archived
 
-def reindex_gdrive_folder(folder_id: str) -> Dict[str, Any]:
-    ingestor = KnowledgeBaseIngestor()
-    return ingestor.reindex_folder(folder_id)
+        moved = MongoRepository().archive_grievance_documents(grievance_ids)
+        mark_documents_archived(grievance_ids)
+        get_grievance_vector_index().remove(grievance_ids)
+        result["chats"] += moved["chats"]
+        result["embeddings"] += moved["embeddings"]
 
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.archive()
+            except Exception as exc:  # pragma: no cover - background worker should never crash app
+                logger.error("Grievance archival failed: %s", exc, exc_info=True)
+            if self._stop_event.wait(self.interval):
+                break
 
-def summarize_for_admin(grievances: List[Dict[str, Any]]) -> str:
-    facade = OpenAIClientFacade()
-    return facade.summarize_grievances(grievances)
 
+_ARCHIVER: Optional[GrievanceArchiver] = None
 
-def embed_text(text: str) -> List[float]:
+
+def get_grievance_archiver() -> GrievanceArchiver:
+    global _ARCHIVER
+    if _ARCHIVER is None:
+        _ARCHIVER = GrievanceArchiver(
+            interval_seconds=settings.archive.interval_seconds,
+            after_days=settings.archive.after_days,
+            batch_size=settings.archive.batch_size,
+        )
+    return _ARCHIVER
+
+
+class GrievanceLabelModel:
+    """
+    Locally trained TF-IDF + logistic-regression model that predicts issue tags
+    and the responsible department from a grievance's title and description.
+    It is retrained periodically from labelled rows in the relational database
+    and lets the submit path skip the LLM when the prediction is confident.
+
+    A ``shadow_sample_rate`` fraction of confident predictions is also sent to
+    the LLM in the background, so agreement is measured on the predictions
+    the model serves and not only on the ones it hands off.
+    """
+
+    MIN_TAG_SUPPORT = 3
+    MAX_TAGS = 5
+    MAX_PENDING_SHADOW_CALLS = 8
+
+    def __init__(
+        self,
+        confidence_threshold: float = 0.7,
+        retrain_interval_seconds: int = 3600,
+        min_training_rows: int = 50,
+        shadow_sample_rate: float = 0.0,
+    ):
+        self.confidence_threshold = confidence_threshold
+        self.interval = max(60, int(retrain_interval_seconds))
+        self.min_training_rows = max(10, int(min_training_rows))
+        self.shadow_sample_rate = min(1.0, max(0.0, float(shadow_sample_rate)))
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._first_pass = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._model: Optional[Dict[str, Any]] = None
+        self._trained_at: Optional[datetime] = None
+        self._training_rows = 0
+        self._holdout: Dict[str, Any] = {}
+        self._shadow_pool: Optional[ThreadPoolExecutor] = None
+        self._shadow_pending = 0
+        self._stats = {
+            "model_served": 0,
+            "llm_fallbacks": 0,
+            "shadow_skipped": 0,
+        }
+        # Low-confidence predictions the LLM replaced, and sampled confident
+        # predictions the model served; reported separately.
+        self._agreement = {
+            population: {"compared": 0, "tag_jaccard_total": 0.0, "exact_tag_matches": 0}
+            for population in ("fallback", "shadow")
+        }
+
+    def start(self) -> None:
+        """Start the periodic retraining thread."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="grievance-label-model", daemon=True
+            )
+            self._thread.start()
+            logger.info("Started grievance label model trainer (interval=%ss)", self.interval)
+
+    def stop(self) -> None:
+        with self._lock:
+            if not self._thread:
+                return
+            self._stop_event.set()
+            thread = self._thread
+            self._thread = None
+        thread.join(timeout=2.0)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.train()
+            except Exception as exc:  # pragma: no cover - background worker should never crash app
+                logger.error("Label model training failed: %s", exc, exc_info=True)
+            self._first_pass.set()
+            self._stop_event.wait(self.interval)
+
+    def wait_for_first_pass(self, timeout: Optional[float] = None) -> bool:
+        """Block until the trainer thread has attempted its first fit."""
+        return self._first_pass.wait(timeout)
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return self._model is not None
+
+    def train(self) -> Dict[str, Any]:
+        """Fit a fresh model from the database and swap it in atomically."""
+        if not HAS_SKLEARN:
+            raise RuntimeError("numpy and scikit-learn are required for the label model.")
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.multiclass import OneVsRestClassifier
+        from sklearn.preprocessing import MultiLabelBinarizer
+
+        from sqlalchemy import or_
+
+        from db import UNTRAINABLE_TAG_SOURCES, Grievance, session_scope
+
+        # Only tags from the LLM, the submitter or an admin (or rows older than
+        # tags_source) are labels; learning from its own predictions would make
+        # the model, and its holdout score, agree with itself.
+        with session_scope() as session:
+            rows = (
+                session.query(
+                    Grievance.title,
+                    Grievance.description,
+                    Grievance.tags,
+                    Grievance.assigned_to,
+                )
+                .filter(
+                    Grievance.duplicate_of_id.is_(None),
+                    or_(
+                        Grievance.tags_source.is_(None),
+                        Grievance.tags_source.notin_(UNTRAINABLE_TAG_SOURCES),
+                    ),
+                )
+                .all()
+            )
+
+        texts: List[str] = []
+        tag_sets: List[List[str]] = []
+        departments: List[str] = []
+        for title, description, tags, assigned_to in rows:
+            labelled = [tag for tag in (tags or []) if tag not in FALLBACK_TAGS]
+            if not labelled:
+                continue
+            texts.append(f"{title or ''} {description or ''}")
+            tag_sets.append(labelled)
+            departments.append(assigned_to.value if assigned_to else "OTHERS")
+
+        if len(texts) < self.min_training_rows:
+            logger.info(
+                "Label model not trained: %d labelled rows (need %d)",
+                len(texts),
+                self.min_training_rows,
+            )
+            return {"trained": False, "training_rows": len(texts)}
+
+        tag_counts: Dict[str, int] = {}
+        for tags in tag_sets:
+            for tag in set(tags):
+                tag_counts[tag] = tag_counts.get(tag, 0) + 1
+        vocabulary = sorted(tag for tag, count in tag_counts.items() if count >= self.MIN_TAG_SUPPORT)
+        if not vocabulary:
+            return {"trained": False, "training_rows": len(texts)}
+
+        def fit(sample_texts, sample_tags, sample_departments):
+            vectorizer = TfidfVectorizer(
+                ngram_range=(1, 2), min_df=2, max_features=20000, sublinear_tf=True
+            )
+            features = vectorizer.fit_transform(sample_texts)
+            binarizer = MultiLabelBinarizer(classes=vocabulary)
+            tag_matrix = binarizer.fit_transform(
+                [[tag for tag in tags if tag in vocabulary] for tags in sample_tags]
+            )
+            tag_classifier = OneVsRestClassifier(LogisticRegression(max_iter=1000))
+            tag_classifier.fit(features, tag_matrix)
+            department_classifier = None
+            if len(set(sample_departments)) > 1:
+                department_classifier = LogisticRegression(max_iter=1000)
+                department_classifier.fit(features, sample_departments)
+            return {
+                "vectorizer": vectorizer,
+                "binarizer": binarizer,
+                "tags": tag_classifier,
+                "department": department_classifier,
+            }
+
+        holdout: Dict[str, Any] = {}
+        if len(texts) >= self.min_training_rows * 2:
+            # Deterministic 80/20 split: every fifth row is held out for evaluation.
+            train_idx = [i for i in range(len(texts)) if i % 5]
+            test_idx = [i for i in range(len(texts)) if not i % 5]
+            candidate = fit(
+                [texts[i] for i in train_idx],
+                [tag_sets[i] for i in train_idx],
+                [departments[i] for i in train_idx],
+            )
+            holdout = self._evaluate(
+                candidate,
+                [texts[i] for i in test_idx],
+                [tag_sets[i] for i in test_idx],
+                [departments[i] for i in test_idx],
+            )
+
+        model = fit(texts, tag_sets, departments)
+        with self._lock:
+            self._model = model
+            self._trained_at = datetime.utcnow()
+            self._training_rows = len(texts)
+            self._holdout = holdout
+        logger.info(
+            "Label model trained on %d rows (%d tags) holdout=%s",
+            len(texts),
+            len(vocabulary),
+            holdout,
+        )
+        return {"trained": True, "training_rows": len(texts), "holdout": holdout}
+
+    def predict(self, title: str, description: str) -> Optional[Dict[str, Any]]:
+        """Predict tags and department; None when no model has been trained yet."""
+        with self._lock:
+            model = self._model
+        if model is None:
+            return None
+        features = model["vectorizer"].transform([f"{title or ''} {description or ''}"])
+        return self._predict_features(model, features)[0]
+
+    def predict_many(self, items: Sequence[Tuple[str, str]]) -> Optional[List[Dict[str, Any]]]:
+        """:meth:`predict` for many ``(title, description)`` pairs in one vectorizer pass."""
+        with self._lock:
+            model = self._model
+        if model is None:
+            return None
+        if not items:
+            return []
+        features = model["vectorizer"].transform(
+            [f"{title or ''} {description or ''}" for title, description in items]
+        )
+        return self._predict_features(model, features)
+
+    def _predict_features(self, model: Dict[str, Any], features) -> List[Dict[str, Any]]:
+        tag_probabilities = model["tags"].predict_proba(features)
+        classes = model["binarizer"].classes_
+        department_probabilities = None
+        if model["department"] is not None:
+            department_probabilities = model["department"].predict_proba(features)
+
+        predictions = []
+        for row, probabilities in enumerate(tag_probabilities):
+            ranked = np.argsort(-probabilities)[: self.MAX_TAGS]
+            chosen = [int(i) for i in ranked if probabilities[i] >= 0.5]
+            if not chosen:
+                chosen = [int(ranked[0])]
+            tag_confidence = float(np.mean([probabilities[i] for i in chosen]))
+            department = None
+            department_confidence = 0.0
+            if department_probabilities is not None:
+                best = int(np.argmax(department_probabilities[row]))
+                department = str(model["department"].classes_[best])
+                department_confidence = float(department_probabilities[row][best])
+            predictions.append(
+                {
+                    "tags": [str(classes[i]) for i in chosen],
+                    "tag_confidence": tag_confidence,
+                    "department": department,
+                    "department_confidence": department_confidence,
+                }
+            )
+        return predictions
+
+    def _evaluate(
+        self,
+        model: Dict[str, Any],
+        texts: List[str],
+        tag_sets: List[List[str]],
+        departments: List[str],
+    ) -> Dict[str, Any]:
+        predictions = self._predict_features(model, model["vectorizer"].transform(texts))
+        true_positive = predicted_total = actual_total = department_hits = confident = 0
+        for prediction, actual_tags, department in zip(predictions, tag_sets, departments):
+            predicted = set(prediction["tags"])
+            actual = set(actual_tags)
+            true_positive += len(predicted & actual)
+            predicted_total += len(predicted)
+            actual_total += len(actual)
+            department_hits += int(prediction["department"] == department)
+            confident += int(prediction["tag_confidence"] >= self.confidence_threshold)
+        return {
+            "rows": len(texts),
+            "tag_precision": round(true_positive / predicted_total, 4) if predicted_total else 0.0,
+            "tag_recall": round(true_positive / actual_total, 4) if actual_total else 0.0,
+            "department_accuracy": round(department_hits / len(texts), 4) if texts else 0.0,
+            "confident_fraction": round(confident / len(texts), 4) if texts else 0.0,
+        }
+
+    def record_served(self) -> None:
+        with self._lock:
+            self._stats["model_served"] += 1
+
+    def record_llm_comparison(
+        self,
+        predicted_tags: Optional[List[str]],
+        llm_tags: List[str],
+        population: str = "fallback",
+    ) -> None:
+        """
+        Track agreement between a prediction and the LLM's tags: a low-confidence
+        prediction the LLM replaced (``fallback``) or a sampled confident one
+        (``shadow``).
+        """
+        with self._lock:
+            if population == "fallback":
+                self._stats["llm_fallbacks"] += 1
+            if predicted_tags is None or list(llm_tags) == list(FALLBACK_TAGS):
+                return
+            predicted = set(predicted_tags)
+            actual = set(llm_tags)
+            union = predicted | actual
+            agreement = self._agreement[population]
+            agreement["compared"] += 1
+            agreement["tag_jaccard_total"] += len(predicted & actual) / len(union) if union else 1.0
+            agreement["exact_tag_matches"] += int(predicted == actual)
+
+    def maybe_shadow(self, title: str, description: str, predicted_tags: List[str]) -> None:
+        """Send a sampled confident prediction to the LLM in the background for comparison."""
+        if self.shadow_sample_rate <= 0 or random.random() >= self.shadow_sample_rate:
+            return
+        with self._lock:
+            if self._shadow_pending >= self.MAX_PENDING_SHADOW_CALLS:
+                self._stats["shadow_skipped"] += 1
+                return
+            if self._shadow_pool is None:
+                self._shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="label-shadow")
+            self._shadow_pending += 1
+            pool = self._shadow_pool
+        pool.submit(self._shadow_compare, title, description, list(predicted_tags))
+
+    def _shadow_compare(self, title: str, description: str, predicted_tags: List[str]) -> None:
+        try:
+            # Lowest priority: shadow calls must never delay real traffic.
+            with admission_priority(Priority.SUMMARY):
+                llm_tags = generate_tags_with_ai(title, description)
+            self.record_llm_comparison(predicted_tags, llm_tags, population="shadow")
+        except Exception as exc:
+            logger.debug("Shadow classification skipped: %s", exc)
+        finally:
+            with self._lock:
+                self._shadow_pending -= 1
+
+    @staticmethod
+    def _agreement_report(agreement: Dict[str, Any]) -> Dict[str, Any]:
+        compared = agreement["compared"]
+        return {
+            "compared": compared,
+            "mean_tag_jaccard": round(agreement["tag_jaccard_total"] / compared, 4) if compared else None,
+            "exact_tag_match_rate": round(agreement["exact_tag_matches"] / compared, 4) if compared else None,
+        }
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            served = stats["model_served"] + stats["llm_fallbacks"]
+            return {
+                "ready": self._model is not None,
+                "trained_at": self._trained_at.isoformat() if self._trained_at else None,
+                "training_rows": self._training_rows,
+                "confidence_threshold": self.confidence_threshold,
+                "holdout": self._holdout,
+                "model_served": stats["model_served"],
+                "llm_fallbacks": stats["llm_fallbacks"],
+                "model_served_fraction": round(stats["model_served"] / served, 4) if served else 0.0,
+                "llm_agreement": {
+                    "fallback": self._agreement_report(self._agreement["fallback"]),
+                    "shadow": {
+                        **self._agreement_report(self._agreement["shadow"]),
+                        "sample_rate": self.shadow_sample_rate,
+                        "skipped": stats["shadow_skipped"],
+                    },
+                },
+            }
+
+
+_LABEL_MODEL: Optional[GrievanceLabelModel] = None
+
+
+def get_label_model() -> GrievanceLabelModel:
+    """Get or create the process-wide grievance label model."""
+    global _LABEL_MODEL
+    if _LABEL_MODEL is None:
+        _LABEL_MODEL = GrievanceLabelModel(
+            confidence_threshold=settings.classifier.confidence_threshold,
+            retrain_interval_seconds=settings.classifier.retrain_interval_seconds,
+            min_training_rows=settings.classifier.min_training_rows,
+            shadow_sample_rate=settings.classifier.shadow_sample_rate,
+        )
+    return _LABEL_MODEL
+
+
+class GrievanceVectorIndex:
+    """
+    In-memory cosine-similarity index over grievance embeddings.
+    Rows are kept L2-normalised in a contiguous matrix so a query is a single
+    matrix-vector product. The index loads lazily from MongoDB, picks up rows
+    written by other workers incrementally via ``updated_at``, and is updated
+    in place by ``persist_embedding`` for writes made in this process.
+    """
+
+    def __init__(self, refresh_interval_seconds: int = 60):
+        self.refresh_interval = max(0, int(refresh_interval_seconds))
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._ids: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._matrix = None
+        self._dimension: Optional[int] = None
+        self._loaded = False
+        self._last_refresh: float = 0.0
+        self._high_watermark: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ids)
+
+    def upsert(self, grievance_id: int, embedding: Sequence[float]) -> None:
+        """Insert or replace a vector; ignored until the index has been loaded."""
+        if not HAS_NUMPY:
+            return
+        with self._lock:
+            if not self._loaded:
+                return
+        vector = self._normalise(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            self._upsert_locked(int(grievance_id), vector)
+
+    def upsert_many(self, items: Iterable[Tuple[int, Sequence[float]]]) -> None:
+        """:meth:`upsert` for many ``(grievance_id, embedding)`` pairs under one lock."""
+        if not HAS_NUMPY:
+            return
+        with self._lock:
+            if not self._loaded:
+                return
+        vectors = [(int(gid), self._normalise(embedding)) for gid, embedding in items]
+        with self._lock:
+            for grievance_id, vector in vectors:
+                if vector is not None:
+                    self._upsert_locked(grievance_id, vector)
+
+    def remove(self, grievance_ids: Iterable[int]) -> int:
+        """
+        Drop vectors from this process's index; returns how many were present.
+        Other workers keep theirs until their next full refresh, so callers
+        must tolerate search hits for rows that no longer exist.
+        """
+        removed = 0
+        with self._lock:
+            for grievance_id in grievance_ids:
+                position = self._positions.pop(int(grievance_id), None)
+                if position is None:
+                    continue
+                # Move the last row into the gap to keep the matrix contiguous.
+                last = len(self._ids) - 1
+                if position != last:
+                    moved_id = self._ids[last]
+                    self._matrix[position] = self._matrix[last]
+                    self._ids[position] = moved_id
+                    self._positions[moved_id] = position
+                self._ids.pop()
+                removed += 1
+        return removed
+
+    def get_vector(self, grievance_id: int) -> Optional[List[float]]:
+        self._ensure_fresh()
+        with self._lock:
+            position = self._positions.get(int(grievance_id))
+            if position is None:
+                return None
+            return self._matrix[position].tolist()
+
+    def search(
+        self,
+        embedding: Sequence[float],
+        top_k: int = 5,
+        exclude_ids: Iterable[int] = (),
+    ) -> List[Tuple[int, float]]:
+        """Return ``(grievance_id, cosine_similarity)`` pairs, best first."""
+        self._ensure_fresh()
+        query = self._normalise(embedding)
+        if query is None:
+            return []
+        with self._lock:
+            count = len(self._ids)
+            if not count or query.shape[0] != self._dimension:
+                return []
+            scores = self._matrix[:count] @ query
+            for grievance_id in exclude_ids:
+                position = self._positions.get(grievance_id)
+                if position is not None:
+                    scores[position] = -np.inf
+            k = min(top_k, count)
+            if k <= 0:
+                return []
+            candidates = np.argpartition(-scores, k - 1)[:k]
+            ordered = candidates[np.argsort(-scores[candidates])]
+            return [
+                (self._ids[position], float(scores[position]))
+                for position in ordered
+                if np.isfinite(scores[position])
+            ]
+
+    def refresh(self, full: bool = False) -> int:
+        """Pull new or updated embeddings from MongoDB; returns rows applied."""
+        if not HAS_NUMPY:
+            raise RuntimeError("numpy is required for the grievance vector index.")
+        with self._refresh_lock:
+            with self._lock:
+                since = None if full or not self._loaded else self._high_watermark
+            selector: Dict[str, Any] = {"embedding": {"$exists": True}}
+            if since is not None:
+                selector["updated_at"] = {"$gt": since}
+
+            # Vectors are converted outside the index lock so searches keep
+            # being served from the previous state while MongoDB is read.
+            def read_rows(repo: MongoRepository) -> List[Tuple[int, Any, Optional[datetime]]]:
+                rows = []
+                cursor = repo.embeddings.find(
+                    selector, {"grievance_id": 1, "embedding": 1, "updated_at": 1, "_id": 0}
+                )
+                for record in cursor:
+                    grievance_id = record.get("grievance_id")
+                    vector = self._normalise(record.get("embedding"))
+                    if grievance_id is None or vector is None:
+                        continue
+                    rows.append((int(grievance_id), vector, record.get("updated_at")))
+                return rows
+
+            try:
+                repo = MongoRepository()
+                with track("mongo", "embeddings.find"):
+                    rows = call("mongo", read_rows, repo, idempotent=True)
+            except RuntimeError:
+                raise
+            except Exception as exc:
+                raise RuntimeError(f"Grievance vector index refresh failed: {exc}") from exc
+
+            applied = 0
+            with self._lock:
+                if since is None:
+                    self._reset_locked()
+                for grievance_id, vector, updated_at in rows:
+                    if self._upsert_locked(grievance_id, vector):
+                        applied += 1
+                    if updated_at and (
+                        self._high_watermark is None or updated_at > self._high_watermark
+                    ):
+                        self._high_watermark = updated_at
+                self._loaded = True
+                self._last_refresh = time.monotonic()
+        logger.debug("Grievance vector index refreshed: %d rows applied", applied)
+        return applied
+
+    def _ensure_fresh(self) -> None:
+        with self._lock:
+            loaded = self._loaded
+            stale = not loaded or time.monotonic() - self._last_refresh >= self.refresh_interval
+        if not stale:
+            return
+        if loaded and self._refresh_lock.locked():
+            # Another thread is already catching up; serve the current state.
+            return
+        self.refresh()
+
+    def _reset_locked(self) -> None:
+        self._ids = []
+        self._positions = {}
+        self._matrix = None
+        self._dimension = None
+        self._high_watermark = None
+
+    def _upsert_locked(self, grievance_id: int, vector) -> bool:
+        if self._dimension is None:
+            self._dimension = vector.shape[0]
+            self._matrix = np.zeros((64, self._dimension), dtype=np.float32)
+        elif vector.shape[0] != self._dimension:
+            logger.debug(
+                "Skipping embedding for grievance %s: dimension %d != index dimension %d",
+                grievance_id,
+                vector.shape[0],
+                self._dimension,
+            )
+            return False
+
+        position = self._positions.get(grievance_id)
+        if position is None:
+            position = len(self._ids)
+            if position >= self._matrix.shape[0]:
+                grown = np.zeros((self._matrix.shape[0] * 2, self._dimension), dtype=np.float32)
+                grown[:position] = self._matrix[:position]
+                self._matrix = grown
+            self._ids.append(grievance_id)
+            self._positions[grievance_id] = position
+        self._matrix[position] = vector
+        return True
+
+    @staticmethod
+    def _normalise(embedding: Optional[Sequence[float]]):
+        if not HAS_NUMPY or embedding is None or len(embedding) == 0:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+
+_VECTOR_INDEX: Optional[GrievanceVectorIndex] = None
+
+
+def get_grievance_vector_index() -> GrievanceVectorIndex:
+    """Get or create the process-wide grievance vector index."""
+    global _VECTOR_INDEX
+    if _VECTOR_INDEX is None:
+        _VECTOR_INDEX = GrievanceVectorIndex(
+            refresh_interval_seconds=settings.vector_index.refresh_interval_seconds
+        )
+    return _VECTOR_INDEX
+
+
+class KnowledgeBaseVectorIndex:
+    """
+    In-memory snapshot of knowledge-base chunk embeddings backing
+    ``search_similar_chunks``. The KB changes in bulk (Drive syncs), so rather
+    than tracking rows the whole snapshot is rebuilt when the collection's
+    ``(count, latest updated_at)`` signature changes. The signature is checked
+    at most every ``refresh_interval`` seconds; KB writes in this process
+    invalidate the snapshot immediately.
+    """
+
+    SELECTOR = {"type": "kb_chunk", "embedding": {"$exists": True}}
+
+    def __init__(self, refresh_interval_seconds: int = 60):
+        self.refresh_interval = max(0, int(refresh_interval_seconds))
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._docs: List[Dict[str, Any]] = []
+        self._matrix = None
+        self._signature: Optional[Tuple[int, Optional[datetime]]] = None
+        self._loaded = False
+        self._checked_at: float = 0.0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._docs)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._signature = None
+            self._checked_at = 0.0
+
+    def search(self, query_embedding: Sequence[float], top_k: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """
+        Top ``top_k`` chunks with a ``score``, best first. Returns None when the
+        snapshot cannot answer (mixed or mismatched dimensions) so the caller
+        can fall back to a scan.
+        """
+        self._ensure_fresh()
+        with self._lock:
+            docs, matrix = self._docs, self._matrix
+        if not docs:
+            return []
+        if matrix is None:
+            return None
+        query = GrievanceVectorIndex._normalise(query_embedding)
+        if query is None:
+            return []
+        if query.shape[0] != matrix.shape[1]:
+            return None
+        scores = matrix @ query
+        k = min(top_k, len(docs))
+        if k <= 0:
+            return []
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ordered = candidates[np.argsort(-scores[candidates])]
+        return [{**docs[position], "score": float(scores[position])} for position in ordered]
+
+    def refresh(self, force: bool = False) -> int:
+        """Rebuild the snapshot if the collection changed; returns chunks loaded (0 if unchanged)."""
+        if not HAS_NUMPY:
+            raise RuntimeError("numpy is required for the KB vector index.")
+        with self._refresh_lock:
+            def read_signature(repo: MongoRepository) -> Tuple[int, Any]:
+                count = repo.kb_chunks.count_documents(self.SELECTOR)
+                latest = repo.kb_chunks.find_one(
+                    self.SELECTOR, {"updated_at": 1, "_id": 0}, sort=[("updated_at", -1)]
+                )
+                return count, (latest or {}).get("updated_at")
+
+            def read_chunks(repo: MongoRepository) -> Tuple[List[Dict[str, Any]], List[Any]]:
+                docs, vectors = [], []
+                for record in repo.kb_chunks.find(self.SELECTOR):
+                    vector = GrievanceVectorIndex._normalise(record.pop("embedding", None))
+                    if vector is None:
+                        continue
+                    docs.append(_stringify_object_ids(record))
+                    vectors.append(vector)
+                return docs, vectors
+
+            try:
+                repo = MongoRepository()
+                with track("mongo", "kb_chunks.signature"):
+                    signature = call("mongo", read_signature, repo, idempotent=True)
+                with self._lock:
+                    if not force and self._loaded and signature == self._signature:
+                        self._checked_at = time.monotonic()
+                        return 0
+
+                with track("mongo", "kb_chunks.find"):
+                    docs, vectors = call("mongo", read_chunks, repo, idempotent=True)
+            except RuntimeError:
+                raise
+            except Exception as exc:
+                raise RuntimeError(f"KB vector index refresh failed: {exc}") from exc
+
+            dimensions = {vector.shape[0] for vector in vectors}
+            if len(dimensions) > 1:
+                logger.warning("KB chunks have mixed embedding dimensions %s; falling back to scans", dimensions)
+            matrix = np.vstack(vectors) if len(dimensions) == 1 else None
+            with self._lock:
+                self._docs = docs
+                self._matrix = matrix
+                self._signature = signature
+                self._loaded = True
+                self._checked_at = time.monotonic()
+        logger.debug("KB vector index rebuilt: %d chunks", len(docs))
+        return len(docs)
+
+    def _ensure_fresh(self) -> None:
+        with self._lock:
+            loaded = self._loaded
+            stale = not loaded or time.monotonic() - self._checked_at >= self.refresh_interval
+        if not stale:
+            return
+        if loaded and self._refresh_lock.locked():
+            return
+        self.refresh()
+
+
+_KB_VECTOR_INDEX: Optional[KnowledgeBaseVectorIndex] = None
+
+
+def get_kb_vector_index() -> KnowledgeBaseVectorIndex:
+    """Get or create the process-wide KB vector index."""
+    global _KB_VECTOR_INDEX
+    if _KB_VECTOR_INDEX is None:
+        _KB_VECTOR_INDEX = KnowledgeBaseVectorIndex(
+            refresh_interval_seconds=settings.vector_index.refresh_interval_seconds
+        )
+    return _KB_VECTOR_INDEX
+
+
+def _invalidate_kb_vector_index() -> None:
+    if _KB_VECTOR_INDEX is not None:
+        _KB_VECTOR_INDEX.invalidate()
+
+
+class RecentGrievanceWindow:
+    """
+    Sliding-window index of recently submitted grievances for near-duplicate
+    detection. Vectors live in a fixed-size ring buffer, so a lookup is one
+    bounded matrix-vector product regardless of total grievance volume.
+    """
+
+    def __init__(self, window_seconds: int, max_entries: int):
+        self.window_seconds = max(1, int(window_seconds))
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._ids = None
+        self._timestamps = None
+        self._dimension: Optional[int] = None
+        self._cursor = 0
+        self._seeded = False
+
+    def add(self, grievance_id: int, embedding: Sequence[float], timestamp: Optional[float] = None) -> None:
+        vector = GrievanceVectorIndex._normalise(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            if self._dimension is None:
+                self._allocate_locked(vector.shape[0])
+            elif vector.shape[0] != self._dimension:
+                return
+            slot = self._cursor % self.max_entries
+            self._matrix[slot] = vector
+            self._ids[slot] = int(grievance_id)
+            self._timestamps[slot] = time.time() if timestamp is None else timestamp
+            self._cursor += 1
+
+    def remove(self, grievance_ids: Iterable[int]) -> int:
+        """Expire the window's entries for ``grievance_ids``; returns how many were live."""
+        ids = [int(grievance_id) for grievance_id in grievance_ids]
+        with self._lock:
+            filled = min(self._cursor, self.max_entries)
+            if not filled or not ids:
+                return 0
+            matches = np.isin(self._ids[:filled], ids) & (self._timestamps[:filled] > 0)
+            self._timestamps[:filled][matches] = 0.0
+            return int(matches.sum())
+
+    def nearest(self, embedding: Sequence[float]) -> Optional[Tuple[int, float]]:
+        """Most similar grievance still inside the window, as ``(id, score)``."""
+        vector = GrievanceVectorIndex._normalise(embedding)
+        if vector is None:
+            return None
+        with self._lock:
+            if self._dimension is None or vector.shape[0] != self._dimension:
+                return None
+            filled = min(self._cursor, self.max_entries)
+            if not filled:
+                return None
+            scores = self._matrix[:filled] @ vector
+            expired = self._timestamps[:filled] < time.time() - self.window_seconds
+            scores[expired] = -np.inf
+            best = int(np.argmax(scores))
+            if not np.isfinite(scores[best]):
+                return None
+            return int(self._ids[best]), float(scores[best])
+
+    def seed_from_store(self) -> None:
+        """Load embeddings written inside the window (e.g. by other workers) once."""
+        with self._lock:
+            if self._seeded:
+                return
+            self._seeded = True
+        since = datetime.utcfromtimestamp(time.time() - self.window_seconds)
+        try:
+            repo = MongoRepository()
+            with track("mongo", "embeddings.find"):
+                records = list(
+                    repo.embeddings.find(
+                        {"updated_at": {"$gt": since}, "embedding": {"$exists": True}},
+                        {"grievance_id": 1, "embedding": 1, "updated_at": 1, "_id": 0},
+                    )
+                    .sort("updated_at", 1)
+                    .limit(self.max_entries)
+                )
+            for record in records:
+                updated_at = record.get("updated_at")
+                timestamp = (
+                    (updated_at - datetime(1970, 1, 1)).total_seconds() if updated_at else None
+                )
+                self.add(record.get("grievance_id"), record.get("embedding"), timestamp)
+        except Exception as exc:
+            logger.warning("Could not seed duplicate-detection window: %s", exc)
+
+    def _allocate_locked(self, dimension: int) -> None:
+        self._dimension = dimension
+        self._matrix = np.zeros((self.max_entries, dimension), dtype=np.float32)
+        self._ids = np.zeros(self.max_entries, dtype=np.int64)
+        self._timestamps = np.zeros(self.max_entries, dtype=np.float64)
+
+
+_RECENT_WINDOW: Optional[RecentGrievanceWindow] = None
+
+
+def get_recent_grievance_window() -> RecentGrievanceWindow:
+    """Get or create the process-wide duplicate-detection window."""
+    global _RECENT_WINDOW
+    if _RECENT_WINDOW is None:
+        _RECENT_WINDOW = RecentGrievanceWindow(
+            window_seconds=settings.deduplication.window_seconds,
+            max_entries=settings.deduplication.max_entries,
+        )
+    return _RECENT_WINDOW
+
+
+def _openai_client(api_key: str):
+    try:
+        from openai import OpenAI  # type: ignore
+    except ImportError:  # pragma: no cover
+        return None
+    # Retries are done by the resilience layer so they also feed the circuit breaker.
+    return OpenAI(api_key=api_key, timeout=settings.openai.timeout_seconds, max_retries=0)
+
+
+def _openai_request(operation: str, method, **kwargs):
+    """One OpenAI API call: fail fast while the breaker is open, admit, then call with retries."""
+    ensure_available("openai")
+    with openai_call(operation):
+        return call("openai", method, idempotent=True, **kwargs)
+
+
+async def _openai_request_async(operation: str, method, **kwargs):
+    ensure_available("openai")
+    async with openai_call_async(operation):
+        return await call_async("openai", method, idempotent=True, **kwargs)
+
+
+def _fallback_embedding(text: str, reason: str = "OpenAI client not configured") -> List[float]:
+    # Deterministic fallback to keep downstream logic working offline.
+    logger.warning("%s, using fallback embedding generation", reason)
+    digest = hashlib.sha256(text.encode()).digest()
+    return [int(b) / 255.0 for b in digest]
+
+
+def _partition_summary_prompt(label: str, grievances: List[Dict[str, Any]]) -> str:
+    return (
+        f"Summarize these grievances from '{label}' in at most 80 words: "
+        "the recurring problems, their scale and any urgent items. "
+        "Fields: t=title, d=description, s=status, a=department, g=tags, c=cluster.\n"
+        f"{json.dumps(grievances, separators=(',', ':'), default=str)}"
+    )
+
+
+def _reduce_summaries_prompt(partials: List[Tuple[str, str]]) -> str:
+    sections = "\n".join(f"[{label}] {summary}" for label, summary in partials)
+    return (
+        "Combine these per-group grievance summaries into one overview with "
+        "trends and suggested actions:\n"
+        f"{sections}"
+    )
+
+
+STUDENT_SUGGESTION_UNAVAILABLE = "AI suggestions unavailable. Your grievance will be reviewed by our team."
+STUDENT_SUGGESTION_FAILED = "Your grievance will be reviewed by our team shortly."
+
+
+def _student_suggestion_prompt(grievance: Dict[str, Any], kb_chunks: List[Dict[str, Any]]) -> str:
+    # Build context from KB chunks
+    kb_context = ""
+    if kb_chunks:
+        kb_context = "\n\n**Relevant Knowledge Base Information:**\n"
+        for i, chunk in enumerate(kb_chunks[:3], 1):  # Use top 3 chunks
+            doc_name = chunk.get("doc_name", "Document")
+            excerpt = chunk.get("excerpt", "")[:200]  # Limit excerpt length
+            kb_context += f"{i}. {doc_name}: {excerpt}\n"
+
+    return f"""You are a helpful assistant helping students with their campus grievances.
+
+**Grievance:**
+Title: {grievance.get('title', 'N/A')}
+Description: {grievance.get('description', 'N/A')}
+{kb_context}
+
+Provide a brief, actionable suggestion (30-40 words max) for the student. Use markdown formatting. Focus on:
+1. Immediate steps they can take
+2. Relevant resources from the knowledge base
+3. Expected timeline or next steps
+
+Keep it concise, friendly, and solution-focused."""
+
+
+class OpenAIClientFacade:
+    def __init__(self):
+        self.api_key = settings.openai.api_key
+        self.embedding_model = settings.openai.embedding_model
+        self.chat_model = settings.openai.chat_model
+        self.client = _openai_client(self.api_key) if self.api_key else None
+
+    def generate_embedding(self, text: str, fallback_when_open: bool = True) -> List[float]:
+        """
+        Embed ``text`` with OpenAI. While the OpenAI circuit is open the
+        deterministic fallback is returned straight away, unless
+        ``fallback_when_open`` is False (ingestion would rather retry later).
+        """
+        if self.client:
+            logger.debug("Calling OpenAI API for embedding (model=%s, text_length=%d)", 
+                        self.embedding_model, len(text))
+            try:
+                response = _openai_request(
+                    "embeddings.create",
+                    self.client.embeddings.create,
+                    input=text,
+                    model=self.embedding_model,
+                )
+            except CircuitOpenError as exc:
+                if not fallback_when_open:
+                    raise
+                return _fallback_embedding(text, str(exc))
+            embedding = response.data[0].embedding
+            logger.debug("OpenAI embedding received: %d dimensions", len(embedding))
+            return embedding
+        return _fallback_embedding(text)
+
+    def generate_embeddings(self, texts: Sequence[str], fallback_when_open: bool = True) -> List[List[float]]:
+        """
+        Embed many texts, ``EMBEDDING_BATCH_SIZE`` inputs per OpenAI request.
+        Results are in the order of ``texts``.
+        """
+        if not self.client:
+            return [_fallback_embedding(text) for text in texts]
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+            batch = list(texts[start:start + EMBEDDING_BATCH_SIZE])
+            logger.debug(
+                "Calling OpenAI API for %d embeddings (model=%s)", len(batch), self.embedding_model
+            )
+            try:
+                response = _openai_request(
+                    "embeddings.create",
+                    self.client.embeddings.create,
+                    input=batch,
+                    model=self.embedding_model,
+                )
+            except CircuitOpenError as exc:
+                if not fallback_when_open:
+                    raise
+                embeddings.extend(_fallback_embedding(text, str(exc)) for text in batch)
+                continue
+            embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return embeddings
+
+    def summarize_grievances(self, grievances: List[Dict[str, Any]]) -> str:
+        if not grievances:
+            return "No grievances available for summarization."
+        prompt = (
+            "Summarize the following grievances with trends and suggested actions:\n"
+            f"{json.dumps(grievances, default=str)}"
+        )
+        if self.client:
+            completion = _openai_request(
+                "responses.create",
+                self.client.responses.create,
+                model=self.chat_model,
+                input=[{"role": "user", "content": prompt}],
+            )
+            return completion.output_text
+        return "AI summarization unavailable (missing OpenAI credentials)."
+
+    def summarize_partition(self, label: str, grievances: List[Dict[str, Any]]) -> str:
+        """Map step: summarise one cluster/department slice of grievances."""
+        completion = _openai_request(
+            "responses.create",
+            self.client.responses.create,
+            model=self.chat_model,
+            input=[{"role": "user", "content": _partition_summary_prompt(label, grievances)}],
+        )
+        return completion.output_text
+
+    def reduce_summaries(self, partials: List[Tuple[str, str]]) -> str:
+        """Reduce step: merge partition summaries into one admin summary."""
+        completion = _openai_request(
+            "responses.create",
+            self.client.responses.create,
+            model=self.chat_model,
+            input=[{"role": "user", "content": _reduce_summaries_prompt(partials)}],
+        )
+        return completion.output_text
+
+    def generate_student_suggestion(self, grievance: Dict[str, Any], kb_chunks: List[Dict[str, Any]]) -> str:
+        """
+        Generate a short, actionable suggestion for students (30-40 words) using KB context.
+        """
+        if not self.client:
+            return STUDENT_SUGGESTION_UNAVAILABLE
+
+        try:
+            completion = _openai_request(
+                "chat.completions.create",
+                self.client.chat.completions.create,
+                model=self.chat_model,
+                messages=[{"role": "user", "content": _student_suggestion_prompt(grievance, kb_chunks)}],
+                max_tokens=100,
+                temperature=0.7,
+            )
+            return completion.choices[0].message.content.strip()
+        except AdmissionRejected:
+            raise
+        except CircuitOpenError as exc:
+            logger.warning("Skipping student suggestion: %s", exc)
+            return STUDENT_SUGGESTION_UNAVAILABLE
+        except Exception as e:
+            logger.error(f"Error generating student suggestion: {e}")
+            return STUDENT_SUGGESTION_FAILED
+
+
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _loop_client(name: str, factory):
+    """
+    One client per running event loop. Async drivers bind their connection
+    pools to the loop that created them, so they cannot be process-wide like
+    get_mongo_client().
+    """
+    clients = _ASYNC_CLIENTS.setdefault(asyncio.get_running_loop(), {})
+    if name not in clients:
+        clients[name] = factory()
+    return clients[name]
+
+
+def get_async_mongo_client():
+    if AsyncMongoClient is None:
+        raise RuntimeError("pymongo>=4.9 is required for async MongoDB access.")
+    return _loop_client(
+        "mongo", lambda: AsyncMongoClient(settings.mongo.uri, **_mongo_timeouts())
+    )
+
+
+def _async_openai_client(api_key: str):
+    try:
+        from openai import AsyncOpenAI  # type: ignore
+    except ImportError:  # pragma: no cover
+        return None
+    return AsyncOpenAI(api_key=api_key, timeout=settings.openai.timeout_seconds, max_retries=0)
+
+
+class AsyncOpenAIClientFacade:
+    """asyncio counterpart of OpenAIClientFacade with the same prompts and fallbacks."""
+
+    def __init__(self):
+        self.api_key = settings.openai.api_key
+        self.embedding_model = settings.openai.embedding_model
+        self.chat_model = settings.openai.chat_model
+        self.client = (
+            _loop_client("openai", lambda: _async_openai_client(self.api_key)) if self.api_key else None
+        )
+
+    async def generate_embedding(self, text: str, fallback_when_open: bool = True) -> List[float]:
+        if self.client:
+            try:
+                response = await _openai_request_async(
+                    "embeddings.create",
+                    self.client.embeddings.create,
+                    input=text,
+                    model=self.embedding_model,
+                )
+            except CircuitOpenError as exc:
+                if not fallback_when_open:
+                    raise
+                return _fallback_embedding(text, str(exc))
+            return response.data[0].embedding
+        return _fallback_embedding(text)
+
+    async def summarize_partition(self, label: str, grievances: List[Dict[str, Any]]) -> str:
+        completion = await _openai_request_async(
+            "responses.create",
+            self.client.responses.create,
+            model=self.chat_model,
+            input=[{"role": "user", "content": _partition_summary_prompt(label, grievances)}],
+        )
+        return completion.output_text
+
+    async def reduce_summaries(self, partials: List[Tuple[str, str]]) -> str:
+        completion = await _openai_request_async(
+            "responses.create",
+            self.client.responses.create,
+            model=self.chat_model,
+            input=[{"role": "user", "content": _reduce_summaries_prompt(partials)}],
+        )
+        return completion.output_text
+
+    async def generate_student_suggestion(
+        self, grievance: Dict[str, Any], kb_chunks: List[Dict[str, Any]]
+    ) -> str:
+        if not self.client:
+            return STUDENT_SUGGESTION_UNAVAILABLE
+        try:
+            completion = await _openai_request_async(
+                "chat.completions.create",
+                self.client.chat.completions.create,
+                model=self.chat_model,
+                messages=[{"role": "user", "content": _student_suggestion_prompt(grievance, kb_chunks)}],
+                max_tokens=100,
+                temperature=0.7,
+            )
+            return completion.choices[0].message.content.strip()
+        except AdmissionRejected:
+            raise
+        except CircuitOpenError as exc:
+            logger.warning("Skipping student suggestion: %s", exc)
+            return STUDENT_SUGGESTION_UNAVAILABLE
+        except Exception as e:
+            logger.error(f"Error generating student suggestion: {e}")
+            return STUDENT_SUGGESTION_FAILED
+
+
+@traced("upload_documents_to_s3")
+def upload_documents_to_s3(grievance_id: int, documents: Iterable[Dict[str, Any]]) -> List[str]:
+    if not documents:
+        return []
+    storage = S3Storage()
+    return storage.upload_documents(grievance_id, documents)
+
+
+@traced("persist_embedding")
+def persist_embedding(grievance_id: int, embedding: List[float], meta: Dict[str, Any]) -> None:
+    repo = MongoRepository()
+    repo.upsert_embedding(grievance_id, embedding, meta)
+    get_grievance_vector_index().upsert(grievance_id, embedding)
+
+
+@traced("persist_embeddings")
+def persist_embeddings(records: List[Dict[str, Any]]) -> None:
+    """Batched :func:`persist_embedding` for ``{grievance_id, embedding, meta}`` records."""
+    if not records:
+        return
+    MongoRepository().bulk_upsert_embeddings(records)
+    get_grievance_vector_index().upsert_many(
+        (record["grievance_id"], record["embedding"]) for record in records
+    )
+
+
+@traced("refresh_embedding_meta")
+def refresh_embedding_meta(grievance_ids: Sequence[int], meta: Dict[str, Any]) -> None:
+    """Push tag/cluster changes made in SQL to the embeddings' ``meta_info`` (used by clustering)."""
+    MongoRepository().update_embedding_meta(grievance_ids, meta)
+
+
+@traced("find_recent_duplicate")
+def find_recent_duplicate(embedding: Sequence[float]) -> Optional[Tuple[int, float]]:
+    """Recent grievance whose similarity to ``embedding`` passes the dedup threshold."""
+    if not HAS_NUMPY or not settings.deduplication.enabled:
+        return None
+    window = get_recent_grievance_window()
+    window.seed_from_store()
+    match = window.nearest(embedding)
+    if match is None or match[1] < settings.deduplication.similarity_threshold:
+        return None
+    return match
+
+
+def remember_recent_grievance(grievance_id: int, embedding: Sequence[float]) -> None:
+    if not HAS_NUMPY or not settings.deduplication.enabled:
+        return
+    get_recent_grievance_window().add(grievance_id, embedding)
+
+
+def forget_recent_grievances(grievance_ids: Iterable[int]) -> int:
+    """Stop offering ``grievance_ids`` (e.g. just closed) as duplicate targets in this process."""
+    if not HAS_NUMPY or not settings.deduplication.enabled:
+        return 0
+    return get_recent_grievance_window().remove(grievance_ids)
+
+
+def find_similar_grievances(
+    embedding: Sequence[float],
+    top_k: int = 5,
+    exclude_ids: Iterable[int] = (),
+) -> List[Tuple[int, float]]:
+    """Nearest grievances to ``embedding`` as ``(grievance_id, score)`` pairs."""
+    if not HAS_NUMPY:
+        raise RuntimeError("numpy is required for the grievance vector index.")
+    return get_grievance_vector_index().search(embedding, top_k=top_k, exclude_ids=exclude_ids)
+
+
+def get_grievance_embedding(grievance_id: int) -> Optional[List[float]]:
+    """Stored embedding for a grievance, served from the in-memory index."""
+    if not HAS_NUMPY:
+        raise RuntimeError("numpy is required for the grievance vector index.")
+    return get_grievance_vector_index().get_vector(grievance_id)
+
+
+def append_chat(grievance_id: int, role: str, message: str) -> Dict[str, Any]:
+    repo = MongoRepository()
+    return repo.append_chat_message(grievance_id, role, message)
+
+
+def fetch_chat(grievance_id: int, archived: bool = False) -> Dict[str, Any]:
+    repo = MongoRepository()
+    return repo.fetch_chat(grievance_id, archived=archived)
+
+
+def fetch_cluster_analytics() -> List[Dict[str, Any]]:
+    repo = MongoRepository()
+    return repo.fetch_cluster_analytics()
+
+
+def schedule_gdrive_ingestion(folder_id: str) -> Dict[str, Any]:
+    ingestor = KnowledgeBaseIngestor()
+    response = ingestor.register_folder(folder_id)
+    poller = get_gdrive_poller()
+    poller.start(folder_id)
+    response.update(
+        {
+            "status": "POLLING",
+            "polling_interval_seconds": settings.gdrive.polling_interval_seconds,
+            "next_poll_in_seconds": 0,
+        }
+    )
+    return response
+
+
+def reindex_gdrive_folder(folder_id: str) -> Dict[str, Any]:
+    ingestor = KnowledgeBaseIngestor()
+    return ingestor.reindex_folder(folder_id)
+
+
+SUMMARY_PARTITION_SIZE = 50
+SUMMARY_MAX_WORKERS = 4
+_SUMMARY_MEMORY_CACHE: Dict[str, str] = {}
+_SUMMARY_MEMORY_CACHE_LIMIT = 1024
+# Shared by request threads, summary partition workers and the ASGI bridge.
+_SUMMARY_MEMORY_CACHE_LOCK = threading.Lock()
+
+
+def _memory_summary(cache_key: str) -> Optional[str]:
+    with _SUMMARY_MEMORY_CACHE_LOCK:
+        return _SUMMARY_MEMORY_CACHE.get(cache_key)
+
+
+def _summary_partitions(
+    grievances: List[Dict[str, Any]]
+) -> List[Tuple[str, str, List[Dict[str, Any]]]]:
+    """
+    Group compact grievances by cluster (or department when unclustered) and
+    split large groups into fixed-size slices ordered by id, so new grievances
+    only change the hash of the slice they land in.
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for item in grievances:
+        cluster = item.get("c")
+        if cluster and not str(cluster).startswith("unclustered_"):
+            label = f"cluster {cluster}"
+        else:
+            label = f"department {item.get('a') or 'OTHERS'}"
+        groups.setdefault(label, []).append(item)
+
+    partitions = []
+    for label in sorted(groups):
+        members = sorted(groups[label], key=lambda entry: entry.get("id") or 0)
+        for start in range(0, len(members), SUMMARY_PARTITION_SIZE):
+            chunk = members[start:start + SUMMARY_PARTITION_SIZE]
+            digest = hashlib.sha256(
+                json.dumps(chunk, sort_keys=True, separators=(",", ":"), default=str).encode()
+            ).hexdigest()
+            partitions.append((f"partial:{digest}", label, chunk))
+    return partitions
+
+
+def _cached_summary(repo: Optional[MongoRepository], cache_key: str) -> Optional[str]:
+    summary = _memory_summary(cache_key)
+    if summary is not None or repo is None:
+        return summary
+    try:
+        summary = repo.fetch_summary(cache_key)
+    except Exception as exc:
+        logger.warning("Summary cache lookup failed: %s", exc)
+        return None
+    if summary is not None:
+        _remember_summary(None, cache_key, summary)
+    return summary
+
+
+def _remember_summary(repo: Optional[MongoRepository], cache_key: str, summary: str) -> None:
+    with _SUMMARY_MEMORY_CACHE_LOCK:
+        if cache_key not in _SUMMARY_MEMORY_CACHE and len(_SUMMARY_MEMORY_CACHE) >= _SUMMARY_MEMORY_CACHE_LIMIT:
+            _SUMMARY_MEMORY_CACHE.pop(next(iter(_SUMMARY_MEMORY_CACHE)))
+        _SUMMARY_MEMORY_CACHE[cache_key] = summary
+    if repo is None:
+        return
+    try:
+        repo.store_summary(cache_key, summary)
+    except Exception as exc:
+        logger.warning("Summary cache write failed: %s", exc)
+
+
+def _final_summary_key(partitions: List[Tuple[str, str, List[Dict[str, Any]]]]) -> str:
+    return "final:" + hashlib.sha256(
+        "|".join(cache_key for cache_key, _, _ in partitions).encode()
+    ).hexdigest()
+
+
+@traced("summarize_for_admin")
+def summarize_for_admin(grievances: List[Dict[str, Any]]) -> str:
+    """
+    Map-reduce summary over compact grievance projections. Each partition
+    summary is cached by the content hash of its members, so only partitions
+    touched since the last run are sent to the LLM again.
+    """
+    facade = OpenAIClientFacade()
+    if not grievances:
+        return "No grievances available for summarization."
+    if not facade.client:
+        return "AI summarization unavailable (missing OpenAI credentials)."
+
+    try:
+        repo: Optional[MongoRepository] = MongoRepository()
+    except RuntimeError as exc:
+        logger.warning("Summary cache unavailable: %s", exc)
+        repo = None
+
+    partitions = _summary_partitions(grievances)
+    partials: Dict[str, str] = {}
+    pending = []
+    for cache_key, label, members in partitions:
+        cached = _cached_summary(repo, cache_key)
+        if cached is None:
+            pending.append((cache_key, label, members))
+        else:
+            partials[cache_key] = cached
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=SUMMARY_MAX_WORKERS) as pool:
+            # Each task runs in a copy of the caller's context so spans nest under the request.
+            futures = {
+                cache_key: pool.submit(
+                    contextvars.copy_context().run, facade.summarize_partition, label, members
+                )
+                for cache_key, label, members in pending
+            }
+            for cache_key, future in futures.items():
+                partials[cache_key] = future.result()
+                _remember_summary(repo, cache_key, partials[cache_key])
+    logger.info(
+        "Admin summary: %d partitions (%d recomputed, %d cached)",
+        len(partitions),
+        len(pending),
+        len(partitions) - len(pending),
+    )
+
+    ordered = [(label, partials[cache_key]) for cache_key, label, _ in partitions]
+    if len(ordered) == 1:
+        return ordered[0][1]
+    final_key = _final_summary_key(partitions)
+    summary = _cached_summary(repo, final_key)
+    if summary is None:
+        summary = facade.reduce_summaries(ordered)
+        _remember_summary(repo, final_key, summary)
+    return summary
+
+
+def _async_summary_collection():
+    try:
+        return get_async_mongo_client()[settings.mongo.db_name][settings.mongo.summary_collection]
+    except Exception as exc:
+        logger.warning("Summary cache unavailable: %s", exc)
+        return None
+
+
+async def _cached_summary_async(collection, cache_key: str) -> Optional[str]:
+    summary = _memory_summary(cache_key)
+    if summary is not None or collection is None:
+        return summary
+    try:
+        with track("mongo", "fetch_summary"):
+            record = await call_async(
+                "mongo", collection.find_one, {"_id": cache_key}, {"summary": 1}, idempotent=True
+            )
+    except Exception as exc:
+        logger.warning("Summary cache lookup failed: %s", exc)
+        return None
+    summary = record.get("summary") if record else None
+    if summary is not None:
+        _remember_summary(None, cache_key, summary)
+    return summary
+
+
+async def _remember_summary_async(collection, cache_key: str, summary: str) -> None:
+    _remember_summary(None, cache_key, summary)
+    if collection is None:
+        return
+    try:
+        with track("mongo", "store_summary"):
+            await call_async(
+                "mongo",
+                collection.update_one,
+                {"_id": cache_key},
+                {"$set": {"summary": summary, "updated_at": datetime.utcnow()}},
+                upsert=True,
+                idempotent=True,
+            )
+    except Exception as exc:
+        logger.warning("Summary cache write failed: %s", exc)
+
+
+@traced("summarize_for_admin")
+async def summarize_for_admin_async(grievances: List[Dict[str, Any]]) -> str:
+    """asyncio version of :func:`summarize_for_admin`; partitions are summarised concurrently."""
+    facade = AsyncOpenAIClientFacade()
+    if not grievances:
+        return "No grievances available for summarization."
+    if not facade.client:
+        return "AI summarization unavailable (missing OpenAI credentials)."
+
+    collection = _async_summary_collection()
+    partitions = _summary_partitions(grievances)
+    cached = await asyncio.gather(
+        *(_cached_summary_async(collection, cache_key) for cache_key, _, _ in partitions)
+    )
+    partials: Dict[str, str] = {}
+    pending = []
+    for (cache_key, label, members), summary in zip(partitions, cached):
+        if summary is None:
+            pending.append((cache_key, label, members))
+        else:
+            partials[cache_key] = summary
+
+    limit = asyncio.Semaphore(max(1, settings.asgi.summary_concurrency))
+
+    async def summarize(cache_key: str, label: str, members: List[Dict[str, Any]]) -> None:
+        async with limit:
+            partials[cache_key] = await facade.summarize_partition(label, members)
+        await _remember_summary_async(collection, cache_key, partials[cache_key])
+
+    await asyncio.gather(*(summarize(*partition) for partition in pending))
+    logger.info(
+        "Admin summary: %d partitions (%d recomputed, %d cached)",
+        len(partitions),
+        len(pending),
+        len(partitions) - len(pending),
+    )
+
+    ordered = [(label, partials[cache_key]) for cache_key, label, _ in partitions]
+    if len(ordered) == 1:
+        return ordered[0][1]
+    final_key = _final_summary_key(partitions)
+    summary = await _cached_summary_async(collection, final_key)
+    if summary is None:
+        summary = await facade.reduce_summaries(ordered)
+        await _remember_summary_async(collection, final_key, summary)
+    return summary
+
+
+@traced("embed_text")
+def embed_text(text: str) -> List[float]:
     facade = OpenAIClientFacade()
     return facade.generate_embedding(text)
 
 
+@traced("embed_texts")
+def embed_texts(texts: Sequence[str], fallback_when_open: bool = True) -> List[List[float]]:
+    facade = OpenAIClientFacade()
+    return facade.generate_embeddings(texts, fallback_when_open=fallback_when_open)
+
+
+@traced("embed_text")
+async def embed_text_async(text: str) -> List[float]:
+    facade = AsyncOpenAIClientFacade()
+    return await facade.generate_embedding(text)
+
+
+def _tag_prompt(title: str, description: str) -> str:
+    return f"""Analyze the following grievance and generate 3-5 relevant tags that categorize the issue.
+Tags should be lowercase, single words or short phrases (2-3 words max), separated by commas.
+Focus on: issue type, department, urgency, and specific problem area.
+
+Title: {title}
+Description: {description}
+
+Return only the tags as a comma-separated list, nothing else."""
+
+
+def _parse_generated_tags(completion) -> List[str]:
+    tags_str = completion.choices[0].message.content.strip()
+    # Parse comma-separated tags and clean them
+    tags = [tag.strip().lower() for tag in tags_str.split(",") if tag.strip()]
+    logger.info(f"Generated {len(tags)} tags using OpenAI: {tags}")
+    return tags[:5]  # Limit to 5 tags max
+
+
+@traced("generate_tags_with_ai")
 def generate_tags_with_ai(title: str, description: str) -> List[str]:
     """
     Generate relevant tags for a grievance using OpenAI based on title and description.
@@ -1178,75 +3186,242 @@ def generate_tags_with_ai(title: str, description: str) -> List[str]:
     facade = OpenAIClientFacade()
     if not facade.client:
         logger.warning("OpenAI client not configured, returning default tags")
-        return ["general", "unclassified"]
-    
-    prompt = f"""Analyze the following grievance and generate 3-5 relevant tags that categorize the issue.
-Tags should be lowercase, single words or short phrases (2-3 words max), separated by commas.
-Focus on: issue type, department, urgency, and specific problem area.
+        return list(FALLBACK_TAGS)
 
-Title: {title}
-Description: {description}
+    try:
+        completion = _openai_request(
+            "chat.completions.create",
+            facade.client.chat.completions.create,
+            model=facade.chat_model,
+            messages=[{"role": "user", "content": _tag_prompt(title, description)}],
+            max_tokens=100,
+            temperature=0.3,
+        )
+        return _parse_generated_tags(completion)
+    except AdmissionRejected:
+        raise
+    except CircuitOpenError as exc:
+        logger.warning("%s, returning default tags", exc)
+        return list(FALLBACK_TAGS)
+    except Exception as e:
+        logger.error(f"Error generating tags with OpenAI: {e}")
+        return list(FALLBACK_TAGS)
 
-Return only the tags as a comma-separated list, nothing else."""
+
+@traced("generate_tags_with_ai")
+async def generate_tags_with_ai_async(title: str, description: str) -> List[str]:
+    facade = AsyncOpenAIClientFacade()
+    if not facade.client:
+        logger.warning("OpenAI client not configured, returning default tags")
+        return list(FALLBACK_TAGS)
 
     try:
-        completion = facade.client.chat.completions.create(
+        completion = await _openai_request_async(
+            "chat.completions.create",
+            facade.client.chat.completions.create,
             model=facade.chat_model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=[{"role": "user", "content": _tag_prompt(title, description)}],
             max_tokens=100,
             temperature=0.3,
         )
-        tags_str = completion.choices[0].message.content.strip()
-        # Parse comma-separated tags and clean them
-        tags = [tag.strip().lower() for tag in tags_str.split(",") if tag.strip()]
-        logger.info(f"Generated {len(tags)} tags using OpenAI: {tags}")
-        return tags[:5]  # Limit to 5 tags max
+        return _parse_generated_tags(completion)
+    except AdmissionRejected:
+        raise
+    except CircuitOpenError as exc:
+        logger.warning("%s, returning default tags", exc)
+        return list(FALLBACK_TAGS)
     except Exception as e:
         logger.error(f"Error generating tags with OpenAI: {e}")
-        return ["general", "unclassified"]
+        return list(FALLBACK_TAGS)
+
+
+def _classify_locally(title: str, description: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Returns ``(result, prediction)``; ``result`` is set when the local model is confident."""
+    if not settings.classifier.enabled or not HAS_SKLEARN:
+        return None, None
+    model = get_label_model()
+    prediction = None
+    try:
+        prediction = model.predict(title, description)
+    except Exception as exc:
+        logger.warning("Label model prediction failed: %s", exc)
+    if prediction and prediction["tag_confidence"] >= model.confidence_threshold:
+        model.record_served()
+        model.maybe_shadow(title, description, prediction["tags"])
+        department = None
+        if prediction["department_confidence"] >= model.confidence_threshold:
+            department = prediction["department"]
+        return {"tags": prediction["tags"], "department": department, "source": "model"}, prediction
+    return None, prediction
+
+
+def _llm_classification(prediction: Optional[Dict[str, Any]], tags: List[str]) -> Dict[str, Any]:
+    if settings.classifier.enabled and HAS_SKLEARN:
+        get_label_model().record_llm_comparison(
+            prediction["tags"] if prediction else None, tags
+        )
+    return {"tags": tags, "department": None, "source": "llm"}
+
+
+@traced("classify_grievance")
+def classify_grievance(title: str, description: str) -> Dict[str, Any]:
+    """
+    Predict tags (and department) with the local model, falling back to the
+    LLM when the model is missing or not confident enough.
+    """
+    result, prediction = _classify_locally(title, description)
+    if result is not None:
+        return result
+    return _llm_classification(prediction, generate_tags_with_ai(title, description))
+
+
+@traced("classify_grievance")
+async def classify_grievance_async(title: str, description: str) -> Dict[str, Any]:
+    # Vectorizing and scoring is CPU work; keep it off the event loop.
+    result, prediction = await asyncio.to_thread(_classify_locally, title, description)
+    if result is not None:
+        return result
+    return _llm_classification(prediction, await generate_tags_with_ai_async(title, description))
+
+
+CLASSIFY_LLM_MAX_WORKERS = 4
+
+
+@traced("classify_grievances")
+def classify_grievances(items: Sequence[Tuple[str, str]], use_llm: bool = True) -> List[Dict[str, Any]]:
+    """
+    :func:`classify_grievance` for many ``(title, description)`` pairs. The
+    local model scores the whole batch at once; rows it is not confident
+    about go to the LLM (a few at a time) unless ``use_llm`` is False, in
+    which case they get the model's best guess or the fallback tags.
+    """
+    predictions: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    model = get_label_model() if settings.classifier.enabled and HAS_SKLEARN else None
+    if model is not None and items:
+        try:
+            predictions = model.predict_many(items) or predictions
+        except Exception as exc:
+            logger.warning("Label model batch prediction failed: %s", exc)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    uncertain = []
+    for position, prediction in enumerate(predictions):
+        if prediction and prediction["tag_confidence"] >= model.confidence_threshold:
+            model.record_served()
+            if use_llm:
+                model.maybe_shadow(*items[position], prediction["tags"])
+            department = None
+            if prediction["department_confidence"] >= model.confidence_threshold:
+                department = prediction["department"]
+            results[position] = {"tags": prediction["tags"], "department": department, "source": "model"}
+        elif not use_llm:
+            tags = prediction["tags"] if prediction else list(FALLBACK_TAGS)
+            results[position] = {"tags": tags, "department": None, "source": "model" if prediction else "fallback"}
+        else:
+            uncertain.append(position)
+
+    if uncertain:
+        with ThreadPoolExecutor(max_workers=CLASSIFY_LLM_MAX_WORKERS) as pool:
+            futures = {
+                position: pool.submit(contextvars.copy_context().run, generate_tags_with_ai, *items[position])
+                for position in uncertain
+            }
+            for position, future in futures.items():
+                try:
+                    tags = future.result()
+                except AdmissionRejected:
+                    results[position] = {"tags": list(FALLBACK_TAGS), "department": None, "source": "fallback"}
+                    continue
+                results[position] = _llm_classification(predictions[position], tags)
+    return results
 
 
+def _format_kb_suggestions(similar_chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    suggestions = []
+    for chunk in similar_chunks:
+        suggestions.append({
+            "doc_name": chunk.get("doc_name", "Unknown Document"),
+            "excerpt": chunk.get("text", "")[:300],  # First 300 chars
+            "similarity_score": chunk.get("score", 0.0),
+            "chunk_id": str(chunk.get("_id", "")),
+        })
+    logger.info(f"Found {len(suggestions)} KB suggestions for grievance")
+    return suggestions
+
+
+@traced("get_kb_suggestions_for_grievance")
 def get_kb_suggestions_for_grievance(description: str, top_k: int = 3) -> List[Dict[str, Any]]:
     """
     Get knowledge base suggestions by finding similar chunks based on the grievance description.
     Returns a list of relevant KB chunks with excerpts.
     """
     try:
+        # A fallback embedding cannot match KB vectors, so skip the lookup while OpenAI is down.
+        ensure_available("openai")
         # Generate embedding for the description
         embedding = embed_text(description)
         
         # Search for similar chunks in MongoDB
         repo = MongoRepository()
         similar_chunks = repo.search_similar_chunks(embedding, top_k=top_k)
-        
-        suggestions = []
-        for chunk in similar_chunks:
-            suggestions.append({
-                "doc_name": chunk.get("doc_name", "Unknown Document"),
-                "excerpt": chunk.get("text", "")[:300],  # First 300 chars
-                "similarity_score": chunk.get("score", 0.0),
-                "chunk_id": str(chunk.get("_id", "")),
-            })
-        
-        logger.info(f"Found {len(suggestions)} KB suggestions for grievance")
-        return suggestions
+        return _format_kb_suggestions(similar_chunks)
+    except AdmissionRejected:
+        raise
+    except CircuitOpenError as exc:
+        logger.warning("Skipping KB suggestions: %s", exc)
+        return []
     except Exception as e:
         logger.error(f"Error getting KB suggestions: {e}")
         return []
 
 
-def generate_ai_suggestions(
+@traced("get_kb_suggestions_for_grievance")
+async def get_kb_suggestions_for_grievance_async(description: str, top_k: int = 3) -> List[Dict[str, Any]]:
+    """
+    asyncio version of :func:`get_kb_suggestions_for_grievance`. The in-memory
+    index is searched in a worker thread; without it the chunks are scanned
+    through the async Mongo driver.
+    """
+    try:
+        ensure_available("openai")
+        embedding = await embed_text_async(description)
+        similar_chunks = None
+        if HAS_NUMPY:
+            try:
+                similar_chunks = await asyncio.to_thread(
+                    get_kb_vector_index().search, embedding, top_k
+                )
+            except CircuitOpenError:
+                raise
+            except RuntimeError as exc:
+                logger.warning("KB vector index unavailable, scanning chunks: %s", exc)
+        if similar_chunks is None:
+            collection = get_async_mongo_client()[settings.mongo.db_name][settings.mongo.kb_collection]
+            with track("mongo", "search_similar_chunks"):
+                all_chunks = await call_async(
+                    "mongo",
+                    lambda: collection.find(KnowledgeBaseVectorIndex.SELECTOR).to_list(None),
+                    idempotent=True,
+                )
+            similar_chunks = _rank_chunks_by_similarity(all_chunks, embedding, top_k)
+        return _format_kb_suggestions(similar_chunks)
+    except AdmissionRejected:
+        raise
+    except CircuitOpenError as exc:
+        logger.warning("Skipping KB suggestions: %s", exc)
+        return []
+    except Exception as e:
+        logger.error(f"Error getting KB suggestions: {e}")
+        return []
+
+
+def _suggestion_payload(
     grievance: Dict[str, Any],
-    related_grievances: Optional[List[Dict[str, Any]]] = None,
-    kb_chunks: Optional[List[Dict[str, Any]]] = None,
+    related_grievances: Optional[List[Dict[str, Any]]],
+    student_suggestion: str,
 ) -> Dict[str, Any]:
-    facade = OpenAIClientFacade()
-    
-    # Generate student-focused suggestion using KB chunks
-    student_suggestion = facade.generate_student_suggestion(grievance, kb_chunks or [])
-
     suggestion_id = hashlib.sha256(str(grievance.get("id", 0)).encode()).hexdigest()[:12]
-    suggestion_payload = {
+    return {
         "suggestions": [
             {
                 "confidence": 0.72,
@@ -1265,7 +3440,30 @@ def generate_ai_suggestions(
         ],
         "related_grievances": related_grievances or [],
     }
-    return suggestion_payload
+
+
+@traced("generate_ai_suggestions")
+def generate_ai_suggestions(
+    grievance: Dict[str, Any],
+    related_grievances: Optional[List[Dict[str, Any]]] = None,
+    kb_chunks: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    facade = OpenAIClientFacade()
+    
+    # Generate student-focused suggestion using KB chunks
+    student_suggestion = facade.generate_student_suggestion(grievance, kb_chunks or [])
+    return _suggestion_payload(grievance, related_grievances, student_suggestion)
+
+
+@traced("generate_ai_suggestions")
+async def generate_ai_suggestions_async(
+    grievance: Dict[str, Any],
+    related_grievances: Optional[List[Dict[str, Any]]] = None,
+    kb_chunks: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    facade = AsyncOpenAIClientFacade()
+    student_suggestion = await facade.generate_student_suggestion(grievance, kb_chunks or [])
+    return _suggestion_payload(grievance, related_grievances, student_suggestion)
 
 
 def trigger_clustering() -> Dict[str, Any]:
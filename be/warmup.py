@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+
+from config import settings
+from db import default_admin_ref, default_student_ref, engine, gdrive_config_ref, session_scope
+from utils import (
+    HAS_NUMPY,
+    HAS_SKLEARN,
+    MongoRepository,
+    get_grievance_vector_index,
+    get_kb_vector_index,
+    get_label_model,
+    get_mongo_client,
+    get_recent_grievance_window,
+)
+
+logger = logging.getLogger("grievance.warmup")
+
+LABEL_MODEL_WAIT_SECONDS = 300
+
+
+class StepSkipped(Exception):
+    """Raised by a warm-up step that does not apply to this configuration."""
+
+
+def _warm_database() -> Dict[str, Any]:
+    # Check out several connections at once so the pool holds that many open ones.
+    wanted = max(1, settings.warmup.database_connections)
+    connections = []
+    try:
+        for _ in range(wanted):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+    return {"connections": len(connections)}
+
+
+def _warm_mongo() -> Dict[str, Any]:
+    get_mongo_client().admin.command("ping")
+    MongoRepository()  # ensures indexes once per process
+    return {}
+
+
+def _warm_default_accounts() -> Dict[str, Any]:
+    with session_scope() as session:
+        # Fills the reference cache, so the first requests skip these lookups.
+        student = default_student_ref(session)
+        admin = default_admin_ref(session)
+        gdrive = gdrive_config_ref(session)
+        return {"student_id": student.id, "admin_id": admin.id, "gdrive_configured": gdrive is not None}
+
+
+def _warm_imports() -> Dict[str, Any]:
+    # Heavy dependencies are imported lazily; pay for them before taking traffic.
+    loaded = []
+    if HAS_NUMPY:
+        import numpy  # noqa: F401
+
+        loaded.append("numpy")
+    if HAS_SKLEARN:
+        import sklearn.cluster  # noqa: F401
+
+        loaded.append("sklearn")
+    if settings.openai.api_key:
+        try:
+            import openai  # noqa: F401
+
+            loaded.append("openai")
+        except ImportError:
+            pass
+    return {"modules": loaded}
+
+
+def _warm_kb_vectors() -> Dict[str, Any]:
+    if not HAS_NUMPY:
+        raise StepSkipped("numpy not installed")
+    index = get_kb_vector_index()
+    index.refresh(force=True)
+    return {"chunks": len(index)}
+
+
+def _warm_grievance_vectors() -> Dict[str, Any]:
+    if not HAS_NUMPY:
+        raise StepSkipped("numpy not installed")
+    index = get_grievance_vector_index()
+    index.refresh(full=True)
+    return {"grievances": len(index)}
+
+
+def _warm_dedup_window() -> Dict[str, Any]:
+    if not HAS_NUMPY or not settings.deduplication.enabled:
+        raise StepSkipped("deduplication disabled")
+    get_recent_grievance_window().seed_from_store()
+    return {}
+
+
+def _warm_label_model() -> Dict[str, Any]:
+    if not settings.classifier.enabled or not HAS_SKLEARN:
+        raise StepSkipped("classifier disabled")
+    model = get_label_model()
+    model.start()
+    if not model.wait_for_first_pass(LABEL_MODEL_WAIT_SECONDS):
+        raise RuntimeError(f"label model not trained after {LABEL_MODEL_WAIT_SECONDS}s")
+    return {"trained": model.is_ready()}
+
+
+WARMUP_STEPS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "database": _warm_database,
+    "mongo": _warm_mongo,
+    "default_accounts": _warm_default_accounts,
+    "imports": _warm_imports,
+    "kb_vectors": _warm_kb_vectors,
+    "grievance_vectors": _warm_grievance_vectors,
+    "dedup_window": _warm_dedup_window,
+    "label_model": _warm_label_model,
+}
+
+
+class WarmupRunner:
+    """
+    Runs the configured warm-up steps once in a background thread and retries
+    failed steps every ``retry_seconds`` until all succeed. The process is
+    ready once every step has succeeded or been skipped.
+    """
+
+    def __init__(self, steps: Sequence[Tuple[str, Callable[[], Dict[str, Any]]]], retry_seconds: int = 15):
+        self.steps = list(steps)
+        self.retry_seconds = max(1, int(retry_seconds))
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._attempts = 0
+        self._started_at: Optional[datetime] = None
+        self._ready_at: Optional[datetime] = None
+        self._ready = threading.Event()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None or self._ready.is_set():
+                return
+            self._started_at = datetime.utcnow()
+            self._thread = threading.Thread(target=self._run, name="grievance-warmup", daemon=True)
+            self._thread.start()
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def run_once(self) -> bool:
+        """Run every step that has not succeeded yet; returns readiness."""
+        with self._lock:
+            self._attempts += 1
+            pending = [
+                (name, step)
+                for name, step in self.steps
+                if self._results.get(name, {}).get("status") not in ("ok", "skipped")
+            ]
+        for name, step in pending:
+            started = time.perf_counter()
+            result: Dict[str, Any] = {"name": name}
+            try:
+                result["detail"] = step()
+                result["status"] = "ok"
+            except StepSkipped as exc:
+                result["status"] = "skipped"
+                result["detail"] = {"reason": str(exc)}
+            except Exception as exc:
+                result["status"] = "error"
+                result["error"] = f"{type(exc).__name__}: {exc}"
+                logger.warning("Warm-up step %s failed: %s", name, exc)
+            result["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            with self._lock:
+                self._results[name] = result
+
+        with self._lock:
+            ready = all(
+                self._results.get(name, {}).get("status") in ("ok", "skipped") for name, _ in self.steps
+            )
+            if ready and not self._ready.is_set():
+                self._ready_at = datetime.utcnow()
+                self._ready.set()
+        return ready
+
+    def _run(self) -> None:
+        while not self.run_once():
+            time.sleep(self.retry_seconds)
+        logger.info("Warm-up complete: %s", self.report())
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            steps: List[Dict[str, Any]] = [
+                self._results.get(name, {"name": name, "status": "pending"}) for name, _ in self.steps
+            ]
+            total_ms = None
+            if self._started_at and self._ready_at:
+                total_ms = round((self._ready_at - self._started_at).total_seconds() * 1000, 2)
+            return {
+                "ready": self._ready.is_set(),
+                "attempts": self._attempts,
+                "started_at": self._started_at.isoformat() if self._started_at else None,
+                "ready_at": self._ready_at.isoformat() if self._ready_at else None,
+                "total_ms": total_ms,
+                "steps": steps,
+            }
+
+
+_WARMUP_RUNNER: Optional[WarmupRunner] = None
+
+
+def get_warmup_runner() -> WarmupRunner:
+    global _WARMUP_RUNNER
+    if _WARMUP_RUNNER is None:
+        steps = []
+        for name in settings.warmup.steps:
+            step = WARMUP_STEPS.get(name)
+            if step is None:
+                logger.warning("Ignoring unknown warm-up step %r", name)
+                continue
+            steps.append((name, step))
+        _WARMUP_RUNNER = WarmupRunner(steps, retry_seconds=settings.warmup.retry_seconds)
+    return _WARMUP_RUNNER